@@ -0,0 +1,219 @@
+import argparse, atexit, json, os, platform, random, shutil, subprocess, sys, tempfile, time
+import numpy as np
+
+from datetime import datetime, timezone
+
+from components.dataset_reader import read_dataset, split_to_uniform, WindowIndex
+from components.dataset_cache import load_dataset
+from components.motif_scan import GenomeScanner
+from components.genetic_algorithm import GenAlgo, PopulationEngine
+from components.runner import run_genetic_algorithm
+
+GENES = 'ACTG'
+MOTIF_LENGTHS = [20, 120, 1000, 10000]
+POPULATION_SIZES = [10, 100, 1000, 10000]
+GENOME_MBASES = [1, 5]
+MAX_CELLS = 10_000_000 # largest population x motif length grid point (memory bound)
+
+# Best time per call of `fn`, calling it in loops of at least `min_time` seconds
+def measure(fn:callable, min_time:float = 0.1, repeat:int = 5):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number): fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 1 << 20: break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number): fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best, number
+
+# Synthetic FASTA with `mbases` million bases in 80 column lines, split over a few records
+def write_synthetic_fasta(path:str, mbases:float, records:int = 4, seed:int = 0):
+    rng = np.random.default_rng(seed)
+    alphabet = np.frombuffer(GENES.encode('ascii'), dtype=np.uint8)
+    per_record = int(mbases * 1_000_000) // records
+    with open(path, 'wb') as file:
+        for r in range(records):
+            file.write(f">synthetic_{r} {per_record} bases\n".encode('ascii'))
+            bases = alphabet[rng.integers(0, 4, per_record)]
+            lines = [bases[i:i + 80].tobytes() for i in range(0, per_record, 80)]
+            file.write(b'\n'.join(lines) + b'\n')
+
+def random_individual(length:int):
+    return [random.choice(GENES) for _ in range(length)]
+
+# Setups build the inputs once and return the callable that gets timed
+def setup_genalgo(operation:str, length:int):
+    algorithm = GenAlgo(GENES, random_individual(length))
+    a, b = random_individual(length), random_individual(length)
+    if operation == "fitness": return lambda: algorithm.fitness(a)
+    if operation == "crossover": return lambda: algorithm.crossover(a, b, length // 2)
+    return lambda: algorithm.mutate(a, 5)
+
+def setup_engine(operation:str, size:int, length:int):
+    engine = PopulationEngine(GENES, random_individual(length), np.random.default_rng(0))
+    population = engine.random_population(size)
+    population, fitness = engine.sort_population(population, engine.fitness(population))
+    if operation == "fitness": return lambda: engine.fitness(population)
+    if operation == "crossover": return lambda: engine.crossover(population, population[::-1], engine.crossover_points(size))
+    if operation == "mutate": return lambda: engine.mutate(population, 5)
+    prefix = engine.prefix_matches(population)
+    return lambda: engine.next_generation(population, fitness, 1, 5, max(2, size // 3), prefix=prefix)
+
+def setup_run(size:int, length:int, max_gen:int):
+    target = random_individual(length)
+    return lambda: run_genetic_algorithm(GENES, target, population_size=size, max_gen=max_gen, mutation_probability=1, seed=0)
+
+def setup_dataset(operation:str, path:str):
+    if operation == "read_dataset": return lambda: read_dataset(path)
+    if operation == "load_cached":
+        cache_dir = tempfile.mkdtemp()
+        atexit.register(shutil.rmtree, cache_dir, True)
+        load_dataset(path, cache_dir)
+        return lambda: load_dataset(path, cache_dir)
+    dataset = read_dataset(path)
+    if operation == "split_to_uniform": return lambda: split_to_uniform(dataset, 120)
+    if operation == "window_index": return lambda: WindowIndex(dataset, 120)
+    windows = WindowIndex(dataset, 120)
+    if operation == "scan_x20":
+        scanner = GenomeScanner(dataset)
+        individuals = [windows.random_window() for _ in range(20)]
+        return lambda: scanner.scan_population(individuals)
+    return lambda: [windows.random_window() for _ in range(1000)]
+
+# Every (name, params, setup) case, micro benchmarks first, then whole generations and runs
+def benchmark_cases(datasets:list[str], max_cells:int):
+    for length in MOTIF_LENGTHS:
+        for operation in ("fitness", "crossover", "mutate"):
+            yield f"genalgo.{operation}", {"motif_length": length}, lambda o=operation, l=length: setup_genalgo(o, l)
+
+    for size in POPULATION_SIZES:
+        for length in MOTIF_LENGTHS:
+            if size * length > max_cells: continue
+            for operation in ("fitness", "crossover", "mutate", "next_generation"):
+                yield f"engine.{operation}", {"population": size, "motif_length": length}, lambda o=operation, s=size, l=length: setup_engine(o, s, l)
+
+    yield "runner.run_genetic_algorithm", {"population": 20, "motif_length": 120, "max_gen": 500}, lambda: setup_run(20, 120, 500)
+
+    for path in datasets:
+        params = {"dataset": os.path.basename(path), "bytes": os.path.getsize(path)}
+        for operation in ("read_dataset", "load_cached", "split_to_uniform", "window_index", "random_windows_x1000", "scan_x20"):
+            yield f"dataset.{operation}", params, lambda o=operation, p=path: setup_dataset(o, p)
+
+# Cold start timings, each measured in a fresh interpreter (no display needed: SDL dummy driver)
+STARTUP_SCRIPT = '''
+import json, os, sys, time
+start = time.perf_counter()
+import components.genetic_algorithm, components.dataset_reader
+engine = time.perf_counter() - start
+pygame_free = 'pygame' not in sys.modules
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+start = time.perf_counter()
+import main
+imported = time.perf_counter() - start
+
+app = main.main()
+app.run(frames=1)
+while app.dataset_ready_time is None: app.run(frames=1)
+print(json.dumps({"import_engine": engine, "engine_pygame_free": pygame_free, "import_main": imported, "first_frame": app.startup_time, "dataset_ready": app.dataset_ready_time}))
+'''
+
+def startup_cases(repeat:int = 5):
+    root = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=root, capture_output=True, text=True, timeout=120)
+        if process.returncode != 0: raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "startup script failed")
+        samples.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    if not all(sample["engine_pygame_free"] for sample in samples): raise RuntimeError("importing the engine or dataset reader pulled in pygame")
+    for name in ("import_engine", "import_main", "first_frame", "dataset_ready"):
+        yield f"startup.{name}", {}, min(sample[name] for sample in samples), repeat
+
+def case_key(name:str, params:dict):
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items() if k != "bytes") + "]"
+
+def run_benchmarks(datasets:list[str], max_cells:int = MAX_CELLS, min_time:float = 0.1, only:str = None, out = sys.stdout):
+    results = {}
+    for name, params, setup in benchmark_cases(datasets, max_cells):
+        key = case_key(name, params)
+        if only and only not in key: continue
+
+        random.seed(0)
+        seconds, number = measure(setup(), min_time)
+        results[key] = {"name": name, "params": params, "seconds": seconds, "number": number}
+        out.write(f"{key:<70} {seconds * 1e3:12.4f} ms\n")
+        out.flush()
+
+    if not only or "startup" in only:
+        try:
+            for name, params, seconds, number in startup_cases():
+                key = case_key(name, params)
+                results[key] = {"name": name, "params": params, "seconds": seconds, "number": number}
+                out.write(f"{key:<70} {seconds * 1e3:12.4f} ms\n")
+        except (RuntimeError, subprocess.TimeoutExpired) as error:
+            out.write(f"startup timings skipped: {error}\n")
+
+    return {
+        "meta": {
+            "date"      : datetime.now(timezone.utc).isoformat(),
+            "python"    : platform.python_version(),
+            "numpy"     : np.__version__,
+            "machine"   : platform.machine(),
+            "processor" : platform.processor(),
+        },
+        "results": results,
+    }
+
+# Cases slower than the baseline by more than `threshold` (0.1 = 10 %)
+def compare(current:dict, baseline:dict, threshold:float):
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None: continue
+        ratio = result["seconds"] / base["seconds"]
+        if ratio > 1 + threshold: regressions.append((key, base["seconds"], result["seconds"], ratio))
+    return regressions
+
+def parse_args(argv:list[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the GA and dataset reader hot paths (no display needed)")
+    parser.add_argument("--save", help="write the results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio flagged as a regression (default 0.10 = 10%%)")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.1, help="minimum seconds spent timing each case")
+    parser.add_argument("--max-cells", type=int, default=MAX_CELLS, help="skip population x motif length grid points above this")
+    parser.add_argument("--genome-mb", type=float, nargs="*", default=GENOME_MBASES, help="synthetic FASTA sizes in million bases")
+    parser.add_argument("--datasets", nargs="*", default=["individuals/ecoli.old.fna", "individuals/ecoli.new.fna"], help="real FASTA files to include")
+    return parser.parse_args(argv)
+
+def main(argv:list[str] = None):
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        datasets = [path for path in args.datasets if os.path.exists(path)]
+        for mbases in args.genome_mb:
+            path = os.path.join(tmp, f"synthetic_{mbases:g}mb.fna")
+            write_synthetic_fasta(path, mbases)
+            datasets.append(path)
+
+        current = run_benchmarks(datasets, args.max_cells, args.min_time, args.filter)
+
+    if args.save:
+        with open(args.save, 'w') as file: json.dump(current, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file: baseline = json.load(file)
+        regressions = compare(current, baseline, args.threshold)
+        for key, before, after, ratio in regressions:
+            print(f"REGRESSION {key}: {before * 1e3:.4f} ms -> {after * 1e3:.4f} ms ({(ratio - 1) * 100:+.1f}%)")
+        if regressions: sys.exit(1)
+        print(f"No regressions above {args.threshold * 100:.0f}%")
+
+if __name__ == '__main__': main()
@@ -0,0 +1,145 @@
+import numpy as np
+
+from collections.abc import Iterable
+
+from components.genetic_algorithm import PREFIX_BLOCK, PopulationEngine
+
+class BatchEngine(PopulationEngine):
+    """
+    `PopulationEngine` for many targets at once.
+
+    Populations are a uint8 (T x N x L) array, one (N x L) population per target, and the
+    targets a (T x L) array (`set_targets`), so a generation of every target in the batch
+    is a handful of vectorized calls. The `PopulationEngine` operators broadcast over the
+    batch, so `next_generation` carries the prefix matches and only rescores crossover
+    blocks and mutated genes, as for a single population. Rows of a batch can be removed
+    and added between generations.
+
+    Elites are the fittest distinct rows of each population; a population with fewer
+    distinct rows than `elite_carryover` carries duplicates instead of breeding more
+    children, so every population keeps the same shape.
+    """
+    def __init__(self, genes:list | str, length:int, rng:np.random.Generator = None):
+        super().__init__(genes, '', rng)
+        self.set_targets(np.empty((0, length), dtype=np.uint8))
+
+    # Replace the (T x L) gene index targets, one per population of the batch
+    def set_targets(self, targets:np.ndarray):
+        self.target = targets[:, None, :]
+        self.length = targets.shape[-1]
+        self.blocks = -(-self.length // PREFIX_BLOCK)
+
+    def random_populations(self, targets:int, size:int):
+        return self.rng.integers(0, len(self.genes), size=(targets, size, self.length), dtype=np.uint8)
+
+    # (T x count) indexes of the first `count` distinct rows of every sorted population
+    # (padded with the first repeated rows when a population has fewer distinct ones); rows
+    # are compared whole, as one byte string each
+    def elite_indexes(self, populations:np.ndarray, count:int):
+        if count == 0: return np.empty((len(populations), 0), dtype=np.intp)
+        rows = np.ascontiguousarray(populations).view(np.dtype((np.void, self.length)))[..., 0]
+
+        # The first of equal rows (lowest index, as the sort is stable) is the distinct one
+        order = np.argsort(rows, axis=1, kind='stable')
+        ordered = np.take_along_axis(rows, order, axis=1)
+        first = np.ones(rows.shape, dtype=bool)
+        first[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+
+        distinct = np.empty_like(first)
+        np.put_along_axis(distinct, order, first, axis=1)
+        return np.argsort(~distinct, axis=1, kind='stable')[:, :count]
+
+def solve_targets(genes:list | str, targets:Iterable, population_size:int = 10, max_gen:int = 100, elite_carryover:int = 1, mutation_probability:float = 5, selection_candidates:int = None, batch_size:int = 256, initial_population:callable = None, seed:int | np.random.SeedSequence = None):
+    """
+    Run the genetic algorithm against every target of `targets` (equally long str or lists),
+    `batch_size` targets at a time on a `BatchEngine`.
+
+    Targets leave the batch as soon as they are solved or reach `max_gen`, and waiting
+    targets take their place, so the batch stays full until `targets` runs out.
+    `initial_population(index, target)` may return the first generation of a target (a list
+    of individuals); uniformly random ones are used otherwise.
+
+    Yields one dict per target, in the order they finish, with `index` (position in
+    `targets`), `target`, `generations` (or None), `solved`, `best_fitness` (final),
+    `best_individual` and `skipped`. Targets with genes outside `genes` (such as N in a
+    genome window) are not run: they are yielded right away as skipped, with no fitness
+    and no individual.
+    """
+    if selection_candidates is None: selection_candidates = population_size // 3
+    targets = iter(enumerate(targets))
+    rng = np.random.default_rng(seed)
+
+    try: first = next(targets)
+    except StopIteration: return
+    engine = BatchEngine(genes, len(first[1]), rng)
+    pending = [first]
+
+    populations = np.empty((0, population_size, engine.length), dtype=np.uint8)
+    fitness = np.empty((0, population_size), dtype=np.int64)
+    prefix = np.empty((0, population_size, engine.blocks + 1), dtype=np.int32)
+    batch_targets = np.empty((0, engine.length), dtype=np.uint8)
+    indexes, gens = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    exhausted = False
+
+    while True:
+        # Admit waiting targets into the free slots
+        while not exhausted and len(pending) < batch_size - len(indexes):
+            try: pending.append(next(targets))
+            except StopIteration: exhausted = True
+
+        admitted, encoded = [], []
+        for index, target in pending:
+            if len(target) != engine.length: raise ValueError("Targets must all have the same length")
+            try: encoded.append(engine.encode(target))
+            except ValueError:
+                yield {"index": index, "target": ''.join(target), "generations": None, "solved": False, "best_fitness": None, "best_individual": None, "skipped": True}
+                continue
+            admitted.append((index, target))
+        pending = []
+
+        if admitted:
+            new_targets = np.stack(encoded)
+            new_populations = engine.random_populations(len(admitted), population_size)
+            if initial_population is not None:
+                for i, (index, target) in enumerate(admitted):
+                    individuals = initial_population(index, target)
+                    if individuals is not None: new_populations[i] = engine.encode_population(individuals)
+
+            # Scored against their own targets before they join the batch
+            engine.set_targets(new_targets)
+            new_populations, new_fitness = engine.sort_population(new_populations, engine.fitness(new_populations))
+            new_prefix = engine.prefix_matches(new_populations)
+
+            populations = np.concatenate((populations, new_populations))
+            fitness = np.concatenate((fitness, new_fitness))
+            prefix = np.concatenate((prefix, new_prefix))
+            batch_targets = np.concatenate((batch_targets, new_targets))
+            engine.set_targets(batch_targets)
+            indexes = np.concatenate((indexes, [index for index, _ in admitted]))
+            gens = np.concatenate((gens, np.ones(len(admitted), dtype=np.int64)))
+
+        if len(indexes) == 0:
+            if exhausted: return
+            continue
+
+        # Report and drop the solved and the exhausted targets
+        solved = fitness[:, 0] == 0
+        done = solved | (gens >= max_gen)
+        for i in np.flatnonzero(done):
+            yield {
+                "index"             : int(indexes[i]),
+                "target"            : ''.join(engine.decode(batch_targets[i])),
+                "generations"       : int(gens[i]) if solved[i] else None,
+                "solved"            : bool(solved[i]),
+                "best_fitness"      : int(fitness[i, 0]),
+                "best_individual"   : ''.join(engine.decode(populations[i, 0])),
+                "skipped"           : False,
+            }
+        if done.any():
+            keep = ~done
+            populations, fitness, prefix, batch_targets, indexes, gens = populations[keep], fitness[keep], prefix[keep], batch_targets[keep], indexes[keep], gens[keep]
+            engine.set_targets(batch_targets)
+            continue
+
+        populations, fitness, prefix = engine.next_generation(populations, fitness, elite_carryover, mutation_probability, selection_candidates, prefix=prefix)
+        gens += 1
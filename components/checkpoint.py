@@ -0,0 +1,95 @@
+import json, math, os, queue, struct, threading
+import numpy as np
+
+MAGIC = b'GACKPT'
+VERSION = 1
+_PREFIX = struct.Struct('<6sBI') # magic, version, header length
+
+# (N x L) gene indexes -> bytes with `bits` bits per gene
+def pack_codes(codes:np.ndarray, bits:int):
+    shifts = np.arange(bits - 1, -1, -1, dtype=np.uint8)
+    return np.packbits((codes[..., None] >> shifts) & 1).tobytes()
+
+def unpack_codes(data:bytes, shape:tuple, bits:int):
+    count = math.prod(shape)
+    unpacked = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=count * bits).reshape(count, bits)
+    weights = (1 << np.arange(bits - 1, -1, -1)).astype(np.uint8)
+    return (unpacked * weights).sum(axis=1, dtype=np.uint8).reshape(shape)
+
+def gene_bits(genes:str):
+    return max(1, math.ceil(math.log2(len(genes))))
+
+def save_checkpoint(path:str, state:dict):
+    """
+    Write a run state atomically (temporary file + rename) in the checkpoint format:
+
+        magic, version, header length | JSON header | packed population | int32 fitness | uint32 best fitness history
+
+    The population takes `gene_bits(genes)` bits per gene (2 for ACTG). `state` holds
+    `population`, `fitness`, `best_fitness` and any JSON-compatible entries (generation,
+    parameters, RNG state, ...), which go to the header.
+    """
+    population, fitness, best_fitness = state["population"], state["fitness"], state["best_fitness"]
+    bits = gene_bits(state["genes"])
+
+    body = [pack_codes(population, bits), np.asarray(fitness, dtype='<i4').tobytes(), np.asarray(best_fitness, dtype='<u4').tobytes()]
+    header = {key: value for key, value in state.items() if key not in ("population", "fitness", "best_fitness")}
+    header.update(shape=list(population.shape), bits=bits, sections=[len(part) for part in body])
+    header = json.dumps(header).encode('utf-8')
+
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        for part in body: file.write(part)
+    os.replace(temporary, path)
+
+def load_checkpoint(path:str):
+    with open(path, 'rb') as file: data = file.read()
+
+    magic, version, header_length = _PREFIX.unpack_from(data)
+    if magic != MAGIC: raise ValueError(f"{path} is not a checkpoint")
+    if version != VERSION: raise ValueError(f"Unsupported checkpoint version {version}")
+
+    offset = _PREFIX.size + header_length
+    state = json.loads(data[_PREFIX.size:offset].decode('utf-8'))
+    sections = []
+    for length in state.pop("sections"):
+        sections.append(data[offset:offset + length])
+        offset += length
+
+    shape, bits = tuple(state.pop("shape")), state.pop("bits")
+    state["population"] = unpack_codes(sections[0], shape, bits)
+    state["fitness"] = np.frombuffer(sections[1], dtype='<i4').astype(np.int64)
+    state["best_fitness"] = np.frombuffer(sections[2], dtype='<u4').tolist()
+    return state
+
+class CheckpointWriter(threading.Thread):
+    """
+    Writes checkpoints on a background thread so the run never waits for the disk.
+
+    `submit` only hands over the state (the caller passes copies); if the previous one has
+    not been written yet it is replaced, since only the newest checkpoint matters. `close`
+    writes whatever is still pending and re-raises a write error, if any.
+    """
+    def __init__(self, path:str):
+        super().__init__(daemon=True)
+        self.path = path
+        self.states = queue.Queue(maxsize=1)
+        self.error:Exception = None
+        self.start()
+
+    def run(self):
+        while (state := self.states.get()) is not None:
+            try: save_checkpoint(self.path, state)
+            except Exception as error: self.error = error
+
+    def submit(self, state:dict):
+        try: self.states.get_nowait()
+        except queue.Empty: pass
+        self.states.put(state)
+
+    def close(self):
+        self.states.put(None)
+        self.join()
+        if self.error is not None: raise self.error
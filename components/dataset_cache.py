@@ -0,0 +1,192 @@
+import hashlib, json, mmap, os, struct
+import numpy as np
+
+from bisect import bisect_right
+
+from components.dataset_reader import IndexedDataset, GZIP_MAGIC, iter_blocks, read_dataset
+
+MAGIC = b'GA2BIT'
+VERSION = 1
+_PREFIX = struct.Struct('<6sBQI') # magic, version, header offset, header length (the header follows the packed data)
+BASES = b'ACGT'
+MAX_EXCEPTION_RUNS = 100_000 # files with more non-ACGT runs (e.g. soft-masked ones) are not cached
+
+# Base byte -> 2-bit code (255 marks bases stored as exceptions)
+_CODES = np.full(256, 255, dtype=np.uint8)
+_CODES[np.frombuffer(BASES, dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+_ALPHABET = np.frombuffer(BASES, dtype=np.uint8)
+
+class CachedDataset(IndexedDataset):
+    """
+    Dataset served from a memory-mapped 2-bit cache file written by `build_cache`.
+
+    Sequences are stored at 4 bases per byte (A, C, G, T); anything else (N runs, IUPAC
+    codes, lowercase) is kept as (start, length, byte) runs in the header. Opening the
+    file only parses the header, so loading is independent of the dataset size. The
+    record lengths are in that header too, so a `WindowIndex` of any window length is
+    built without reading a base.
+    """
+    def __init__(self, path:str):
+        self.path = path
+        self.__file = open(path, 'rb')
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_offset, header_length = _PREFIX.unpack_from(self.__map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} dataset cache")
+
+        header = json.loads(self.__map[header_offset:header_offset + header_length].decode('utf-8'))
+        self.source = header["source"]
+        data_offset = _PREFIX.size
+
+        # id -> (packed byte offset, sequence length, exception run starts, exception runs)
+        self.__records:dict[str, tuple[int, int, list[int], list[list[int]]]] = {}
+        for key, offset, length, runs in header["records"]:
+            self.__records[key] = (data_offset + offset, length, [run[0] for run in runs], runs)
+
+    def length(self, key:str):
+        return self.__records[key][1]
+
+    def fetch(self, key:str, start:int = 0, end:int = None):
+        offset, length, run_starts, runs = self.__records[key]
+        end = length if end is None else min(end, length)
+        start = max(start, 0)
+        if start >= end: return ""
+
+        packed = np.frombuffer(self.__map, dtype=np.uint8, count=(end + 3) // 4 - start // 4, offset=offset + start // 4)
+        codes = ((packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).reshape(-1)
+        skip = start % 4
+        sequence = _ALPHABET[codes[skip:skip + end - start]]
+
+        # Put back the non-ACGT runs overlapping [start, end)
+        for run_start, run_length, byte in runs[max(bisect_right(run_starts, start) - 1, 0):bisect_right(run_starts, end - 1)]:
+            lo, hi = max(run_start, start), min(run_start + run_length, end)
+            if lo < hi: sequence[lo - start:hi - start] = byte
+        return sequence.tobytes().decode('ascii')
+
+    def close(self):
+        self.__map.close()
+        self.__file.close()
+
+    def __iter__(self):
+        return iter(self.__records)
+
+    def __len__(self):
+        return len(self.__records)
+
+# (start, length, byte) runs of the non-ACGT bases of an encoded sequence
+def _exception_runs(raw:np.ndarray, codes:np.ndarray):
+    positions = np.flatnonzero(codes == 255)
+    if len(positions) == 0: return []
+
+    # A new run starts where the position jumps or the byte changes
+    breaks = np.flatnonzero((np.diff(positions) != 1) | (raw[positions[1:]] != raw[positions[:-1]])) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(positions)]))
+    return [[int(positions[s]), int(e - s), int(raw[positions[s]])] for s, e in zip(starts, ends)]
+
+def build_cache(source:str, path:str, block:int = 1 << 20):
+    """
+    Parse a FASTA (plain or gzip) into a 2-bit cache file at `path`, `block` bases at a time
+    (a multiple of 4), so memory stays bounded whatever the record lengths.
+    Returns False, writing nothing, if the file has too many non-ACGT runs to be worth it.
+    """
+    if block % 4: raise ValueError("Cache blocks must be a multiple of 4 bases")
+    records, offset, total_runs = [], 0, 0
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(_PREFIX.pack(MAGIC, VERSION, 0, 0))
+
+        for key, sequence in iter_blocks(source, block):
+            # A new record starts (records are [id, packed offset, length, runs])
+            if not records or records[-1][0] != key: records.append([key, offset, 0, []])
+            record = records[-1]
+
+            raw = np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)
+            codes = _CODES[raw]
+
+            # Runs are positioned in the record; one continuing from the previous block is extended
+            runs = record[3]
+            for start, length, byte in _exception_runs(raw, codes):
+                start += record[2]
+                if runs and runs[-1][0] + runs[-1][1] == start and runs[-1][2] == byte: runs[-1][1] += length
+                else:
+                    runs.append([start, length, byte])
+                    total_runs += 1
+            if total_runs > MAX_EXCEPTION_RUNS: break
+
+            padded = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+            padded[:len(codes)] = np.where(codes == 255, 0, codes)
+            packed = (padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)).tobytes()
+
+            record[2] += len(codes)
+            file.write(packed)
+            offset += len(packed)
+        else:
+            header = json.dumps({"source": os.path.abspath(source), "records": records}).encode('utf-8')
+            file.write(header)
+            file.seek(0)
+            file.write(_PREFIX.pack(MAGIC, VERSION, _PREFIX.size + offset, len(header)))
+
+    if total_runs > MAX_EXCEPTION_RUNS:
+        os.remove(temporary)
+        return False
+    os.replace(temporary, path)
+    return True
+
+# Cache file name: source path hash + fingerprint (size, mtime) hash, so edited files get a new entry
+def cache_path(source:str, cache_dir:str):
+    stat = os.stat(source)
+    path_key = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+    fingerprint = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode('ascii')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{path_key}-{fingerprint}.2bit")
+
+# Delete the least recently used cache files until the directory fits in `max_bytes`
+def _enforce_size_cap(cache_dir:str, max_bytes:int, keep:str):
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith('.2bit') and path != keep:
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries) + (os.path.getsize(keep) if os.path.exists(keep) else 0)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes: break
+        try: os.remove(path)
+        except OSError: continue # still mapped by another process on some platforms
+        total -= size
+
+def load_dataset(source:str, cache_dir:str = None, max_bytes:int = 1 << 30):
+    """
+    `read_dataset` through a persistent 2-bit cache in `cache_dir`.
+
+    Cache entries are keyed by the source path, size and mtime: a hit is a memory map of
+    the cache file, a changed source gets rebuilt (its stale entries are deleted), and the
+    least recently used entries are evicted beyond `max_bytes`. Falls back to
+    `read_dataset` without a cache dir, when the cache cannot be written, or for files that
+    do not encode well in 2 bits.
+    """
+    if cache_dir is None: return read_dataset(source)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = cache_path(source, cache_dir)
+
+        if not os.path.exists(path):
+            prefix = os.path.basename(path).split('-')[0] + '-'
+            for name in os.listdir(cache_dir):
+                if name.startswith(prefix): os.remove(os.path.join(cache_dir, name))
+
+            # Caching only pays off if the entry can stay (2 bits per base, about a quarter of the FASTA)
+            with open(source, 'rb') as file: compressed = file.read(2) == GZIP_MAGIC
+            if not compressed and os.path.getsize(source) // 4 > max_bytes: return read_dataset(source)
+            if not build_cache(source, path): return read_dataset(source)
+        else:
+            os.utime(path) # mark as recently used
+
+        _enforce_size_cap(cache_dir, max_bytes, path)
+        return CachedDataset(path)
+    except (OSError, ValueError):
+        return read_dataset(source)
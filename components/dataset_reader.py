@@ -1,68 +1,378 @@
-import random
+import gzip, mmap, os, random
+import numpy as np
 
-def read_dataset(path:str):
-    # if version.lower() not in ['new', 'old']: raise ValueError("Invalid version type, should be either 'new' or 'old'")
-    dataset:dict[str, str] = {}
-    with open(path) as file:
-        content = file.readlines()
-        current_entry = ''
-        for line in content:
-            line = line.removesuffix('\n')
-            if line[0] == '>':
-                current_entry = line[1:16]
-                dataset[current_entry] = ""
+from abc import abstractmethod
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from itertools import accumulate, groupby
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Binary file object of a plain or gzip-compressed (detected from its first bytes) file
+def open_fasta(path:str):
+    with open(path, 'rb') as file: compressed = file.read(2) == GZIP_MAGIC
+    return gzip.open(path, 'rb') if compressed else open(path, 'rb')
+
+# Id of the record of a file without headers (the file name, without .gz)
+def _file_record_name(path:str):
+    return os.path.basename(path).removesuffix('.gz')
+
+# Record ids the way `FastaIndex` keys them: the full header, with " (n)" added to repeated ones
+def _unique_name(name:str, known:dict[str, int]):
+    n = known.get(name, 0) + 1
+    known[name] = n
+    return name if n == 1 else f"{name} ({n})"
+
+def iter_blocks(path:str, size:int = 1 << 20):
+    """
+    Stream every record of a plain or gzip FASTA file as consecutive (id, block) pieces of
+    `size` bases, with the same ids as `FastaIndex`. The last block of a record may be
+    shorter, and an empty record is a single empty block. Memory stays bounded by a block
+    and a line, however long the records are.
+    """
+    known:dict[str, int] = {}
+    name, buffer, emitted = None, bytearray(), False
+    with open_fasta(path) as file:
+        for line in file:
+            if line.startswith(b'>'):
+                if name is not None and (buffer or not emitted): yield name, buffer.decode('ascii')
+                name, buffer, emitted = _unique_name(line[1:].decode('ascii').strip(), known), bytearray(), False
+                continue
+            if name is None: name = _unique_name(_file_record_name(path), known)
+
+            buffer += line.rstrip(b'\r\n')
+            full = len(buffer) // size * size
+            for i in range(0, full, size): yield name, buffer[i:i + size].decode('ascii')
+            if full:
+                del buffer[:full]
+                emitted = True
+
+    if name is not None and (buffer or not emitted): yield name, buffer.decode('ascii')
+
+def iter_records(path:str):
+    """
+    Stream the (id, sequence) records of a plain or gzip FASTA file, one at a time, with the
+    same ids as `FastaIndex`. The current record is held whole; use `iter_blocks` (or
+    `iter_windows`) when records can be processed piece by piece.
+    """
+    for name, blocks in groupby(iter_blocks(path), key=lambda block: block[0]):
+        yield name, ''.join(block for _, block in blocks)
+
+def iter_windows(path:str, length:int):
+    """
+    Stream the non-overlapping `length` windows of every record (the ones `split_to_uniform`
+    and `WindowIndex` give) as (id, window) pairs. Memory stays bounded by a window and a
+    line, however long the records are.
+    """
+    known:dict[str, int] = {}
+    name, buffer = None, bytearray()
+    with open_fasta(path) as file:
+        for line in file:
+            if line.startswith(b'>'):
+                name, buffer = _unique_name(line[1:].decode('ascii').strip(), known), bytearray()
+                continue
+            if name is None: name = _unique_name(_file_record_name(path), known)
+
+            buffer += line.rstrip(b'\r\n')
+            full = len(buffer) // length * length
+            for i in range(0, full, length): yield name, buffer[i:i + length].decode('ascii')
+            del buffer[:full]
+
+# `count` windows drawn uniformly without replacement in a single pass (reservoir sampling),
+# for streams that cannot be indexed, such as gzip files
+def sample_windows(windows:Iterable[str], count:int, rng = random):
+    reservoir = []
+    for i, window in enumerate(windows):
+        if i < count: reservoir.append(window)
+        else:
+            j = rng.randrange(i + 1)
+            if j < count: reservoir[j] = window
+    rng.shuffle(reservoir)
+    return reservoir
+
+class IndexedDataset(Mapping):
+    """
+    Read-only dataset that can slice a record without materializing it (`FastaIndex`,
+    `dataset_cache.CachedDataset`). Behaves like a `dict[str, str]` of the records.
+    """
+    # Sequence length of a record
+    @abstractmethod
+    def length(self, key:str): ...
+
+    # Slice [start, end) of a record's sequence
+    @abstractmethod
+    def fetch(self, key:str, start:int = 0, end:int = None): ...
+
+    def close(self): pass
+
+    def __getitem__(self, key:str):
+        return self.fetch(key)
+
+class FastaIndex(IndexedDataset):
+    """
+    Read-only FASTA dataset served from a memory map.
+
+    Opening the file only scans it once to build an offset index (record id -> sequence
+    offset, length and line layout, like a samtools .fai), so memory use does not grow
+    with the file. Sequences are sliced out of the map when accessed, and the object
+    behaves like the `dict[str, str]` that `read_dataset` used to return.
+
+    Records are keyed by their full header line (without '>'). A file without headers is
+    read as a single record named after the file.
+
+    Like samtools faidx, every sequence line of a record but the last must have the same
+    width (blank lines may only end a record); other files raise a ValueError, since
+    their offsets cannot be computed (`read_dataset` falls back to a plain read).
+    """
+    def __init__(self, path:str):
+        self.path = path
+        self.__file = open(path, 'rb')
+        size = os.fstat(self.__file.fileno()).st_size
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        # id -> (sequence byte offset, sequence length, bases per line, bytes per line)
+        self.__records:dict[str, tuple[int, int, int, int]] = {}
+        self.__build_index()
+
+    def __build_index(self):
+        mm = self.__map
+        size = len(mm)
+        pos = 0
+
+        while pos < size:
+            if mm[pos:pos + 1] == b'>':
+                eol = mm.find(b'\n', pos)
+                if eol == -1: eol = size
+                name = mm[pos + 1:eol].decode('ascii').strip()
+                start = eol + 1
             else:
-                dataset[current_entry] += line
-    return dataset
+                name = os.path.basename(self.path)
+                start = pos
+
+            # The record ends where the next line starting with '>' begins
+            nxt = mm.find(b'\n>', max(start - 1, 0))
+            end = nxt + 1 if nxt != -1 else size
+            start = min(start, end)
+
+            length, line_bases, line_bytes = self.__line_layout(name, start, end)
+
+            key, n = name, 1
+            while key in self.__records:
+                n += 1
+                key = f"{name} ({n})"
+            self.__records[key] = (start, length, line_bases, line_bytes)
+
+            pos = end
+
+    # Sequence length, bases per line and bytes per line of the record in bytes [start, end),
+    # checking the layout chunk by chunk (only the widths of one chunk's lines are held)
+    def __line_layout(self, name:str, start:int, end:int, chunk:int = 1 << 24):
+        layout, length, tail = None, 0, False # tail: the last non-blank line (or a blank one) was seen
+        line_start = start
+
+        for i in range(start, end, chunk):
+            j = min(i + chunk, end)
+            low = max(i - 1, start)
+            block = np.frombuffer(self.__map[low:j], dtype=np.uint8)
+            ends = np.flatnonzero(block[i - low:] == 10) + i
+
+            # The last line of the file may have no line break
+            if j == end and (ends[-1] + 1 if len(ends) else line_start) < end: ends = np.append(ends, end)
+            if len(ends) == 0: continue
+
+            starts = np.concatenate(([line_start], ends[:-1] + 1))
+            line_start = ends[-1] + 1
+            carriage = (ends > starts) & (block[np.maximum(ends - 1 - low, 0)] == 13)
+            bases = ends - starts - carriage
+            widths = np.minimum(ends + 1, end) - starts
+
+            if layout is None: layout = (int(bases[0]), int(widths[0]))
+            length += int(bases.sum())
+
+            # Lines match the layout up to a shorter last one; only blank lines may follow it
+            differs = (bases != layout[0]) | (widths != layout[1]) | tail
+            if differs.any():
+                k = int(np.argmax(differs))
+                if bases[k] > (0 if tail else layout[0]) or (bases[k + 1:] > 0).any():
+                    raise ValueError(f"Different line length in sequence '{name}' of {self.path}")
+                tail = True
 
-def split_to_uniform(dataset:dict[str,str], max_length:int = 100):
+        if layout is None or layout[0] == 0: return length, 1, 1
+        return length, layout[0], layout[1]
+
+    # Sequence length of a record
+    def length(self, key:str):
+        return self.__records[key][1]
+
+    # Slice [start, end) of a record's sequence, reading only the bytes it spans
+    def fetch(self, key:str, start:int = 0, end:int = None):
+        offset, length, line_bases, line_bytes = self.__records[key]
+        end = length if end is None else min(end, length)
+        start = max(start, 0)
+        if start >= end: return ""
+
+        first = offset + (start // line_bases) * line_bytes + start % line_bases
+        last = offset + ((end - 1) // line_bases) * line_bytes + (end - 1) % line_bases + 1
+        return self.__map[first:last].replace(b'\n', b'').replace(b'\r', b'').decode('ascii')
+
+    def close(self):
+        if isinstance(self.__map, mmap.mmap): self.__map.close()
+        self.__file.close()
+
+    def __iter__(self):
+        return iter(self.__records)
+
+    def __len__(self):
+        return len(self.__records)
+
+# `FastaIndex` of a file, or None for files that can only be streamed: gzip files cannot be
+# memory mapped and files with uneven line widths cannot be indexed
+def _index_or_none(path:str):
+    with open(path, 'rb') as file: compressed = file.read(2) == GZIP_MAGIC
+    if compressed: return None
+    try: return FastaIndex(path)
+    except ValueError: return None
+
+# Dataset as a `FastaIndex`; files that cannot be indexed are read into a dict (use
+# `iter_records` / `iter_blocks` / `iter_windows` to stream them instead)
+def read_dataset(path:str):
+    dataset = _index_or_none(path)
+    return dataset if dataset is not None else dict(iter_records(path))
+
+# Distinct indexes of range(count) in random order, without materializing the range while
+# most of it is still unused; switches to shuffling the leftovers so it always terminates
+def _window_indexes(count:int, rng):
+    drawn = set()
+    while len(drawn) < count // 2:
+        k = rng.randrange(count)
+        if k in drawn: continue
+        drawn.add(k)
+        yield k
+
+    rest = [k for k in range(count) if k not in drawn]
+    rng.shuffle(rest)
+    yield from rest
+
+class WindowIndex(Sequence):
+    """
+    The non-overlapping fixed-length windows of a dataset (the ones `split_to_uniform`
+    returns), without building the list.
+
+    Only the window count of every record is stored, so window k is located with a
+    binary search over the records and sliced out on demand. Works on a `FastaIndex`
+    (reads only the window's bytes) or any other `IndexedDataset` as well as on a plain
+    dict of sequences.
+    """
+    def __init__(self, dataset:Mapping[str, str], length:int):
+        self.dataset = dataset
+        self.length = length
+
+        self.__keys:list[str] = []
+        counts:list[int] = []
+        for key in dataset:
+            count = self.__record_length(key) // length
+            if count > 0:
+                self.__keys.append(key)
+                counts.append(count)
+
+        # First window number of every record
+        self.__starts = [0] + list(accumulate(counts))
+
+    def __record_length(self, key:str):
+        return self.dataset.length(key) if isinstance(self.dataset, IndexedDataset) else len(self.dataset[key])
+
+    # Record id and position of window k
+    def locate(self, k:int):
+        record = bisect_right(self.__starts, k) - 1
+        return self.__keys[record], (k - self.__starts[record]) * self.length
+
+    # Window k as a string
+    def window(self, k:int):
+        key, start = self.locate(k)
+        if isinstance(self.dataset, IndexedDataset): return self.dataset.fetch(key, start, start + self.length)
+        return self.dataset[key][start:start + self.length]
+
+    # Uniformly random window; with `genes`, among the windows made only of those genes (such as
+    # the ACGT ones, without N runs or IUPAC codes)
+    def random_window(self, rng = random, genes:str | list = None):
+        if len(self) == 0: raise ValueError(f"Dataset has no windows of length {self.length}")
+        if genes is None: return self.window(rng.randrange(len(self)))
+
+        known_genes = set(genes)
+        for k in _window_indexes(len(self), rng):
+            window = self.window(k)
+            if set(window) <= known_genes: return window
+        raise ValueError(f"Dataset has no windows of length {self.length} made only of {''.join(genes)}")
+
+    def __getitem__(self, k:int):
+        if k < 0: k += len(self)
+        if not 0 <= k < len(self): raise IndexError("window index out of range")
+        return self.window(k)
+
+    def __len__(self):
+        return self.__starts[-1]
+
+# Non-overlapping windows of every record; the dataset can be a mapping or a stream of (id, sequence) records
+def split_to_uniform(dataset:Mapping[str,str] | Iterator[tuple[str, str]], max_length:int = 100):
     
     def split_uniform(s, length):
         # return [s[i:i+length] for i in range(0, len(s), length)]
         return [s[i:i+length] for i in range(0, len(s) - length + 1, length)]
     
     new_dataset = list()
+    records = (v for _, v in dataset) if not isinstance(dataset, Mapping) else dataset.values()
     
-    for v in dataset.values(): 
+    for v in records: 
         motifs = split_uniform(v, max_length)
         new_dataset += motifs
             
     return new_dataset
     
 
+# Every line of a file without its line break, concatenated (read line by line)
 def read_sequence(path:str):
-    sequence = ""
-    with open(path) as file:
-        content = file.readlines()
-        for line in content:
-            line = line.removesuffix('\n')
-            sequence += line
-    return sequence
+    with open(path) as file: return ''.join(line.removesuffix('\n') for line in file)
 
-def get_random_code(path:str):
-    dataset = read_dataset(path)
-    name = random.choice(list(dataset.keys()))
-    return dataset[name]
+# Sequence of a uniformly random record, sliced out of a `FastaIndex` (files that can only be
+# streamed are sampled in one pass, holding at most two records)
+def get_random_code(path:str, rng = random):
+    dataset = _index_or_none(path)
+    if dataset is None: return sample_windows((sequence for _, sequence in iter_records(path)), 1, rng)[0]
+    try: return dataset.fetch(rng.choice(list(dataset)))
+    finally: dataset.close()
 
-def get_random_motif(ver:str = 'old' or 'new', motif_len:int = 6):
-    sequence = get_random_code(ver)
-    range_start = random.randint(0, len(sequence) - 1)
-    range_end = range_start + motif_len
-        
-    return sequence[range_start : range_end]
+# `motif_len` bases from a uniformly random position of a random record (only those bases are
+# read when the file can be indexed)
+def get_random_motif(ver:str = 'old' or 'new', motif_len:int = 6, rng = random):
+    dataset = _index_or_none(ver)
+    if dataset is None:
+        sequence = get_random_code(ver, rng)
+        range_start = rng.randint(0, len(sequence) - 1)
+        return sequence[range_start : range_start + motif_len]
 
+    try:
+        name = rng.choice(list(dataset))
+        range_start = rng.randint(0, dataset.length(name) - 1)
+        return dataset.fetch(name, range_start, range_start + motif_len)
+    finally: dataset.close()
+
+# `motif_len` characters from a uniformly random position of the concatenated lines of
+# individuals/<filename>, in two streamed passes (one to count, one to slice)
 def grm_alt(filename:str, motif_len:int = 6):
-    sequence = ""
-    with open(f"individuals/{filename}") as file:
-        content = file.readlines()
-        for line in content:
-            line = line.removesuffix('\n')
-            sequence += line
-    
-    range_start = random.randint(0, len(sequence) - 1)
+    path = f"individuals/{filename}"
+    with open(path) as file: total = sum(len(line.removesuffix('\n')) for line in file)
+
+    range_start = random.randint(0, total - 1)
     range_end = range_start + motif_len
-    
-    return sequence[range_start : range_end]
+
+    motif, position = [], 0
+    with open(path) as file:
+        for line in file:
+            line = line.removesuffix('\n')
+            if position + len(line) > range_start: motif.append(line[max(range_start - position, 0):range_end - position])
+            position += len(line)
+            if position >= range_end: break
+    return ''.join(motif)
 
 
 # old = read_dataset('data/ecoli/old.fna')
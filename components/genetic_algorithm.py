@@ -1,25 +1,392 @@
-import random
+import math
+import numpy as np
+
+from collections.abc import Iterable
+
+from components.selection import tournament_selection, tournament_winners
+
+# Sorted indexes of the hits of `total` independent Bernoulli(p) trials. Only the hits are drawn:
+# the gaps between consecutive hits are Geometric(p), so the cost grows with the number of hits
+# instead of `total`.
+def bernoulli_positions(rng:np.random.Generator, total:int, p:float):
+    if p <= 0.0 or total == 0: return np.empty(0, dtype=np.intp)
+    if p >= 1.0: return np.arange(total)
+
+    # Gaps are drawn in blocks sized to cover the remaining trials with high probability
+    blocks, last = [], -1
+    while last < total:
+        expected = (total - last - 1) * p
+        block = last + np.cumsum(rng.geometric(p, size=int(expected + 4 * math.sqrt(expected) + 16)))
+        blocks.append(block)
+        last = block[-1]
+
+    hits = np.concatenate(blocks)
+    return hits[hits < total]
+
+# Genes per block of the match prefix sums (`PopulationEngine.prefix_matches`)
+PREFIX_BLOCK = 64
+
+# Prefix matches `GenAlgo` adds before it prunes the ones no longer used
+PREFIX_CACHE_SIZE = 1 << 13
+
+# Rows `indexes` of a population, or of every population of a batch (`indexes` is then
+# (populations x K), picking rows within each population)
+def _rows(array:np.ndarray, indexes:np.ndarray):
+    if indexes.ndim == 1: return array[indexes]
+    return array[np.arange(len(indexes))[:, None], indexes]
+
+# Genes at `index` (..., K) of every row of `rows` (..., L); rows with a leading size of 1
+# broadcast against `index` (a flat gather, much cheaper than np.take_along_axis)
+def _gather(rows:np.ndarray, index:np.ndarray):
+    if rows.ndim == 1: return rows[index]
+    offsets = np.arange(rows.size // rows.shape[-1]).reshape(rows.shape[:-1] + (1,)) * rows.shape[-1]
+    return rows.reshape(-1)[offsets + index]
+
+class PopulationEngine:
+    """
+    Population-level genetic operators.
+
+    Individuals are stored as rows of a uint8 (N x L) matrix where every cell is the
+    index of a gene in `genes`, so a whole generation is scored, crossed over and
+    mutated with a handful of vectorized calls instead of per-character Python work.
+    Single individuals (1-D rows) are accepted everywhere a population is, and the
+    operators and `next_generation` also run on a batch of populations (see `BatchEngine`).
+    """
+    def __init__(self, genes:list | str, target:list | str, rng:np.random.Generator = None):
+        self.genes = ''.join(genes)
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        try: self.__alphabet = np.frombuffer(self.genes.encode('ascii'), dtype=np.uint8)
+        except UnicodeEncodeError: raise ValueError("Genes must be ASCII characters")
+        if len(set(self.genes)) != len(self.genes): raise ValueError("Genes must be unique")
+
+        # Byte value -> gene index (255 marks an unknown gene)
+        self.__lookup = np.full(256, 255, dtype=np.uint8)
+        self.__lookup[self.__alphabet] = np.arange(len(self.genes), dtype=np.uint8)
+
+        self.set_target(target)
+
+    # Replace the target every individual is scored against
+    def set_target(self, target:list | str):
+        self.target = self.encode(target)
+        self.length = len(self.target)
+        self.blocks = -(-self.length // PREFIX_BLOCK)
+
+    # Convert one individual (str or list of genes) into a row of gene indexes
+    def encode(self, individual:list | str):
+        try: raw = np.frombuffer(''.join(individual).encode('ascii'), dtype=np.uint8)
+        except UnicodeEncodeError: raise ValueError("Individual contains unknown genes")
+
+        codes = self.__lookup[raw]
+        if (codes == 255).any(): raise ValueError("Individual contains unknown genes")
+        return codes
+
+    # Convert equally long individuals into an (N x L) gene index matrix
+    def encode_population(self, individuals:list):
+        if len(individuals) == 0: return np.empty((0, self.length), dtype=np.uint8)
+
+        codes = self.encode(''.join(''.join(ind) for ind in individuals))
+        if codes.size != len(individuals) * self.length: raise ValueError("Individuals must match the target length")
+        return codes.reshape(len(individuals), self.length)
+
+    # Convert a row of gene indexes back into a list of genes
+    def decode(self, codes:np.ndarray):
+        return list(self.__alphabet[codes].tobytes().decode('ascii'))
+
+    # Convert an (N x L) gene index matrix back into a list of individuals
+    def decode_population(self, population:np.ndarray):
+        return [self.decode(row) for row in population]
+
+    # Uniformly random individuals; with `distinct`, redrawn until no individual repeats. When fewer
+    # distinct individuals exist than `size` (short targets), every one is drawn and the rest repeat them
+    def random_population(self, size:int, distinct:bool = False):
+        population = self.rng.integers(0, len(self.genes), size=(size, self.length), dtype=np.uint8)
+        if not distinct: return population
+        unique = min(size, len(self.genes) ** self.length)
+
+        while True:
+            _, first = np.unique(population, axis=0, return_index=True)
+            population = population[np.sort(first)]
+            if len(population) == unique: break
+            population = np.concatenate((population, self.rng.integers(0, len(self.genes), size=(unique - len(population), self.length), dtype=np.uint8)))
+
+        if unique == size: return population
+        return np.concatenate((population, population[self.rng.integers(0, unique, size - unique)]))
+
+    # Whether two populations hold the same individuals, whatever their order
+    def same_individuals(self, population1:np.ndarray, population2:np.ndarray):
+        if population1.shape != population2.shape: return False
+        rows1, counts1 = np.unique(population1, axis=0, return_counts=True)
+        rows2, counts2 = np.unique(population2, axis=0, return_counts=True)
+        return np.array_equal(rows1, rows2) and np.array_equal(counts1, counts2)
+
+    # Fitness scoring algorithm (lower is better): number of mismatches against the target
+    def fitness(self, population:np.ndarray):
+        return self.length - np.count_nonzero(population == self.target, axis=-1)
+
+    # Gene crossover: row i takes parents1[i][:points[i]] + parents2[i][points[i]:]
+    def crossover(self, parents1:np.ndarray, parents2:np.ndarray, points:np.ndarray | int):
+        mask = np.arange(self.length) < np.asarray(points)[..., None]
+        return np.where(mask, parents1, parents2)
+
+    # Random crossover points in [1, L - 1], one per pair (a single gene individual is copied whole)
+    def crossover_points(self, size:int):
+        return self.rng.integers(1, max(self.length, 2), size=size)
+
+    # Matches against the target at every block boundary: prefix[..., k] = matches among the first
+    # min(k * PREFIX_BLOCK, L) genes (the last entry is the total)
+    def prefix_matches(self, population:np.ndarray):
+        prefix = np.zeros(population.shape[:-1] + (self.blocks + 1,), dtype=np.int32)
+        matches = (population == self.target).astype(np.int32)
+        np.cumsum(np.add.reduceat(matches, np.arange(0, self.length, PREFIX_BLOCK), axis=-1), axis=-1, out=prefix[..., 1:])
+        return prefix
+
+    # Matches among the first `points` genes of every row: the prefix up to the block boundary
+    # before the point, plus the genes of that block up to the point (O(PREFIX_BLOCK) per row)
+    def head_matches(self, population:np.ndarray, prefix:np.ndarray, points:np.ndarray | int):
+        points = np.asarray(points)
+        block = points // PREFIX_BLOCK
+        head = np.take_along_axis(prefix, block[..., None], axis=-1)[..., 0]
+
+        index = block[..., None] * PREFIX_BLOCK + np.arange(PREFIX_BLOCK)
+        inside = index < points[..., None]
+        index = np.minimum(index, self.length - 1)
+        return head + np.count_nonzero((_gather(population, index) == _gather(self.target, index)) & inside, axis=-1)
+
+    # Fitness of both children of every pair, parents1[:points] + parents2[points:] and
+    # parents2[:points] + parents1[points:], from the parents' prefix matches, along with the
+    # head match difference `crossover_prefix` needs
+    def crossover_fitness(self, parents1:np.ndarray, parents2:np.ndarray, points:np.ndarray | int, prefix1:np.ndarray, prefix2:np.ndarray):
+        head1, head2 = self.head_matches(parents1, prefix1, points), self.head_matches(parents2, prefix2, points)
+        total1, total2 = prefix1[..., -1], prefix2[..., -1]
+        return self.length - (head1 + total2 - head2), self.length - (head2 + total1 - head1), head1 - head2
+
+    # Prefix matches of parents1[:points] + parents2[points:], spliced from the parents' ones:
+    # boundaries up to the point come from parents1, the later ones from parents2 shifted by
+    # `shift` (parents1's head matches minus parents2's)
+    def crossover_prefix(self, prefix1:np.ndarray, prefix2:np.ndarray, points:np.ndarray | int, shift:np.ndarray | int):
+        boundaries = np.minimum(np.arange(self.blocks + 1) * PREFIX_BLOCK, self.length)
+        return np.where(boundaries <= np.asarray(points)[..., None], prefix1, prefix2 + np.asarray(shift)[..., None])
+
+    # Positions picked for mutation, each gene with `probability` percent chance (np.nonzero layout)
+    def mutation_positions(self, shape:tuple, probability:float):
+        return np.unravel_index(bernoulli_positions(self.rng, math.prod(shape), probability / 100), shape)
+
+    # Target genes at `positions` (np.nonzero layout) of individuals broadcast against the target
+    def __target_genes(self, positions:tuple):
+        index = positions[len(positions) - self.target.ndim:]
+        return self.target[tuple(p if size > 1 else 0 for p, size in zip(index, self.target.shape))]
+
+    # Fitness after replacing `before` genes with `after` genes at `positions` (O(edits))
+    def mutation_fitness(self, fitness:np.ndarray | int, positions:tuple, before:np.ndarray, after:np.ndarray):
+        target = self.__target_genes(positions)
+        delta = (before == target).astype(np.int64) - (after == target)
+        if np.ndim(fitness) == 0: return fitness + int(delta.sum())
+        rows = positions[0] if fitness.ndim == 1 else np.ravel_multi_index(positions[:-1], fitness.shape)
+        return fitness + np.bincount(rows, weights=delta, minlength=fitness.size).astype(np.int64).reshape(fitness.shape)
+
+    # Prefix matches after replacing `before` genes with `after` genes at `positions`, updated in
+    # place by the running sum of the match changes (O(edits + blocks) per mutated row)
+    def mutation_prefix(self, prefix:np.ndarray, positions:tuple, before:np.ndarray, after:np.ndarray):
+        if len(before) == 0: return prefix
+        target = self.__target_genes(positions)
+        delta = (after == target).astype(np.int32) - (before == target)
+
+        flat = prefix.reshape(-1, self.blocks + 1)
+        rows, row_index = np.unique(np.ravel_multi_index(positions[:-1], prefix.shape[:-1]), return_inverse=True)
+        changes = np.zeros((len(rows), self.blocks + 1), dtype=np.int32)
+        np.add.at(changes, (row_index, positions[-1] // PREFIX_BLOCK + 1), delta)
+        flat[rows] += np.cumsum(changes, axis=1, dtype=np.int32)
+        return prefix
+
+    # Gene mutation (gene-level): each gene is redrawn with `probability` percent chance.
+    # When the current fitness is given, the updated fitness is returned along with the mutants,
+    # and so are the updated prefix matches when those are given too.
+    def mutate(self, population:np.ndarray, probability:float, fitness:np.ndarray | int = None, prefix:np.ndarray = None):
+        mutated = np.array(population, dtype=np.uint8, copy=True)
+        positions = self.mutation_positions(mutated.shape, probability)
+
+        before = mutated[positions]
+        after = self.rng.integers(0, len(self.genes), size=len(before), dtype=np.uint8)
+        mutated[positions] = after
+
+        if fitness is None: return mutated
+        fitness = self.mutation_fitness(fitness, positions, before, after)
+        if prefix is None: return mutated, fitness
+        return mutated, fitness, self.mutation_prefix(np.array(prefix, copy=True), positions, before, after)
+
+    # Order a population by fitness (stable, so ties keep their previous order), with its prefix matches if given
+    def sort_population(self, population:np.ndarray, fitness:np.ndarray, prefix:np.ndarray = None):
+        order = np.argsort(fitness, axis=-1, kind='stable')
+        if prefix is None: return _rows(population, order), _rows(fitness, order)
+        return _rows(population, order), _rows(fitness, order), _rows(prefix, order)
+
+    # Indexes of the first `count` distinct individuals of a fitness-sorted population
+    def elite_indexes(self, population:np.ndarray, count:int):
+        indexes, known = [], set()
+        for i, row in enumerate(population):
+            if len(indexes) >= count: break
+            key = row.tobytes()
+            if key not in known:
+                known.add(key)
+                indexes.append(i)
+        return np.array(indexes, dtype=np.intp)
+
+    # Every tournament of a generation at once: winner indexes and (tournaments x candidates) candidate indexes
+    def tournament_selection(self, fitness:np.ndarray, candidates:int, tournaments:int):
+        return tournament_selection(self.rng, fitness, candidates, tournaments)
+
+    # Produce the next generation from a fitness-sorted population (elites, selection, crossover, mutation).
+    # Children are scored from their parents' prefix matches; passing the population's `prefix`
+    # carries them over from generation to generation (the next one's is returned as well), so
+    # no individual is ever rescored from its genes.
+    def next_generation(self, population:np.ndarray, fitness:np.ndarray, elite_carryover:int, mutation_probability:float, selection_candidates:int, selection_replacement:bool = False, prefix:np.ndarray = None):
+        size = fitness.shape[-1]
+        axis = fitness.ndim - 1 # individuals axis (1 for a batch of populations)
+        elites = self.elite_indexes(population, elite_carryover)
+        children_needed = size - elites.shape[-1]
+        pairs = -(-children_needed // 2)
+
+        # Selection
+        winners = tournament_winners(self.rng, size, selection_candidates, fitness.shape[:-1] + (2 * pairs,), selection_replacement)
+        moms, dads = winners[..., 0::2], winners[..., 1::2]
+        if prefix is not None: mom_prefix, dad_prefix = _rows(prefix, moms), _rows(prefix, dads)
+        elif axis == 0:
+            parents, parent_index = np.unique(winners, return_inverse=True)
+            parent_prefix = self.prefix_matches(population[parents])
+            mom_prefix, dad_prefix = parent_prefix[parent_index[0::2]], parent_prefix[parent_index[1::2]]
+        else:
+            population_prefix = self.prefix_matches(population)
+            mom_prefix, dad_prefix = _rows(population_prefix, moms), _rows(population_prefix, dads)
+
+        # Crossover
+        points = self.crossover_points(moms.shape)
+        mom_genes, dad_genes = _rows(population, moms), _rows(population, dads)
+        children = np.empty(winners.shape + (self.length,), dtype=np.uint8)
+        children[..., 0::2, :] = self.crossover(mom_genes, dad_genes, points)
+        children[..., 1::2, :] = self.crossover(dad_genes, mom_genes, points)
+
+        children_fitness = np.empty(winners.shape, dtype=np.int64)
+        children_fitness[..., 0::2], children_fitness[..., 1::2], shift = self.crossover_fitness(mom_genes, dad_genes, points, mom_prefix, dad_prefix)
+
+        # Mutation (only the mutated positions are rescored)
+        if prefix is None: children, children_fitness = self.mutate(children, mutation_probability, children_fitness)
+        else:
+            children_prefix = np.empty(winners.shape + (self.blocks + 1,), dtype=np.int32)
+            children_prefix[..., 0::2, :] = self.crossover_prefix(mom_prefix, dad_prefix, points, shift)
+            children_prefix[..., 1::2, :] = self.crossover_prefix(dad_prefix, mom_prefix, points, -shift)
+            children, children_fitness, children_prefix = self.mutate(children, mutation_probability, children_fitness, children_prefix)
+
+        # Only the better child of the last pair fits when a single slot is left
+        kept = lambda array: array
+        if children_needed % 2 == 1:
+            last = 2 * pairs - 2
+            better = np.where(children_fitness[..., last] <= children_fitness[..., last + 1], last, last + 1)
+            indexes = np.empty(better.shape + (last + 1,), dtype=np.intp)
+            indexes[..., :last], indexes[..., last] = np.arange(last), better
+            kept = lambda array: _rows(array, indexes)
+
+        next_gen = np.concatenate((_rows(population, elites), kept(children)), axis=axis)
+        next_fitness = np.concatenate((_rows(fitness, elites), kept(children_fitness)), axis=axis)
+        if prefix is None: return self.sort_population(next_gen, next_fitness)
+        return self.sort_population(next_gen, next_fitness, np.concatenate((_rows(prefix, elites), kept(children_prefix)), axis=axis))
 
 class GenAlgo:
-    def __init__(self, genes:list, target:list):
+    """
+    Single-individual interface kept for `main.py`, backed by a `PopulationEngine`.
+
+    The prefix matches of every individual are cached (by list object) and handed down:
+    crossover splices the parents' ones and mutation adjusts them at the mutated genes, so
+    scoring a child takes O(PREFIX_BLOCK) for the crossover and O(edits) for its mutation,
+    and only individuals that did not come from here are compared to the target whole.
+
+    The cache prunes itself: once `cache_size` entries were added, the entries that were
+    not used since the previous pruning are dropped (so it holds at most 2 x `cache_size`),
+    and a dropped individual is simply rescored whole if it comes back. Calling `retain`
+    with the individuals still in use drops the others' entries right away.
+    """
+    def __init__(self, genes:list, target:list, rng:np.random.Generator = None, cache_size:int = PREFIX_CACHE_SIZE):
         self.genes = genes
         self.target = target
-        
+        self.engine = PopulationEngine(genes, target, rng)
+        self.cache_size = cache_size
+        self.__target = list(target)
+
+        # Entries added or used since the last pruning, and the ones before it
+        self.__prefixes:dict[int, tuple[list, np.ndarray]] = {}
+        self.__older:dict[int, tuple[list, np.ndarray]] = {}
+
+    # Cached prefix matches of an individual (moved back to the recent entries), or None
+    def __cached(self, individual:list):
+        key = id(individual)
+        entry = self.__prefixes.get(key)
+        if entry is None and (entry := self.__older.pop(key, None)) is not None: self.__prefixes[key] = entry
+        return entry[1] if entry is not None and entry[0] is individual else None
+
+    def __store(self, individual:list, prefix:np.ndarray):
+        if len(self.__prefixes) >= self.cache_size: self.__older, self.__prefixes = self.__prefixes, {}
+        self.__prefixes[id(individual)] = (individual, prefix)
+
+    # Prefix matches of an individual (see `PopulationEngine.prefix_matches`)
+    def match_prefix(self, individual:list):
+        prefix = self.__cached(individual)
+        if prefix is None:
+            prefix = self.engine.prefix_matches(self.engine.encode(individual))
+            self.__store(individual, prefix)
+        return prefix
+
+    # Number of cached prefix matches
+    def cached_prefixes(self):
+        return len(self.__prefixes) + len(self.__older)
+
+    # Keep the cached prefix matches of `individuals` only
+    def retain(self, individuals:Iterable[list]):
+        entries = ((individual, self.__cached(individual)) for individual in individuals)
+        self.__prefixes = {id(individual): (individual, prefix) for individual, prefix in entries if prefix is not None}
+        self.__older = {}
+
+    # Matches among the first `point` genes of an individual
+    def __head_matches(self, individual:list, point:int):
+        start = point - point % PREFIX_BLOCK
+        return int(self.match_prefix(individual)[point // PREFIX_BLOCK]) + sum(gene == goal for gene, goal in zip(individual[start:point], self.__target[start:point]))
+
     # Fitness scoring algorithm (lower is better)
     def fitness(self, individual:list):
-        return len(individual) - sum(individual[i] == self.target[i] for i in range(len(individual)))
-        
+        return len(self.__target) - int(self.match_prefix(individual)[-1])
+
     # Gene crossover function
     def crossover(self, parent1:list, parent2:list, point:int):
-        return parent1[:point] + parent2[point:]
-        
-    # Gene mutation function (gene-level)
-    def mutate(self, individual:list[str], probability:int):
-        def chance(p:float):
-            p /= 100
-            if   p == 0.0: return False
-            elif p == 1.0: return True
-            else: return True if random.random() < p else False
-                
-        return [random.choice(self.genes) if chance(probability) else s for s in individual]
-    
\ No newline at end of file
+        child = parent1[:point] + parent2[point:]
+        shift = self.__head_matches(parent1, point) - self.__head_matches(parent2, point)
+        self.__store(child, self.engine.crossover_prefix(self.match_prefix(parent1), self.match_prefix(parent2), point, shift))
+        return child
+
+    # Fitness of both crossover children, from the parents' prefix matches
+    def crossover_fitness(self, parent1:list, parent2:list, point:int):
+        length = len(self.__target)
+        head1, head2 = self.__head_matches(parent1, point), self.__head_matches(parent2, point)
+        total1, total2 = int(self.match_prefix(parent1)[-1]), int(self.match_prefix(parent2)[-1])
+        return length - (head1 + total2 - head2), length - (head2 + total1 - head1)
+
+    # Gene mutation function (gene-level), also returns the updated fitness when the current one is given.
+    # Only the mutated genes are looked at (with the same random draws as `PopulationEngine.mutate`).
+    def mutate(self, individual:list[str], probability:int, fit:int = None):
+        positions = bernoulli_positions(self.engine.rng, len(individual), probability / 100)
+        genes = self.engine.rng.integers(0, len(self.engine.genes), size=len(positions), dtype=np.uint8)
+
+        mutated = list(individual)
+        changes = []
+        for i, gene in zip(positions.tolist(), genes.tolist()):
+            mutated[i] = self.engine.genes[gene]
+            change = (mutated[i] == self.__target[i]) - (individual[i] == self.__target[i])
+            if change: changes.append((i, change))
+
+        # The mutant's prefix matches shift by the running sum of the match changes
+        prefix = self.__cached(individual)
+        if prefix is not None:
+            prefix = prefix.copy()
+            for i, change in changes: prefix[i // PREFIX_BLOCK + 1:] += change
+            self.__store(mutated, prefix)
+
+        if fit is None: return mutated
+        return mutated, fit - sum(change for _, change in changes)
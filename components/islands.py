@@ -0,0 +1,180 @@
+import multiprocessing, time
+import numpy as np
+
+from components.genetic_algorithm import PopulationEngine
+
+TOPOLOGIES = ('ring', 'full')
+
+class _Island:
+    """
+    One island population evolving on its own engine and random stream (the same pipeline as
+    `run_genetic_algorithm`). Lives in a worker process, or in the caller's one when
+    processes are disabled.
+    """
+    def __init__(self, genes:str, target:str, population:list | np.ndarray, population_size:int, max_gen:int, elite_carryover:int, mutation_probability:float, selection_candidates:int, migrants:int, seed:np.random.SeedSequence):
+        self.engine = PopulationEngine(genes, target, np.random.default_rng(seed))
+        self.max_gen = max_gen
+        self.elite_carryover = elite_carryover
+        self.mutation_probability = mutation_probability
+        self.selection_candidates = selection_candidates
+        self.migrants = migrants
+
+        if population is None: population = self.engine.random_population(population_size)
+        elif isinstance(population, np.ndarray): population = population.astype(np.uint8)
+        else: population = self.engine.encode_population(population)
+        self.population, self.fitness = self.engine.sort_population(population, self.engine.fitness(population))
+        self.prefix = self.engine.prefix_matches(self.population)
+
+        self.gen = 1
+        self.best_fitness = [int(self.fitness[0])]
+        self.solved_gen = 1 if self.fitness[0] == 0 else None
+        self.immigrants = 0
+        self.compute_time = 0.0
+
+    # Immigrants replace the worst individuals
+    def __immigrate(self, rows:np.ndarray, fitness:np.ndarray):
+        count = min(len(rows), len(self.population) // 2)
+        if count == 0: return
+        order = np.argsort(fitness, kind='stable')[:count]
+        population, fitness_values, prefix = self.population.copy(), self.fitness.copy(), self.prefix.copy()
+        population[-count:], fitness_values[-count:] = rows[order], fitness[order]
+        prefix[-count:] = self.engine.prefix_matches(rows[order])
+        self.population, self.fitness, self.prefix = self.engine.sort_population(population, fitness_values, prefix)
+        self.immigrants += count
+
+    # Run up to `generations` more generations (stopping on the target or `max_gen`) and report
+    def evolve(self, generations:int, immigrants:tuple[np.ndarray, np.ndarray] = None):
+        start = time.perf_counter()
+        if immigrants is not None: self.__immigrate(*immigrants)
+
+        end = min(self.gen + generations, self.max_gen)
+        while self.solved_gen is None and self.gen < end:
+            self.population, self.fitness, self.prefix = self.engine.next_generation(self.population, self.fitness, self.elite_carryover, self.mutation_probability, self.selection_candidates, prefix=self.prefix)
+            self.gen += 1
+            self.best_fitness.append(int(self.fitness[0]))
+            if self.fitness[0] == 0: self.solved_gen = self.gen
+
+        self.compute_time += time.perf_counter() - start
+        return self.report()
+
+    def report(self):
+        return {
+            "gen"           : self.gen,
+            "solved_gen"    : self.solved_gen,
+            "best_fitness"  : self.best_fitness,
+            "immigrants"    : self.immigrants,
+            "compute_time"  : self.compute_time,
+            "best_individual": ''.join(self.engine.decode(self.population[0])),
+            "emigrants"     : (self.population[:self.migrants].copy(), self.fitness[:self.migrants].copy()),
+        }
+
+# Worker process: evolve on every (generations, immigrants) request until None is received
+def _island_worker(conn, island_args:tuple):
+    island = _Island(*island_args)
+    conn.send(island.report())
+    while (request := conn.recv()) is not None:
+        conn.send(island.evolve(*request))
+    conn.close()
+
+class _LocalIsland:
+    def __init__(self, island_args:tuple):
+        self.island = _Island(*island_args)
+        self.last = self.island.report()
+
+    def submit(self, generations:int, immigrants:tuple):
+        self.last = self.island.evolve(generations, immigrants)
+
+    def result(self):
+        return self.last
+
+    def close(self): pass
+
+class _ProcessIsland:
+    def __init__(self, island_args:tuple):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_island_worker, args=(child, island_args), daemon=True)
+        self.process.start()
+        child.close()
+
+    def submit(self, generations:int, immigrants:tuple):
+        self.conn.send((generations, immigrants))
+
+    def result(self):
+        return self.conn.recv()
+
+    def close(self):
+        try: self.conn.send(None)
+        except (BrokenPipeError, OSError): pass
+        self.process.join()
+
+# Best individuals every island receives, given what every island sends
+def _migrations(emigrants:list[tuple[np.ndarray, np.ndarray]], topology:str):
+    n = len(emigrants)
+    if n < 2: return [None] * n
+    if topology == 'ring': return [emigrants[(i - 1) % n] for i in range(n)]
+
+    incoming = []
+    for i in range(n):
+        rows = [emigrants[j] for j in range(n) if j != i]
+        incoming.append((np.concatenate([r for r, _ in rows]), np.concatenate([f for _, f in rows])))
+    return incoming
+
+def run_island_model(genes:list | str, target:list | str, islands:int = 4, initial_populations:list = None, population_size:int = 20, max_gen:int = 100, elite_carryover:int = 1, mutation_probability:float = 5, selection_candidates:int = None, migration_interval:int = 10, migrants:int = 1, topology:str = 'ring', seed:int | np.random.SeedSequence = None, processes:bool = True):
+    """
+    Island-model genetic algorithm: `islands` independent populations, each running the
+    usual pipeline in its own process, that exchange their `migrants` best individuals every
+    `migration_interval` generations. With the `ring` topology island i sends to island
+    i + 1, with `full` every island sends to all others. Immigrants replace the worst
+    individuals of the receiving island.
+
+    Islands advance in lockstep between migrations and each one draws from its own child of
+    `seed`, so results do not depend on process scheduling (`processes=False` runs them in
+    this process and gives the same results).
+
+    Returns the `run_genetic_algorithm` fields (`best_fitness` and `best_individual` are
+    the best over all islands) plus `island` (the first island that found the target) and `island_reports`,
+    per-island `generations`, `solved`, `best_fitness`, `immigrants` and `compute_time`.
+    """
+    if topology not in TOPOLOGIES: raise ValueError(f"Unknown migration topology '{topology}', expected one of {TOPOLOGIES}")
+    start = time.perf_counter()
+
+    if selection_candidates is None: selection_candidates = population_size // 3
+    if initial_populations is None: initial_populations = [None] * islands
+    if len(initial_populations) != islands: raise ValueError(f"Got {len(initial_populations)} initial populations for {islands} islands")
+
+    seeds = np.random.SeedSequence(seed).spawn(islands) if not isinstance(seed, np.random.SeedSequence) else seed.spawn(islands)
+    island_type = _ProcessIsland if processes else _LocalIsland
+    handles = [island_type((genes, target, population, population_size, max_gen, elite_carryover, mutation_probability, selection_candidates, migrants, island_seed)) for population, island_seed in zip(initial_populations, seeds)]
+
+    try:
+        reports = [handle.result() for handle in handles]
+        while not any(r["solved_gen"] is not None for r in reports) and reports[0]["gen"] < max_gen:
+            incoming = _migrations([r["emigrants"] for r in reports], topology) if reports[0]["gen"] > 1 else [None] * islands
+            for handle, immigrants in zip(handles, incoming): handle.submit(migration_interval, immigrants)
+            reports = [handle.result() for handle in handles]
+    finally:
+        for handle in handles: handle.close()
+
+    # The earliest solving island wins (lowest index on ties)
+    solved = [(r["solved_gen"], i) for i, r in enumerate(reports) if r["solved_gen"] is not None]
+    generations, island = min(solved) if solved else (None, None)
+
+    length = generations if generations is not None else max(r["gen"] for r in reports)
+    best_fitness = [min(r["best_fitness"][g] for r in reports if g < len(r["best_fitness"])) for g in range(length)]
+    best_report = min(reports, key=lambda r: r["best_fitness"][-1])
+
+    return {
+        "generations"   : generations,
+        "solved"        : generations is not None,
+        "best_fitness"  : best_fitness,
+        "best_individual": best_report["best_individual"],
+        "wall_time"     : time.perf_counter() - start,
+        "island"        : island,
+        "island_reports": [{
+            "generations"   : r["gen"],
+            "solved"        : r["solved_gen"] is not None,
+            "best_fitness"  : r["best_fitness"],
+            "immigrants"    : r["immigrants"],
+            "compute_time"  : r["compute_time"],
+        } for r in reports],
+    }
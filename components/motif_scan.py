@@ -0,0 +1,150 @@
+import numpy as np
+
+from collections.abc import Iterable, Mapping
+
+from components.dataset_reader import IndexedDataset
+
+# Base byte -> 2-bit code as (high bit, low bit) planes; 255 marks bases that never match (N, IUPAC codes)
+_CODES = np.full(256, 255, dtype=np.uint8)
+for i, base in enumerate(b'ACGT'): _CODES[base] = _CODES[base + 32] = i # soft-masked (lowercase) bases count as their uppercase
+
+if hasattr(np, 'bitwise_count'): _popcount = np.bitwise_count
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    def _popcount(words:np.ndarray):
+        return _BYTE_COUNTS[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+_SHIFTS = np.arange(64, dtype=np.uint64)
+_ALL_BITS = np.uint64(2**64 - 1)
+
+# uint64 word of every position: bit i of word p is bits[p + i] (bits past the end are 0)
+def _windows(bits:np.ndarray, count:int):
+    words = -(-count // 64)
+    packed = np.zeros((words + 1) * 8, dtype=np.uint8)
+    packed_bits = np.packbits(bits, bitorder='little')
+    packed[:len(packed_bits)] = packed_bits
+    aligned = packed.view('<u8').astype(np.uint64, copy=False)
+
+    # Position 64m + t: word m shifted down by t, topped up with the low bits of word m + 1
+    windows = np.empty((words, 64), dtype=np.uint64)
+    np.right_shift(aligned[:-1, None], _SHIFTS, out=windows)
+    windows |= (aligned[1:, None] << np.uint64(1)) << (np.uint64(63) - _SHIFTS)
+    return windows.reshape(-1)[:count]
+
+class _Motif:
+    """Bit planes of a motif, split into 64-base words (the last one masked to the motif length)."""
+    def __init__(self, individual:list | str):
+        codes = _CODES[np.frombuffer(''.join(individual).encode('ascii'), dtype=np.uint8)]
+        if len(codes) == 0 or (codes == 255).any(): raise ValueError("Motifs must be non-empty and made of A, C, G and T")
+        self.length = len(codes)
+
+        words = -(-self.length // 64)
+        padded = np.zeros(words * 64, dtype=np.uint8)
+        padded[:self.length] = codes
+        pack = lambda plane: np.packbits(plane.reshape(words, 64), axis=1, bitorder='little').view('<u8').reshape(-1).astype(np.uint64)
+        self.high, self.low = pack(padded >> 1), pack(padded & 1)
+
+        self.masks = np.full(words, _ALL_BITS)
+        if self.length % 64: self.masks[-1] = np.uint64((1 << (self.length % 64)) - 1)
+
+class GenomeScanner:
+    """
+    Hamming distance of motifs (individuals) against every position of a genome.
+
+    The genome is read `chunk_size` bases at a time from a dataset (`FastaIndex`,
+    `CachedDataset` or a plain dict), so memory stays bounded whatever its size. Every
+    chunk is turned into bit planes, where the word of a position holds the next 64 bases
+    (high bits, low bits and non-ACGT bases), and a motif is compared to all positions at
+    once: mismatches are the popcount of the XORed planes, 64 bases per word operation.
+    `scan_population` builds the planes of a chunk once for all individuals, and positions
+    that already have more mismatches than the worst kept locus are dropped after every
+    word, so close motifs (and long ones) mostly skip their later words.
+
+    Mismatches are counted like the fitness (lower is better); non-ACGT genome bases
+    never match. Only the forward strand is scanned.
+    """
+    def __init__(self, dataset:Mapping[str, str], chunk_size:int = 1 << 18):
+        self.dataset = dataset
+        self.chunk_size = chunk_size
+
+    # (sequence id, first position, bases, planes) of every chunk; chunks overlap by `longest - 1`
+    # bases so motifs up to `longest` are scanned at all of their positions
+    def __chunks(self, shortest:int, longest:int):
+        for key in self.dataset:
+            indexed = isinstance(self.dataset, IndexedDataset)
+            record_length = self.dataset.length(key) if indexed else len(self.dataset[key])
+            for start in range(0, record_length - shortest + 1, self.chunk_size):
+                end = min(start + self.chunk_size + longest - 1, record_length)
+                sequence = self.dataset.fetch(key, start, end) if indexed else self.dataset[key][start:end]
+                codes = _CODES[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+
+                count = len(codes)
+                invalid = codes == 255
+                planes = (_windows(codes >> 1 & 1, count), _windows(codes & 1, count), _windows(invalid, count) if invalid.any() else None)
+                yield key, start, count, planes
+
+    # Mismatches of `motif` at the first `positions` positions of a chunk, as (kept positions or
+    # None for all of them, their mismatches); positions with more than `limit` may be dropped
+    def __mismatches(self, motif:_Motif, planes:tuple, positions:int, limit:int = None):
+        high, low, invalid = planes
+        kept = None
+        mismatches = np.zeros(positions, dtype=np.uint16)
+        bits, other = np.empty(positions, dtype=np.uint64), np.empty(positions, dtype=np.uint64)
+
+        for w, (motif_high, motif_low, mask) in enumerate(zip(motif.high, motif.low, motif.masks)):
+            window = slice(64 * w, 64 * w + positions) if kept is None else kept + 64 * w
+            np.bitwise_xor(high[window], motif_high, out=bits)
+            np.bitwise_xor(low[window], motif_low, out=other)
+            bits |= other
+            if invalid is not None: bits |= invalid[window]
+            if mask != _ALL_BITS: bits &= mask
+            mismatches += _popcount(bits)
+
+            # Drop the positions that can no longer make it, once that removes most of them
+            if limit is not None and w + 1 < len(motif.masks):
+                close = mismatches <= limit
+                if np.count_nonzero(close) < len(close) // 2:
+                    kept = np.flatnonzero(close) if kept is None else kept[close]
+                    mismatches, bits, other = mismatches[close], bits[:len(kept)], other[:len(kept)]
+        return kept, mismatches
+
+    def scan_population(self, individuals:Iterable[list | str], best:int = 5):
+        """
+        Scan every individual against the whole genome. Returns, per individual, a dict
+        with `mismatches` (the fewest at any position, None if the genome is shorter than
+        the motif) and `loci`, the `best` best positions as `sequence_id`, `position`
+        (0-based start) and `mismatches`, ordered by mismatches then genome order.
+        A small `best` scans fastest (see the class docstring); it must be at least 1.
+        """
+        if best < 1: raise ValueError("At least one locus must be kept per motif")
+        motifs = [_Motif(individual) for individual in individuals]
+        if not motifs: return []
+        lengths = [motif.length for motif in motifs]
+        found:list[list[tuple[int, int, int, str]]] = [[] for _ in motifs]
+
+        for order, (key, start, count, planes) in enumerate(self.__chunks(min(lengths), max(lengths))):
+            for motif, loci in zip(motifs, found):
+                positions = count - motif.length + 1
+                if positions <= 0: continue
+                # Positions past the chunk are scanned by the next chunk
+                positions = min(positions, self.chunk_size)
+                kept, mismatches = self.__mismatches(motif, planes, positions, loci[-1][0] if len(loci) == best else None)
+                if len(mismatches) == 0: continue
+
+                # Every position tied with the best-th one, in genome order, merged into the running best
+                k = min(best, len(mismatches))
+                threshold = np.partition(mismatches, k - 1)[k - 1]
+                candidates = np.flatnonzero(mismatches <= threshold)
+                candidates = candidates[np.argsort(mismatches[candidates], kind='stable')[:k]]
+                offsets = candidates if kept is None else kept[candidates]
+                loci.extend((int(mismatches[c]), order, start + int(p), key) for c, p in zip(candidates, offsets))
+                loci.sort(key=lambda locus: locus[:3])
+                del loci[best:]
+
+        return [{
+            "mismatches"    : loci[0][0] if loci else None,
+            "loci"          : [{"sequence_id": key, "position": position, "mismatches": mismatches} for mismatches, _, position, key in loci],
+        } for loci in found]
+
+    def scan(self, individual:list | str, best:int = 5):
+        return self.scan_population([individual], best)[0]
@@ -0,0 +1,102 @@
+import numpy as np
+
+from functools import lru_cache
+
+# 0b0101...01 covering `length` bases: the low bit of every 2-bit base
+@lru_cache(maxsize=None)
+def _low_bits(length:int):
+    return ((1 << (2 * length)) - 1) // 3
+
+# str.translate table mapping every gene to its base-4 digit
+@lru_cache(maxsize=None)
+def _digit_table(genes:str):
+    return str.maketrans({gene: str(i) for i, gene in enumerate(genes)})
+
+class PackedGenome:
+    """
+    Immutable individual stored at 2 bits per base in a single Python int.
+
+    Base i sits in bits 2i and 2i+1 (its index in `genes`), so mismatches are an
+    XOR + popcount, crossover is a mask-and-combine, and hashing/equality cost one int
+    operation, which keeps elite deduplication sets cheap.
+
+    Iterating yields the gene characters, so `''.join(genome)` and `list(genome)` give
+    the str/list forms used by `GeneDisplay`, `GenAlgo` and `dataset_reader`.
+    """
+    __slots__ = ('bits', 'length', 'genes')
+
+    def __init__(self, bits:int, length:int, genes:str = 'ACTG'):
+        if len(genes) != 4: raise ValueError("Packed genomes need exactly 4 genes")
+        self.bits = bits
+        self.length = length
+        self.genes = genes
+
+    # Pack a str or list of genes
+    @classmethod
+    def from_str(cls, individual:str | list, genes:str = 'ACTG'):
+        individual = ''.join(individual)
+        digits = individual.translate(_digit_table(genes))
+        if not set(digits) <= set('0123'): raise ValueError("Individual contains unknown genes")
+        return cls(int(digits[::-1], 4) if digits else 0, len(individual), genes)
+
+    from_list = from_str
+
+    # Pack a row of gene indexes (as used by `PopulationEngine`)
+    @classmethod
+    def from_codes(cls, codes:np.ndarray, genes:str = 'ACTG'):
+        codes = np.asarray(codes, dtype=np.uint8)
+        padded = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+        padded[:len(codes)] = codes
+        packed = padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)
+        return cls(int.from_bytes(packed.tobytes(), 'little'), len(codes), genes)
+
+    # Row of gene indexes
+    def to_codes(self):
+        packed = np.frombuffer(self.bits.to_bytes(-(-self.length // 4), 'little'), dtype=np.uint8)
+        codes = (packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+        return codes.reshape(-1)[:self.length]
+
+    def to_str(self):
+        return np.frombuffer(self.genes.encode('ascii'), dtype=np.uint8)[self.to_codes()].tobytes().decode('ascii')
+
+    def to_list(self):
+        return list(self.to_str())
+
+    # Number of mismatching bases (the GA fitness when `other` is the target)
+    def mismatches(self, other:'PackedGenome'):
+        diff = self.bits ^ other.bits
+        return ((diff | (diff >> 1)) & _low_bits(self.length)).bit_count()
+
+    # Single-point crossover: self[:point] + other[point:]
+    def crossover(self, other:'PackedGenome', point:int):
+        mask = (1 << (2 * point)) - 1
+        return PackedGenome((self.bits & mask) | (other.bits & ~mask), self.length, self.genes)
+
+    # Copy with the base at `index` replaced by gene index `code`
+    def replace(self, index:int, code:int):
+        shift = 2 * index
+        return PackedGenome((self.bits & ~(3 << shift)) | (code << shift), self.length, self.genes)
+
+    def __getitem__(self, index:int):
+        if index < 0: index += self.length
+        if not 0 <= index < self.length: raise IndexError("genome index out of range")
+        return self.genes[(self.bits >> (2 * index)) & 3]
+
+    def __iter__(self):
+        return iter(self.to_str())
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedGenome): return NotImplemented
+        return self.bits == other.bits and self.length == other.length and self.genes == other.genes
+
+    def __hash__(self):
+        return hash((self.bits, self.length))
+
+    def __str__(self):
+        return self.to_str()
+
+    def __repr__(self):
+        return f"PackedGenome('{self.to_str()}')"
@@ -0,0 +1,128 @@
+import random
+
+from bisect import insort
+
+from components.dataset_reader import WindowIndex, _window_indexes
+from components.packed_genome import PackedGenome
+
+class Population:
+    """
+    One generation of (fitness, individual) pairs.
+
+    Pairs are kept sorted by fitness (equal ones in push order), so iteration, indexing
+    and slicing go from the fittest individual to the least fit. Every genome is also
+    counted in a hash index and the best pair is tracked on push, so duplicate checks,
+    "is the target in here" (fitness 0) and the best lookup are constant time instead of
+    list scans.
+
+    Genomes are indexed as `PackedGenome`s for 4-gene alphabets and as strings otherwise.
+    """
+    def __init__(self, genes:str | list, individuals:list[tuple[int, list]] = ()):
+        self.genes = ''.join(genes)
+        self.best:tuple[int, list] = None
+
+        self.__items:list[tuple[int, list]] = []
+        self.__index:dict[PackedGenome | str, int] = {}
+
+        for fit, individual in individuals: self.push(fit, individual)
+
+    # Hash key of a genome
+    def __key(self, individual:list | str):
+        if len(self.genes) == 4: return PackedGenome.from_list(individual, self.genes)
+        return ''.join(individual)
+
+    def push(self, fit:int, individual:list):
+        insort(self.__items, (fit, individual), key=lambda item: item[0])
+
+        key = self.__key(individual)
+        self.__index[key] = self.__index.get(key, 0) + 1
+
+        if self.best is None or fit < self.best[0]: self.best = (fit, individual)
+
+    # Whether the target (fitness 0) is in this generation
+    def has_solution(self):
+        return self.best is not None and self.best[0] == 0
+
+    # The `count` fittest distinct individuals
+    def elites(self, count:int):
+        elites, known = [], set()
+        for fit, individual in self.__items:
+            if len(elites) == count: break
+            key = self.__key(individual)
+            if key in known: continue
+            known.add(key)
+            elites.append((fit, individual))
+        return elites
+
+    def items(self):
+        return list(self.__items)
+
+    def clear(self):
+        self.__items.clear()
+        self.__index.clear()
+        self.best = None
+
+    def __contains__(self, individual:list | str):
+        return self.__key(individual) in self.__index
+
+    def __getitem__(self, index:int | slice):
+        return self.__items[index]
+
+    def __iter__(self):
+        return iter(self.__items)
+
+    def __len__(self):
+        return len(self.__items)
+
+def sample_initial_population(windows:WindowIndex, size:int, genes:str | list, rng = random):
+    """
+    `size` distinct individuals for the first generation, drawn from dataset windows.
+
+    Window indexes are sampled without replacement, so every window is looked at most once
+    and the sampler stops once they are exhausted. Windows with genes outside `genes` are
+    skipped. If there are not enough unique windows, the rest is filled with point mutants
+    of the sampled windows, then with uniformly random individuals.
+
+    Returns the individuals (strings) and how many came from each source
+    (`window`, `mutated`, `random`).
+    """
+    genes = ''.join(genes)
+    length = windows.length
+    if len(genes) ** length < size: raise ValueError(f"Only {len(genes) ** length} distinct individuals of length {length} exist, population needs {size}")
+
+    population:list[str] = []
+    known:set[str] = set()
+    sources = {"window": 0, "mutated": 0, "random": 0}
+    known_genes = set(genes)
+
+    def add(individual:str, source:str):
+        if individual in known: return
+        known.add(individual)
+        population.append(individual)
+        sources[source] += 1
+
+    # Unique dataset windows
+    for k in _window_indexes(len(windows), rng):
+        if len(population) == size: break
+        window = windows[k]
+        if set(window) <= known_genes: add(window, "window")
+
+    # Point mutants of the sampled windows (bounded number of attempts)
+    parents = list(population)
+    attempts = 10 * size
+    while parents and len(population) < size and attempts > 0:
+        attempts -= 1
+        parent = rng.choice(parents)
+        i = rng.randrange(length)
+        add(parent[:i] + rng.choice(genes.replace(parent[i], '')) + parent[i + 1:], "mutated")
+
+    # Uniformly random individuals (small search spaces are enumerated so this always ends)
+    space = len(genes) ** length
+    if len(population) < size and space <= 1 << 20:
+        for code in rng.sample(range(space), space):
+            if len(population) == size: break
+            add(''.join(genes[(code // len(genes) ** i) % len(genes)] for i in range(length)), "random")
+    while len(population) < size:
+        add(''.join(rng.choice(genes) for _ in range(length)), "random")
+
+    return population, sources
@@ -0,0 +1,80 @@
+import csv, threading, time
+
+from collections import deque
+from contextlib import nullcontext
+
+_DISABLED = nullcontext()
+
+class _Timing:
+    __slots__ = ('profiler', 'name', 'gen', 'start')
+
+    def __init__(self, profiler:'Profiler', name:str, gen:int):
+        self.profiler = profiler
+        self.name = name
+        self.gen = gen
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start, self.gen)
+
+class Profiler:
+    """
+    Wall-clock timings of named phases, shared by the UI and the simulation worker thread.
+
+    `with profiler.phase(name, gen):` times a block. While disabled it returns one shared
+    no-op context, so instrumented code only pays for an attribute check.
+
+    Timings are kept twice: the last `window` samples of every phase (the overlay shows
+    their mean) and per-generation totals (written by `export_csv`).
+    """
+    def __init__(self, enabled:bool = False, window:int = 60):
+        self.enabled = enabled
+        self.window = window
+
+        self.__lock = threading.Lock()
+        self.__recent:dict[str, deque[float]] = {}
+        self.__generations:dict[int, dict[str, list]] = {}
+
+    def phase(self, name:str, gen:int = None):
+        if not self.enabled: return _DISABLED
+        return _Timing(self, name, gen)
+
+    def record(self, name:str, seconds:float, gen:int = None):
+        with self.__lock:
+            recent = self.__recent.get(name)
+            if recent is None: recent = self.__recent[name] = deque(maxlen=self.window)
+            recent.append(seconds)
+
+            if gen is None: return
+            total = self.__generations.setdefault(gen, {}).setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    # Mean milliseconds of every phase over its recent samples, in first-seen order
+    def averages(self):
+        with self.__lock:
+            return {name: 1e3 * sum(samples) / len(samples) for name, samples in self.__recent.items() if samples}
+
+    def reset(self):
+        with self.__lock:
+            self.__recent.clear()
+            self.__generations.clear()
+
+    # One row per generation: total milliseconds and call count of every phase
+    def export_csv(self, path:str):
+        with self.__lock:
+            phases = list(self.__recent.keys())
+            rows = sorted(self.__generations.items())
+
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['gen'] + [f"{name}_{column}" for name in phases for column in ('ms', 'calls')])
+            for gen, totals in rows:
+                row = [gen]
+                for name in phases:
+                    seconds, calls = totals.get(name, (0.0, 0))
+                    row += [round(1e3 * seconds, 4), calls]
+                writer.writerow(row)
+        return len(rows)
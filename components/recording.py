@@ -0,0 +1,235 @@
+import json, struct
+
+from bisect import bisect_right
+
+from components.checkpoint import gene_bits, pack_codes, unpack_codes
+from components.population import Population
+
+import numpy as np
+
+MAGIC = b'GAREC'
+VERSION = 2 # 2: generations are indexed in fitness order (1 used heap order)
+_PREFIX = struct.Struct('<5sBI') # magic, version, header length
+
+# Records: a one byte tag, then its payload
+KEYFRAME, STEP, NEXT_GEN, END = b'K', b'S', b'G', b'E'
+_KEYFRAME = struct.Struct('<IHI')   # gen, individuals, packed genome bytes (then fitness as uint32)
+_STEP = struct.Struct('<HHHIIIIIB') # mom, dad, candidates per parent, crossover point, 2 children fitness, 2 mutants fitness, kept children
+_EDITS = struct.Struct('<I')        # mutated genes of one child (then uint32 positions and uint8 genes)
+_END = struct.Struct('<B')          # target found
+
+KEPT_BOTH, KEPT_FIRST, KEPT_SECOND = 0, 1, 2
+
+class RunRecorder:
+    """
+    Writes a run as a compact binary log: a JSON header with the parameters, then one record
+    per `Simulation` step (selection indexes, crossover point, fitness values, mutated
+    positions and which children were kept), a marker at every generation switch, and
+    keyframes holding a whole generation every `keyframe_interval` generations.
+
+    A step takes a few dozen bytes, and `RunReplay` can seek to any generation from the
+    nearest keyframe. Fast-forward runs have no steps and record a keyframe per generation.
+    """
+    def __init__(self, path:str, genes:str, target:list | str, params:dict, keyframe_interval:int = 10):
+        self.path = path
+        self.genes = ''.join(genes)
+        self.keyframe_interval = keyframe_interval
+        self.__codes = {gene: i for i, gene in enumerate(self.genes)}
+        self.__bits = gene_bits(self.genes)
+
+        header = json.dumps({"genes": self.genes, "target": ''.join(target), "keyframe_interval": keyframe_interval, **params}).encode('utf-8')
+        self.__file = open(path, 'wb')
+        self.__file.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        self.__file.write(header)
+
+    # Whole generation as (N x L) gene indexes and fitness, in fitness order
+    def keyframe(self, gen:int, population:np.ndarray, fitness:np.ndarray | list):
+        packed = pack_codes(population, self.__bits) if len(population) else b''
+        self.__file.write(KEYFRAME + _KEYFRAME.pack(gen, len(population), len(packed)))
+        self.__file.write(packed)
+        self.__file.write(np.asarray(fitness, dtype='<u4').tobytes())
+
+    # One pair of parents (indexes in the current generation), their children and mutants;
+    # `kept` says which mutants joined the next generation
+    def step(self, parents:tuple[int, int], candidates:tuple[list, list], point:int, children:list, mutated:list, kept:int):
+        self.__file.write(STEP + _STEP.pack(parents[0], parents[1], len(candidates[0]), point, children[0][0], children[1][0], mutated[0][0], mutated[1][0], kept))
+        self.__file.write(np.asarray(candidates, dtype='<u2').tobytes())
+
+        # Mutations are stored as the genes that differ between each child and its mutant
+        for (_, child), (_, mutant) in zip(children, mutated):
+            positions = [i for i, (a, b) in enumerate(zip(child, mutant)) if a != b]
+            self.__file.write(_EDITS.pack(len(positions)))
+            self.__file.write(np.array(positions, dtype='<u4').tobytes())
+            self.__file.write(bytes(self.__codes[mutant[i]] for i in positions))
+
+    # Switch to the next generation (the caller adds a keyframe every `keyframe_interval` generations)
+    def next_gen(self):
+        self.__file.write(NEXT_GEN)
+
+    # Mark the end of the run and close the log
+    def end(self, target_found:bool):
+        self.__file.write(END + _END.pack(target_found))
+        self.close()
+
+    # Close without an end marker (stopped runs replay up to their last step)
+    def close(self):
+        if not self.__file.closed: self.__file.close()
+
+class RunReplay:
+    """
+    Replays a `RunRecorder` log, producing the same snapshot dicts as `Simulation.step`
+    without running selection or fitness: children are sliced from the recorded parents at
+    the recorded point, mutants get the recorded genes, and the generations are rebuilt
+    with the same pushes (and elites) as the original run.
+
+    `seek(gen)` starts from the last keyframe at or before `gen` and replays forward.
+    """
+    def __init__(self, path:str):
+        with open(path, 'rb') as file: self.__data = file.read()
+
+        if len(self.__data) < _PREFIX.size or self.__data[:len(MAGIC)] != MAGIC: raise ValueError(f"{path} is not a run recording")
+        _, version, header_length = _PREFIX.unpack_from(self.__data)
+        if version != VERSION: raise ValueError(f"Unsupported recording version {version}")
+
+        self.params = json.loads(self.__data[_PREFIX.size:_PREFIX.size + header_length].decode('utf-8'))
+        self.genes = self.params["genes"]
+        self.target = list(self.params["target"])
+        self.population_size = self.params["population_size"]
+        self.elite_carryover = self.params["elite_carryover"]
+        self.__bits = gene_bits(self.genes)
+
+        # One pass over the records: keyframe offsets and the last generation (a record cut off
+        # by a crash mid-write is dropped, with everything after it)
+        self.__keyframes:list[tuple[int, int]] = []
+        self.target_found = None
+        gen, offset = 1, _PREFIX.size + header_length
+        while offset < len(self.__data):
+            try: end = self.__skip(offset)
+            except struct.error: end = len(self.__data) + 1
+            if end > len(self.__data):
+                self.__data = self.__data[:offset]
+                break
+
+            tag = self.__data[offset:offset + 1]
+            if tag == KEYFRAME:
+                gen = _KEYFRAME.unpack_from(self.__data, offset + 1)[0]
+                self.__keyframes.append((gen, offset))
+            elif tag == NEXT_GEN: gen += 1
+            elif tag == END: self.target_found = bool(_END.unpack_from(self.__data, offset + 1)[0])
+            offset = end
+        if not self.__keyframes: raise ValueError(f"{path} has no recorded generation")
+        self.last_gen = gen
+        self.__keyframe_gens = [g for g, _ in self.__keyframes]
+
+        self.seek(1)
+
+    # Offset of the record after the one at `offset`
+    def __skip(self, offset:int):
+        tag = self.__data[offset:offset + 1]
+        offset += 1
+        if tag == KEYFRAME:
+            _, count, packed = _KEYFRAME.unpack_from(self.__data, offset)
+            return offset + _KEYFRAME.size + packed + 4 * count
+        if tag == STEP:
+            candidates = _STEP.unpack_from(self.__data, offset)[2]
+            offset += _STEP.size + 2 * 2 * candidates
+            for _ in range(2):
+                edits = _EDITS.unpack_from(self.__data, offset)[0]
+                offset += _EDITS.size + 5 * edits
+            return offset
+        if tag == END: return offset + _END.size
+        return offset
+
+    @property
+    def finished(self):
+        return self.__offset >= len(self.__data)
+
+    def __snapshot(self, parents:list = (), parent_candidates:list = (), children:list = (), mutated:list = (), finished:bool = False):
+        return {
+            "gen"               : self.gen,
+            "current_gen"       : list(self.current_gen),
+            "next_gen"          : list(self.next_gen),
+            "parents"           : list(parents),
+            "parent_candidates" : list(parent_candidates),
+            "children"          : list(children),
+            "mutated"           : list(mutated),
+            "finished"          : finished,
+            "target_found"      : bool(self.target_found) if finished else False,
+        }
+
+    def __send_elites(self):
+        for fit, individual in self.current_gen.elites(self.elite_carryover): self.next_gen.push(fit, individual)
+
+    # Restore the generation stored in the keyframe at `offset`
+    def __load_keyframe(self, offset:int):
+        gen, count, packed = _KEYFRAME.unpack_from(self.__data, offset + 1)
+        start = offset + 1 + _KEYFRAME.size
+        codes = unpack_codes(self.__data[start:start + packed], (count, len(self.target)), self.__bits) if count else []
+        fitness = np.frombuffer(self.__data, dtype='<u4', count=count, offset=start + packed)
+
+        alphabet = list(self.genes)
+        self.gen = gen
+        self.current_gen = Population(self.genes, ((int(fit), [alphabet[c] for c in row]) for fit, row in zip(fitness, codes)))
+        self.next_gen = Population(self.genes)
+        self.__send_elites()
+        self.__offset = self.__skip(offset)
+
+    # Jump to the start of generation `gen` and return its snapshot
+    def seek(self, gen:int):
+        gen = max(1, min(gen, self.last_gen))
+        self.__load_keyframe(self.__keyframes[bisect_right(self.__keyframe_gens, gen) - 1][1])
+        while self.gen < gen and not self.finished: self.step()
+        return self.__snapshot()
+
+    # Next snapshot, as `Simulation.step` produced it (None after the end of the log)
+    def step(self):
+        if self.finished: return None
+        tag = self.__data[self.__offset:self.__offset + 1]
+        offset = self.__offset + 1
+
+        if tag == STEP:
+            mom, dad, count, point, fit1, fit2, mutated_fit1, mutated_fit2, kept = _STEP.unpack_from(self.__data, offset)
+            offset += _STEP.size
+            candidates = np.frombuffer(self.__data, dtype='<u2', count=2 * count, offset=offset).reshape(2, count).tolist()
+            offset += 4 * count
+
+            parents = [self.current_gen[mom], self.current_gen[dad]]
+            (_, mom_ind), (_, dad_ind) = parents
+            children = [(fit1, mom_ind[:point] + dad_ind[point:]), (fit2, dad_ind[:point] + mom_ind[point:])]
+
+            mutated = []
+            for (_, child), fit in zip(children, (mutated_fit1, mutated_fit2)):
+                edits = _EDITS.unpack_from(self.__data, offset)[0]
+                offset += _EDITS.size
+                positions = np.frombuffer(self.__data, dtype='<u4', count=edits, offset=offset)
+                genes = self.__data[offset + 4 * edits:offset + 5 * edits]
+                offset += 5 * edits
+
+                mutant = list(child)
+                for i, code in zip(positions, genes): mutant[i] = self.genes[code]
+                mutated.append((fit, mutant))
+
+            if kept in (KEPT_BOTH, KEPT_FIRST): self.next_gen.push(*mutated[0])
+            if kept in (KEPT_BOTH, KEPT_SECOND): self.next_gen.push(*mutated[1])
+
+            self.__offset = offset
+            return self.__snapshot(parents, candidates, children, mutated)
+
+        if tag == NEXT_GEN:
+            self.current_gen = self.next_gen
+            self.gen += 1
+            self.next_gen = Population(self.genes)
+            self.__send_elites()
+
+            # A keyframe right after the switch holds the same generation
+            self.__offset = offset
+            if self.__data[offset:offset + 1] == KEYFRAME: self.__offset = self.__skip(offset)
+            return self.__snapshot()
+
+        if tag == KEYFRAME:
+            # Fast-forward runs record a keyframe per generation instead of steps
+            self.__load_keyframe(self.__offset)
+            return self.__snapshot()
+
+        self.__offset = offset + _END.size
+        return self.__snapshot(finished=True)
@@ -0,0 +1,111 @@
+import os, time
+import numpy as np
+
+from components.genetic_algorithm import PopulationEngine
+from components.checkpoint import CheckpointWriter, load_checkpoint
+
+def run_genetic_algorithm(genes:list | str, target:list | str, initial_population:list | np.ndarray = None, population_size:int = 10, max_gen:int = 100, elite_carryover:int = 1, mutation_probability:float = 5, selection_candidates:int = None, selection_replacement:bool = False, stop_on_convergence:bool = False, distinct_initial:bool = False, seed:int | np.random.SeedSequence = None, checkpoint:str = None, checkpoint_every:int = 100, resume:bool = False):
+    """
+    Run the genetic algorithm without any display, as fast as the engine allows.
+
+    Uses the same pipeline as `main` (elite carryover, tournament selection over a third
+    of the population, single-point crossover, gene-level mutation). When no initial
+    population is given, a uniformly random one is generated.
+
+    Three rules of the notebook's original loop are opt-in: `selection_replacement` draws
+    the tournament candidates with replacement, `stop_on_convergence` gives up (no
+    solution) as soon as a generation holds the same individuals as the previous one, and
+    `distinct_initial` makes the random first generation free of repeats (as far as the
+    target length allows).
+
+    With `checkpoint`, the full run state (population, fitness, RNG state, generation and
+    parameters) is saved to that file every `checkpoint_every` generations and at the end,
+    on a background thread. With `resume` and an existing checkpoint, the run continues
+    from it and ends exactly as the uninterrupted run would have.
+
+    Returns a dict with `generations` (generation the target was found in, or None),
+    `best_fitness` (best fitness of every generation), `best_individual` (fittest of the
+    last generation) and `wall_time` (seconds).
+    """
+    start = time.perf_counter()
+
+    engine = PopulationEngine(genes, target, np.random.default_rng(seed))
+    if selection_candidates is None: selection_candidates = population_size // 3
+    params = {
+        "genes"                 : engine.genes,
+        "target"                : ''.join(engine.decode(engine.target)),
+        "population_size"       : population_size,
+        "max_gen"               : max_gen,
+        "elite_carryover"       : elite_carryover,
+        "mutation_probability"  : mutation_probability,
+        "selection_candidates"  : selection_candidates,
+        "selection_replacement" : selection_replacement,
+        "stop_on_convergence"   : stop_on_convergence,
+        "distinct_initial"      : distinct_initial,
+    }
+
+    if resume and checkpoint is not None and os.path.exists(checkpoint):
+        state = load_checkpoint(checkpoint)
+        changed = [key for key, value in params.items() if state.get(key) != value]
+        if changed: raise ValueError(f"Checkpoint {checkpoint} was made with different {', '.join(changed)}")
+
+        engine.rng.bit_generator.state = state["rng"]
+        population, fitness = state["population"], state["fitness"]
+        gen, best_fitness, elapsed, converged = state["gen"], state["best_fitness"], state["wall_time"], state["converged"]
+    else:
+        # Generate the first generation
+        if initial_population is None: population = engine.random_population(population_size, distinct_initial)
+        elif isinstance(initial_population, np.ndarray): population = initial_population.astype(np.uint8)
+        else: population = engine.encode_population(initial_population)
+        population, fitness = engine.sort_population(population, engine.fitness(population))
+
+        gen = 1
+        best_fitness = [int(fitness[0])]
+        elapsed = 0.0
+        converged = False
+
+    # Match prefix sums, carried over from generation to generation by the engine
+    prefix = engine.prefix_matches(population)
+
+    generations = None
+    writer = CheckpointWriter(checkpoint) if checkpoint is not None else None
+
+    # Copies of everything needed to continue from here (the arrays are replaced, not mutated, by the engine)
+    def save():
+        writer.submit({
+            **params,
+            "gen"           : gen,
+            "wall_time"     : elapsed + time.perf_counter() - start,
+            "rng"           : engine.rng.bit_generator.state,
+            "population"    : population,
+            "fitness"       : fitness,
+            "best_fitness"  : list(best_fitness),
+            "converged"     : converged,
+        })
+
+    try:
+        while True:
+            if fitness[0] == 0:
+                generations = gen
+                break
+            if gen == max_gen or converged: break
+
+            previous = population
+            population, fitness, prefix = engine.next_generation(population, fitness, elite_carryover, mutation_probability, selection_candidates, selection_replacement, prefix)
+            converged = stop_on_convergence and engine.same_individuals(previous, population)
+            gen += 1
+            best_fitness.append(int(fitness[0]))
+            if writer is not None and gen % checkpoint_every == 0: save()
+    finally:
+        if writer is not None:
+            # Also on errors/interrupts, unless they hit between updating the population and the history
+            if len(best_fitness) == gen: save()
+            writer.close()
+
+    return {
+        "generations"   : generations,
+        "solved"        : generations is not None,
+        "best_fitness"  : best_fitness,
+        "best_individual": ''.join(engine.decode(population[0])),
+        "wall_time"     : elapsed + time.perf_counter() - start,
+    }
@@ -0,0 +1,66 @@
+import numpy as np
+
+from functools import lru_cache
+
+# Most random keys the dense path of `sample_without_replacement` holds at once
+_DENSE_KEYS = 1 << 20
+
+# `rows` samples of `k` distinct indexes out of range(n), drawn all at once
+def sample_without_replacement(rng:np.random.Generator, n:int, k:int, rows:int):
+    k = max(1, min(k, n))
+
+    # Dense samples: partition random keys (O(n) per row), a block of rows at a time so the
+    # keys stay within _DENSE_KEYS (the blocks draw the same stream as one big matrix)
+    if k * k > n:
+        samples = np.empty((rows, k), dtype=np.intp)
+        block = max(1, _DENSE_KEYS // n)
+        for i in range(0, rows, block):
+            keys = rng.random((min(block, rows - i), n))
+            samples[i:i + block] = np.argpartition(keys, k - 1, axis=1)[:, :k]
+        return samples
+
+    # Sparse samples: draw with replacement and redraw only the rows that got a repeat
+    samples = rng.integers(0, n, size=(rows, k))
+    repeated = np.arange(rows)
+    while len(repeated):
+        ordered = np.sort(samples[repeated], axis=1)
+        repeated = repeated[(ordered[:, 1:] == ordered[:, :-1]).any(axis=1)]
+        samples[repeated] = rng.integers(0, n, size=(len(repeated), k))
+    return samples
+
+def tournament_selection(rng:np.random.Generator, fitness:np.ndarray, candidates:int, tournaments:int):
+    """
+    Draw every tournament of a generation at once.
+
+    Each tournament samples `candidates` distinct indexes and is won by the fittest one
+    (lowest fitness, ties go to the lowest index). Returns the winner indexes and the
+    (tournaments x candidates) candidate indexes, which the UI draws as connection lines.
+    """
+    size = len(fitness)
+    indexes = sample_without_replacement(rng, size, candidates, tournaments)
+    keys = np.asarray(fitness, dtype=np.int64)[indexes] * size + indexes
+    winners = indexes[np.arange(tournaments), np.argmin(keys, axis=1)]
+    return winners, indexes
+
+# CDF of the lowest of k distinct (or, with replacement, independent) uniform indexes out of range(n)
+@lru_cache(maxsize=64)
+def _lowest_index_cdf(n:int, k:int, replacement:bool = False):
+    m = np.arange(n, dtype=np.float64)
+    if replacement: return 1.0 - ((n - m - 1) / n) ** k
+    survival = np.cumprod(np.clip((n - m - k) / (n - m), 0.0, None))
+    return 1.0 - survival
+
+def tournament_winners(rng:np.random.Generator, size:int, candidates:int, tournaments:int | tuple, replacement:bool = False):
+    """
+    Winners of `tournaments` tournaments over a fitness-sorted population, without drawing
+    the candidates: the winner is the lowest of `candidates` distinct indexes, so its
+    index is sampled straight from that distribution (O(log size) per tournament).
+    `tournaments` may also be a shape, e.g. (populations, tournaments) for a batch.
+
+    With `replacement`, candidates are drawn with replacement instead (the notebook's
+    `random.choices` tournaments), so the same individual can fill several slots.
+    """
+    candidates = max(1, candidates if replacement else min(candidates, size))
+    cdf = _lowest_index_cdf(size, candidates, replacement)
+    winners = np.searchsorted(cdf, rng.random(tournaments), side='right')
+    return np.minimum(winners, size - 1 if replacement else size - candidates)
@@ -0,0 +1,78 @@
+import math, os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from components.runner import run_genetic_algorithm
+
+# Selection and stopping rules of the notebook's genetic_algorithm
+NOTEBOOK_RULES = {
+    "selection_candidates"  : 4,
+    "selection_replacement" : True,
+    "stop_on_convergence"   : True,
+    "distinct_initial"      : True,
+}
+
+# Worker: run one chunk of independent GA runs and count the successes
+def _run_chunk(genes:str, target:str, params:dict, seeds:list[np.random.SeedSequence]):
+    return sum(run_genetic_algorithm(genes, target, seed=seed, **params)["solved"] for seed in seeds)
+
+# Normal approximation confidence interval of a success proportion
+def confidence_interval(successes:int, iterations:int, confidence:float = 0.95):
+    p = successes / iterations
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    margin = z * math.sqrt(p * (1 - p) / iterations)
+    return p, (p - margin, p + margin)
+
+def success_rate_sweep(genes:str, points:list[dict], iterations:int = 1000, confidence:float = 0.95, seed:int = None, workers:int = None, chunk_size:int = None):
+    """
+    Parallel Monte Carlo estimate of the GA success rate for every point of a sweep.
+
+    Every point is a dict with `population`, `target_gene_length`, `mutation_probability`
+    and optionally `gen_cap`, `elite_carryover` and the selection and stopping rules. A
+    random target is drawn per point and `iterations` independent runs are spread over a
+    process pool.
+
+    The rules default to the notebook's original loop, so its success rates stay
+    comparable: 4 tournament candidates drawn with replacement, a stop when a generation
+    repeats the previous one, and a distinct first generation (see `NOTEBOOK_RULES`; any
+    of them can be overridden per point).
+
+    Each point and each run gets its own child of `seed`'s SeedSequence, so the results are
+    identical for any number of workers or chunk size.
+
+    Returns one dict per point with the rules it ran with, `successes`, `p` and `ci`.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None: chunk_size = max(1, math.ceil(iterations * len(points) / (workers * 4)))
+
+    targets, rules, jobs = [], [], []
+    for point, point_seed in zip(points, np.random.SeedSequence(seed).spawn(len(points))):
+        target_seed, runs_seed = point_seed.spawn(2)
+        target_rng = np.random.default_rng(target_seed)
+        target = ''.join(genes[i] for i in target_rng.integers(0, len(genes), point["target_gene_length"]))
+        targets.append(target)
+
+        rules.append({key: point.get(key, default) for key, default in NOTEBOOK_RULES.items()})
+        params = {
+            "population_size"       : point["population"],
+            "max_gen"               : point.get("gen_cap", 100),
+            "mutation_probability"  : point["mutation_probability"],
+            "elite_carryover"       : point.get("elite_carryover", 1),
+            **rules[-1],
+        }
+        run_seeds = runs_seed.spawn(iterations)
+        for i in range(0, iterations, chunk_size):
+            jobs.append((len(targets) - 1, target, params, run_seeds[i:i + chunk_size]))
+
+    successes = [0] * len(points)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(index, executor.submit(_run_chunk, genes, target, params, seeds)) for index, target, params, seeds in jobs]
+        for index, future in futures: successes[index] += future.result()
+
+    results = []
+    for point, target, point_rules, count in zip(points, targets, rules, successes):
+        p, ci = confidence_interval(count, iterations, confidence)
+        results.append({**point, **point_rules, "target": target, "iterations": iterations, "successes": count, "p": p, "ci": ci})
+    return results
@@ -1,4 +1,32 @@
 import pygame
+
+from collections import OrderedDict
+
+FONT_PATH = 'freesansbold.ttf'
+TEXT_CACHE_SIZE = 512
+
+_fonts:dict[int, pygame.font.Font] = {}
+_rendered:OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+# Shared font of a given size, loaded from disk only once
+def get_font(size:int):
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(FONT_PATH, size)
+    return font
+
+# Rendered text surface, kept in a bounded LRU cache keyed by (text, size, color).
+# The surfaces are shared, so they must only be blitted, never drawn on.
+def render_text(text:str, size:int, col:tuple):
+    key = (text, size, tuple(col))
+    surf = _rendered.get(key)
+    if surf is not None:
+        _rendered.move_to_end(key)
+        return surf
+    
+    surf = _rendered[key] = get_font(size).render(text, True, col)
+    if len(_rendered) > TEXT_CACHE_SIZE: _rendered.popitem(last=False)
+    return surf
         
 class RectObject:
     def __init__(self, surface:pygame.Surface, w:int, h:int, col:tuple=(0,0,0)):
@@ -9,8 +37,8 @@ class RectObject:
 class Text:
     def __init__(self, surface:pygame.Surface, text:str, size:int, col:tuple=(0,0,0)):
         self.surface = surface
-        self.font = pygame.font.Font('freesansbold.ttf', size)
-        self.text = self.font.render(text, True, col)
+        self.font = get_font(size)
+        self.text = render_text(text, size, col)
         self.rect = self.text.get_rect()
         
     def draw(self):
@@ -32,6 +60,7 @@ class Button(RectObject):
         self.text_size = self.__font_size()
         self.text_col = text_col
         
+        self.label = text
         self.text = Text(self.surface, text, self.text_size, self.text_col)
         
     def __darken_color(self, rgb:tuple, factor:float):
@@ -49,6 +78,8 @@ class Button(RectObject):
         return int( min(a, b) - 10 )
     
     def change_text(self, text:str):
+        if text == self.label: return
+        self.label = text
         self.text = Text(self.surface, text, self.text_size, self.text_col)
     
     def is_clicked(self):
@@ -137,7 +168,7 @@ class Dropdown:
 
         self.rect = pygame.Rect(0, 0, w, h)
         self.items = items
-        self.font = pygame.font.Font('freesansbold.ttf', 20)
+        self.font_size = 20
         self.selected_index = 0
         self.expanded = False
 
@@ -178,9 +209,7 @@ class Dropdown:
         pygame.draw.rect(surface, self.border_color, self.rect, 2)
 
         # Selected text
-        text_surf = self.font.render(
-            self.items[self.selected_index], True, self.text_color
-        )
+        text_surf = render_text(self.items[self.selected_index], self.font_size, self.text_color)
         surface.blit(
             text_surf,
             (self.rect.x + 5, self.rect.y + (self.rect.height - text_surf.get_height()) // 2)
@@ -211,7 +240,7 @@ class Dropdown:
                 pygame.draw.rect(surface, color, item_rect)
                 pygame.draw.rect(surface, self.border_color, item_rect, 2)
 
-                item_surf = self.font.render(item, True, self.text_color)
+                item_surf = render_text(item, self.font_size, self.text_color)
                 surface.blit(
                     item_surf,
                     (item_rect.x + 5, item_rect.y + (item_rect.height - item_surf.get_height()) // 2)
@@ -0,0 +1,275 @@
+import queue, random, threading
+import numpy as np
+
+from components.genetic_algorithm import GenAlgo
+from components.population import Population
+from components.profiler import Profiler
+from components.recording import KEPT_BOTH, KEPT_FIRST, KEPT_SECOND, RunRecorder
+
+class Simulation:
+    """
+    State of one genetic algorithm run, independent of the UI.
+
+    `step` advances exactly like the animated UI does: one pair of parents, children and
+    mutants per call, or the switch to the next generation once it is full. Every call
+    returns a snapshot dict that holds everything needed to draw that step.
+    `fast_forward` runs whole generations on the vectorized engine instead.
+    Phases are timed on `profiler` (a no-op unless it is enabled), and every step is
+    written to `recorder` when one is given (see `RunReplay`).
+    """
+    def __init__(self, algorithm:GenAlgo, population:Population | list[tuple[int, list]], population_size:int, max_gen:int, elite_carryover:int, mutation_probability:int, selection_candidate_number:int, profiler:Profiler = None, recorder:RunRecorder = None):
+        self.algorithm = algorithm
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.recorder = recorder
+        self.genes = algorithm.genes
+        self.target = list(algorithm.target)
+
+        self.population_size = population_size
+        self.max_gen = max_gen
+        self.elite_carryover = elite_carryover
+        self.mutation_probability = mutation_probability
+        self.selection_candidate_number = selection_candidate_number
+
+        # Storage
+        self.current_gen = population if isinstance(population, Population) else Population(self.genes, population)
+        self.next_gen = Population(self.genes)
+        self.candidate_elites = list()
+
+        # Tournaments drawn for the current generation
+        self.__winners, self.__candidates = np.empty(0, dtype=np.intp), None
+        self.__tournament = 0
+
+        # Iteration Variables
+        self.gen = 1
+        self.finished = False
+        self.target_found = False
+
+        # Check if target found immediately in first gen
+        self.__check_end_of_run()
+        self.__send_elites()
+        
+        if self.recorder is not None:
+            self.__record_keyframe()
+            if self.finished: self.__end_recording()
+
+    # Ends the run if target found or maximum generations reached
+    def __check_end_of_run(self):
+        target_found = self.next_gen.has_solution() or self.current_gen.has_solution()
+        max_gen_reached = self.gen == self.max_gen
+
+        if target_found or max_gen_reached:
+            self.target_found = target_found
+            self.finished = True
+
+    # Catch the elites of the current generation and sends it to the next generation
+    def __send_elites(self):
+        for fit, individual in self.current_gen.elites(self.elite_carryover):
+            self.next_gen.push(fit, individual)
+            self.candidate_elites.append((fit, individual))
+
+    # Current generation as gene indexes, in fitness order, for the recorder
+    def __record_keyframe(self):
+        items = self.current_gen.items()
+        self.recorder.keyframe(self.gen, self.algorithm.engine.encode_population([individual for _, individual in items]), [fit for fit, _ in items])
+        
+    def __end_recording(self):
+        self.recorder.end(self.target_found)
+        self.recorder = None
+        
+    # Closes the recording of a run stopped before its end
+    def close_recording(self):
+        if self.recorder is not None: self.recorder.close()
+        self.recorder = None
+        
+    # Selects a parent via tournament selection, also returns the candidate indexes and its index.
+    # All tournaments of a generation are drawn in one batch on its first selection.
+    def __tournament_selection(self):
+        if self.__tournament < len(self.__winners):
+            winner, candidates = self.__winners[self.__tournament], self.__candidates[self.__tournament]
+            self.__tournament += 1
+            return self.current_gen[winner], candidates.tolist(), int(winner)
+
+        tournaments = 2 * -(-(self.population_size - len(self.candidate_elites)) // 2)
+        fitness = np.array([fit for fit, _ in self.current_gen])
+        self.__winners, self.__candidates = self.algorithm.engine.tournament_selection(fitness, self.selection_candidate_number, max(tournaments, 2))
+        self.__tournament = 0
+        return self.__tournament_selection()
+
+    # Everything needed to draw the current state
+    def snapshot(self, parents:list = (), parent_candidates:list = (), children:list = (), mutated:list = ()):
+        return {
+            "gen"               : self.gen,
+            "current_gen"       : list(self.current_gen),
+            "next_gen"          : list(self.next_gen),
+            "parents"           : list(parents),
+            "parent_candidates" : list(parent_candidates),
+            "children"          : list(children),
+            "mutated"           : list(mutated),
+            "finished"          : self.finished,
+            "target_found"      : self.target_found,
+        }
+
+    # Go to the next iteration
+    def step(self):
+        self.__check_end_of_run()
+        if self.finished:
+            if self.recorder is not None: self.__end_recording()
+            return self.snapshot()
+
+        if len(self.next_gen) < self.population_size:
+            phase = lambda name: self.profiler.phase(name, self.gen)
+            
+            # Selection
+            with phase('selection'):
+                (mom, mom_candidates, mom_index), (dad, dad_candidates, dad_index) = self.__tournament_selection(), self.__tournament_selection()
+            (_, mom_ind), (_, dad_ind) = mom, dad
+
+            # Crossover
+            cross_point = random.randint(1, len(mom_ind) - 1)
+            with phase('fitness'):
+                fit1, fit2 = self.algorithm.crossover_fitness(mom_ind, dad_ind, cross_point)
+            with phase('crossover'):
+                children = ((fit1, self.algorithm.crossover(mom_ind, dad_ind, cross_point)), (fit2, self.algorithm.crossover(dad_ind, mom_ind, cross_point)))
+
+            # Mutation (only the mutated genes are rescored)
+            mutated = []
+            with phase('mutation'):
+                for fit, child in children:
+                    child, fit = self.algorithm.mutate(child, self.mutation_probability, fit)
+                    mutated.append((fit, child))
+
+            # Add children to next generation
+            if self.population_size - len(self.next_gen) == 1:
+                kept = KEPT_FIRST if min(mutated) is mutated[0] else KEPT_SECOND
+                self.next_gen.push(*mutated[0 if kept == KEPT_FIRST else 1])
+            else:
+                kept = KEPT_BOTH
+                self.next_gen.push(*mutated[0])
+                self.next_gen.push(*mutated[1])
+            
+            if self.recorder is not None: self.recorder.step((mom_index, dad_index), (mom_candidates, dad_candidates), cross_point, children, mutated, kept)
+
+            return self.snapshot([mom, dad], [mom_candidates, dad_candidates], children, mutated)
+
+        # Proceed to next generation (only its individuals can still become parents)
+        self.current_gen = self.next_gen
+        self.gen += 1
+        self.algorithm.retain(individual for _, individual in self.current_gen)
+
+        # Refresh data
+        self.next_gen = Population(self.genes)
+        self.candidate_elites.clear()
+        self.__winners = np.empty(0, dtype=np.intp)
+
+        self.__send_elites()
+        
+        if self.recorder is not None:
+            self.recorder.next_gen()
+            if self.gen % self.recorder.keyframe_interval == 0: self.__record_keyframe()
+        return self.snapshot()
+
+    # Run whole generations on the vectorized engine until the run ends or `stopped()` is true.
+    # `publish(make_snapshot)` is called after every generation; it decides whether to build one.
+    def fast_forward(self, publish:callable, stopped:callable = lambda: False):
+        engine = self.algorithm.engine
+        population = engine.encode_population([individual for _, individual in self.current_gen])
+        population, fitness = engine.sort_population(population, engine.fitness(population))
+        prefix = engine.prefix_matches(population)
+
+        def make_snapshot():
+            self.current_gen = Population(self.genes, zip(fitness.tolist(), engine.decode_population(population)))
+            return self.snapshot()
+
+        while not self.finished and not stopped():
+            if fitness[0] == 0 or self.gen == self.max_gen:
+                self.finished = True
+                self.target_found = bool(fitness[0] == 0)
+                break
+
+            with self.profiler.phase('generation', self.gen + 1):
+                population, fitness, prefix = engine.next_generation(population, fitness, self.elite_carryover, self.mutation_probability, self.selection_candidate_number, prefix=prefix)
+            if fitness[0] == 0: continue
+            self.gen += 1
+            if self.recorder is not None: self.recorder.keyframe(self.gen, population, fitness)
+            publish(make_snapshot)
+
+        # Keep the list state in sync with the engine state
+        self.next_gen = Population(self.genes)
+        if self.recorder is not None and self.finished:
+            self.recorder.keyframe(self.gen, population, fitness)
+            self.__end_recording()
+        return make_snapshot()
+
+class SimulationWorker(threading.Thread):
+    """
+    Runs a `Simulation` on a background thread and streams snapshots through a bounded queue.
+
+    In step mode every step is queued in order (the worker waits while the queue is full),
+    so the UI can animate each pair. In fast-forward mode the worker never waits for the UI:
+    it only builds a generation summary when the previous one has been taken, and the final
+    snapshot is always delivered (in place of a summary still waiting in the queue). `current_generation` reads the newest produced generation
+    from any thread.
+    """
+    def __init__(self, simulation:Simulation, fast_forward:bool = False, queue_size:int = 8):
+        super().__init__(daemon=True)
+        self.simulation = simulation
+        self.fast_forward = fast_forward
+        self.snapshots = queue.Queue(maxsize=1 if fast_forward else queue_size)
+        self.__stopped = threading.Event()
+
+        # Newest snapshot the worker produced, shared with `current_generation`
+        self.__lock = threading.Lock()
+        self.__latest:dict = None
+
+    def run(self):
+        try:
+            if self.fast_forward:
+                final = self.__keep(self.simulation.fast_forward(self.__offer, self.__stopped.is_set))
+
+                # The final snapshot replaces a summary the UI has not taken yet (only the newest is shown)
+                self.next_snapshot()
+                self.snapshots.put_nowait(final)
+                return
+
+            while not self.__stopped.is_set():
+                snapshot = self.__keep(self.simulation.step())
+                self.__put(snapshot)
+                if snapshot["finished"]: break
+        finally:
+            self.simulation.close_recording()
+
+    def __keep(self, snapshot:dict):
+        with self.__lock: self.__latest = snapshot
+        return snapshot
+
+    # Generation number and individuals (as str) of the newest produced snapshot, or None before the first
+    def current_generation(self):
+        with self.__lock: latest = self.__latest
+        if latest is None: return None
+        return latest["gen"], [''.join(individual) for _, individual in latest["current_gen"]]
+
+    # Queue a snapshot, waiting for room unless the worker gets stopped
+    def __put(self, snapshot:dict):
+        while not self.__stopped.is_set():
+            try:
+                self.snapshots.put(snapshot, timeout=0.05)
+                return
+            except queue.Full: continue
+
+    # Build and queue a summary only when the UI has taken the previous one
+    def __offer(self, make_snapshot:callable):
+        if self.snapshots.empty(): self.snapshots.put_nowait(self.__keep(make_snapshot()))
+
+    def stop(self):
+        self.__stopped.set()
+
+    # Next snapshot in order, or None if the worker has not produced it yet
+    def next_snapshot(self):
+        try: return self.snapshots.get_nowait()
+        except queue.Empty: return None
+
+    # Most recent snapshot (older queued ones are dropped), or None
+    def latest_snapshot(self):
+        latest = None
+        while (snapshot := self.next_snapshot()) is not None: latest = snapshot
+        return latest
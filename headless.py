@@ -0,0 +1,148 @@
+import argparse, json, os, random, sys
+import numpy as np
+
+from components.dataset_reader import WindowIndex
+from components.dataset_cache import load_dataset
+from components.population import sample_initial_population
+from components.runner import run_genetic_algorithm
+from components.islands import run_island_model, TOPOLOGIES
+from components.batch import solve_targets
+from components.motif_scan import GenomeScanner
+
+from settings import *
+
+# Pick the target from the new dataset (among its windows made of `genes` only) and the first
+# generation from the old one (as `main` does)
+def sample_run_inputs(old_windows:WindowIndex, new_windows:WindowIndex, genes:str, population_size:int, rng:np.random.Generator):
+    target = new_windows.random_window(random.Random(int(rng.integers(2**63))), genes)
+    population, sources = sample_initial_population(old_windows, population_size, genes, random.Random(int(rng.integers(2**63))))
+    return target, population, sources
+
+# Adds the `scan` entry of every record (None for skipped windows), scanning their best individuals together
+def scan_records(records:list[dict], scanners:dict[str, GenomeScanner], best:int):
+    scanned = [record for record in records if record["best_individual"] is not None]
+    results = {name: scanner.scan_population([record["best_individual"] for record in scanned], best) for name, scanner in scanners.items()}
+    for record in records: record["scan"] = None
+    for i, record in enumerate(scanned): record["scan"] = {name: scans[i] for name, scans in results.items()}
+
+# One JSON line per window of new.fna, evolved in batches; first generations are sampled from old.fna as usual.
+# With scanners, a batch worth of finished windows is scanned at once (the genome is read once per group)
+def solve_all_windows(args:argparse.Namespace, genes:str, old_windows:WindowIndex, new_windows:WindowIndex, out, scanners:dict[str, GenomeScanner] = None):
+    sampler = random.Random(args.seed)
+    initial_population = lambda index, target: sample_initial_population(old_windows, args.population, genes, sampler)[0]
+
+    results = solve_targets(
+        genes, new_windows,
+        population_size=args.population,
+        max_gen=args.max_gen,
+        elite_carryover=args.elite_carryover,
+        mutation_probability=args.mutation_prob,
+        batch_size=args.batch_size,
+        initial_population=initial_population,
+        seed=args.seed,
+    )
+    def write(records:list[dict]):
+        if scanners: scan_records(records, scanners, args.scan_best)
+        for record in records: out.write(json.dumps(record) + '\n')
+        out.flush()
+
+    records = []
+    for result in results:
+        window = result.pop("index")
+        records.append({
+            "window"        : window,
+            "sequence_id"   : new_windows.locate(window)[0],
+            "organism"      : args.organism,
+            **result,
+        })
+        if len(records) == args.batch_size or not scanners:
+            write(records)
+            records = []
+    write(records)
+
+def parse_args(argv:list[str] = None):
+    parser = argparse.ArgumentParser(description="Run the genetic algorithm headless (no pygame) and write JSON lines results")
+    parser.add_argument("--organism", default=DEFAULT_DATASET, help="dataset folder inside data/")
+    parser.add_argument("--data-dir", default="data", help="folder containing the organism datasets")
+    parser.add_argument("--cache-dir", default=DATASET_CACHE_DIR, help="2-bit dataset cache folder ('' disables the cache)")
+    parser.add_argument("--runs", type=int, default=1, help="number of independent runs")
+    parser.add_argument("--population", type=int, default=DEFAULT_POPULATION_SIZE)
+    parser.add_argument("--max-gen", type=int, default=DEFAULT_MAX_GEN)
+    parser.add_argument("--elite-carryover", type=int, default=DEFAULT_ELITE_CARRYOVER)
+    parser.add_argument("--mutation-prob", type=float, default=DEFAULT_MUTATION_PROBABILITY, help="mutation probability in percent")
+    parser.add_argument("--motif-length", type=int, default=MOTIF_LENGTH)
+    parser.add_argument("--islands", type=int, default=1, help="island populations, each in its own process (1 runs a single population)")
+    parser.add_argument("--migration-interval", type=int, default=10, help="generations between migrations")
+    parser.add_argument("--migrants", type=int, default=1, help="best individuals every island sends per migration")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default='ring', help="migration topology")
+    parser.add_argument("--all-windows", action="store_true", help="solve every window of new.fna as a target (batched) instead of --runs random ones")
+    parser.add_argument("--batch-size", type=int, default=256, help="targets evolved at once with --all-windows")
+    parser.add_argument("--checkpoint-dir", help="save every run's state to <dir>/run-<n>.ckpt while it runs")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="generations between checkpoints")
+    parser.add_argument("--resume", action="store_true", help="continue runs from the checkpoints in --checkpoint-dir (use the same --seed)")
+    parser.add_argument("--scan", action="store_true", help="also scan every run's best individual against every position of new.fna and old.fna")
+    parser.add_argument("--scan-best", type=int, default=5, help="best loci reported per genome with --scan")
+    parser.add_argument("--seed", type=int, default=None, help="root seed; every run gets its own child seed")
+    parser.add_argument("--output", default="-", help="JSON lines output file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    # Only single-population runs are checkpointed
+    if args.resume and not args.checkpoint_dir: parser.error("--resume needs --checkpoint-dir")
+    if args.checkpoint_dir and args.islands > 1: parser.error("--checkpoint-dir cannot be used with --islands (island runs are not checkpointed)")
+    if args.checkpoint_dir and args.all_windows: parser.error("--checkpoint-dir cannot be used with --all-windows (batched runs are not checkpointed)")
+    if args.scan_best < 1: parser.error("--scan-best must be at least 1")
+    return args
+
+def main(argv:list[str] = None):
+    args = parse_args(argv)
+    genes = 'ACTG'
+
+    cache_dir = args.cache_dir or None
+    old_windows = WindowIndex(load_dataset(f'{args.data_dir}/{args.organism}/old.fna', cache_dir, DATASET_CACHE_MAX_MB << 20), args.motif_length)
+    new_windows = WindowIndex(load_dataset(f'{args.data_dir}/{args.organism}/new.fna', cache_dir, DATASET_CACHE_MAX_MB << 20), args.motif_length)
+
+    scanners = {"new": GenomeScanner(new_windows.dataset), "old": GenomeScanner(old_windows.dataset)} if args.scan else {}
+    if args.checkpoint_dir: os.makedirs(args.checkpoint_dir, exist_ok=True)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        if args.all_windows:
+            solve_all_windows(args, genes, old_windows, new_windows, out, scanners)
+            return
+            
+        for run, seed in enumerate(np.random.SeedSequence(args.seed).spawn(args.runs)):
+            input_seed, run_seed = seed.spawn(2)
+            target, population, sources = sample_run_inputs(old_windows, new_windows, genes, args.population * args.islands, np.random.default_rng(input_seed))
+            params = {
+                "population_size"       : args.population,
+                "max_gen"               : args.max_gen,
+                "elite_carryover"       : args.elite_carryover,
+                "mutation_probability"  : args.mutation_prob,
+                "seed"                  : run_seed,
+            }
+            if args.islands > 1:
+                # Every island starts from its own share of the distinct sampled windows
+                populations = [population[i * args.population:(i + 1) * args.population] for i in range(args.islands)]
+                result = run_island_model(genes, target, args.islands, populations, migration_interval=args.migration_interval, migrants=args.migrants, topology=args.topology, **params)
+            else:
+                checkpoint = os.path.join(args.checkpoint_dir, f"run-{run}.ckpt") if args.checkpoint_dir else None
+                result = run_genetic_algorithm(genes, target, population, checkpoint=checkpoint, checkpoint_every=args.checkpoint_every, resume=args.resume, **params)
+            record = {
+                "run"                   : run,
+                "organism"              : args.organism,
+                "seed"                  : args.seed,
+                "population_size"       : args.population,
+                "max_gen"               : args.max_gen,
+                "elite_carryover"       : args.elite_carryover,
+                "mutation_probability"  : args.mutation_prob,
+                "islands"               : args.islands,
+                "target"                : target,
+                "population_sources"    : sources,
+                **result,
+            }
+            if scanners: scan_records([record], scanners, args.scan_best)
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout: out.close()
+
+if __name__ == '__main__': main()
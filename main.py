@@ -1,13 +1,26 @@
-import random, heapq, pygame, sys, os
+import csv, random, pygame, sys, os, time
+
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from components.genetic_algorithm import GenAlgo
-from components.dataset_reader import read_dataset, split_to_uniform
+from components.dataset_reader import IndexedDataset, WindowIndex
+from components.dataset_cache import load_dataset
+from components.population import Population, sample_initial_population
+from components.worker import Simulation, SimulationWorker
+from components.profiler import Profiler
+from components.recording import RunRecorder, RunReplay
+from components.motif_scan import GenomeScanner
 from components.ui_objects import *
 
 from settings import *
 from colors import *
 
-pygame.init()
+# Posted (from the loader thread) when a background dataset load finishes
+DATASET_LOADED = pygame.event.custom_type()
+# Posted when the status message has been shown for STATUS_MESSAGE_MS
+STATUS_EXPIRED = pygame.event.custom_type()
+# Posted (from the loader thread) when an F6 scan finishes, with its status message and colour
+SCAN_FINISHED = pygame.event.custom_type()
 
 def getFolderNames(parent_folder_dir):
     return [
@@ -107,7 +120,13 @@ class GeneDisplay:
 class main:
     def __init__(self):
         
-        # Window Settings
+        # Time from the start of __init__ to the first drawn frame (seconds)
+        self.created_at = time.perf_counter()
+        self.startup_time:float = None
+        self.dataset_ready_time:float = None
+        
+        # Window Settings (pygame is only initialized once a window is opened, not on import)
+        pygame.init()
         self.surface    = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         self.caption    = pygame.display.set_caption(WINDOW_TITLE)
         self.icon       = pygame.display.set_icon( pygame.image.load(WINDOW_ICON) )
@@ -120,11 +139,14 @@ class main:
         self.genes = 'ACTG'
         # self.target = list( get_random_motif('new', TARGET_GENE_LENGTH) )
         self.folders = getFolderNames('data')
-        self.selected_dataset = DEFAULT_DATASET
-        self.old_dataset = read_dataset(f'data/{self.selected_dataset}/old.fna')
-        self.new_dataset = read_dataset(f'data/{self.selected_dataset}/new.fna')
         
-        self.target = list( random.choice(split_to_uniform(self.new_dataset, MOTIF_LENGTH)) )
+        # Datasets and the first target are loaded in the background (see the end of __init__)
+        self.selected_dataset:str = None
+        self.old_dataset = self.new_dataset = None
+        self.old_windows:WindowIndex = None
+        self.new_windows:WindowIndex = None
+        
+        self.target = list()
         self.__calibrate()
         
         # Algorithm parameters
@@ -135,15 +157,25 @@ class main:
         self.selection_candidate_number = self.population_size // 3
         
         # Algorithm and Timer
-        self.algorithm = GenAlgo(self.genes, self.target)
+        self.algorithm:GenAlgo = None
         self.steps_delay = Timer(PROGRESSION_DELAY_MS, self.__go_next_step, True)
         
-        # Storage
+        # Storage (state of the last shown snapshot)
         self.current_gen = list()
         self.next_gen = list()
-        self.known_elites = set()
-        self.candidate_elites = list()
         self.current_parent_candidates:list[ list[int] ] = list()
+        
+        # How many first generation individuals came from dataset windows, mutants and random fill
+        self.population_sources:dict[str, int] = {}
+        
+        # Background worker running the simulation
+        self.worker:SimulationWorker = None
+        self.fast_forward = DEFAULT_FAST_FORWARD
+        
+        # Replay of a recorded run (F5), shown instead of the worker's snapshots
+        self.replay:RunReplay = None
+        self.replay_paused = False
+        self.replay_delay = PROGRESSION_DELAY_MS
             
         # Iteration Variables
         self.running = False
@@ -220,6 +252,8 @@ class main:
             },
         }
         
+        self.__layout_sections()
+        
         # Target Individual Interface
         self.target_gene_interface = {
             "disp"  : GeneDisplay(self.surface, self.target, 100),
@@ -229,11 +263,71 @@ class main:
         
         # Run button
         self.run_btn = Button(self.surface, 300, 100, 'RUN', GREEN, WHITE)
+        self.ff_btn = Button(self.surface, 300, 40, f"FAST FORWARD: {'ON' if self.fast_forward else 'OFF'}", SKY, WHITE)
         
         self.dropdown = {
             "object" : Dropdown(250, 30, self.folders),
             "label"  : Text(self.surface, "Organism Dataset", 20),
         }
+        if DEFAULT_DATASET in self.folders: self.dropdown['object'].selected_index = self.folders.index(DEFAULT_DATASET)
+        
+        # Background dataset loading (the newest selection wins, stale loads are dropped)
+        self.loader = ThreadPoolExecutor(max_workers=1)
+        self.dataset_load:Future = None
+        self.loading_dataset:str = None
+        self.load_token = 0
+        
+        # Rendering (regions to redraw on the next frame)
+        self.render_mode = RENDER_MODE
+        self.dirty_rects:list[pygame.Rect] = [self.surf_rect.copy()]
+        self.mouse_pos = pygame.mouse.get_pos()
+        
+        # Profiling (F3 toggles the overlay and the timings, F4 exports them per generation)
+        self.profiler = Profiler(PROFILE_OVERLAY)
+        self.profile_rect = pygame.Rect(10, 10, 300, 0)
+        
+        # Status message (outcome of key commands and background errors) under the interface
+        self.status:Text = None
+        
+        # The first frame is drawn while the default dataset loads
+        self.__request_dataset(DEFAULT_DATASET)
+        
+    # Marks a screen region (whole window by default) to be redrawn on the next frame
+    def __mark_dirty(self, rect:pygame.Rect = None):
+        self.dirty_rects.append(self.surf_rect.copy() if rect is None else pygame.Rect(rect))
+        
+    # Widgets whose look depends on the mouse position
+    def __hover_rects(self):
+        rects = [self.number_interfaces[k]["interface"].rect for k in self.number_interfaces.keys()]
+        rects += [self.run_btn.rect, self.ff_btn.rect, self.target_gene_interface["button"].rect]
+        
+        dropdown:Dropdown = self.dropdown['object']
+        items = len(dropdown.items) if dropdown.expanded else 0
+        rects.append(pygame.Rect(dropdown.rect.x, dropdown.rect.y, dropdown.rect.width, dropdown.rect.height * (items + 1)))
+        return rects
+        
+    # Shows a message under the interface for STATUS_MESSAGE_MS (replacing the previous one)
+    def __set_status(self, message:str, col:tuple = BLACK):
+        if self.status is not None: self.__mark_dirty(self.status.rect)
+        self.status = Text(self.surface, message, 18, col)
+        self.status.rect.midbottom = self.interface.midbottom
+        self.status.rect.y -= 10
+        self.__mark_dirty(self.status.rect)
+        pygame.time.set_timer(STATUS_EXPIRED, STATUS_MESSAGE_MS, loops=1)
+        
+    def __clear_status(self):
+        if self.status is not None: self.__mark_dirty(self.status.rect)
+        self.status = None
+        
+    # Draws the status message
+    def __draw_status(self):
+        if self.status is not None: self.status.draw()
+        
+    # Marks the widgets under the previous and the current mouse position
+    def __mark_hovered(self, pos:tuple):
+        for rect in self.__hover_rects():
+            if rect.collidepoint(pos) or rect.collidepoint(self.mouse_pos): self.__mark_dirty(rect)
+        self.mouse_pos = pos
         
     # Convert target gene code into list and checks if target contains unknown gene
     def __calibrate(self):
@@ -267,9 +361,12 @@ class main:
     # Change target individual on button click
     def __change_target_individual(self):
         button:Button  = self.target_gene_interface["button"]
-        if not self.running and button.is_clicked():
+        if not self.running and self.new_windows is not None and self.loading_dataset is None and button.is_clicked():
             # self.target = list( get_random_motif('new', TARGET_GENE_LENGTH) )
-            self.target = list( random.choice(split_to_uniform(self.new_dataset, MOTIF_LENGTH)) )
+            try: self.target = list( self.new_windows.random_window(genes=self.genes) )
+            except ValueError as error:
+                self.__set_status(f"Could not draw a target: {error}", RED)
+                return
             self.algorithm = GenAlgo(self.genes, self.target)
             
             self.target_gene_interface["disp"] = GeneDisplay(self.surface, self.target, 100)
@@ -277,61 +374,85 @@ class main:
             self.target_gene_interface["disp"].setTextColor(WHITE)
             self.target_gene_interface["disp"].rect.center = self.interface.center
             
-    # Change used dataser
+    # Change used dataset (loaded in the background, see __finish_dataset_load)
     def __change_dataset(self):
         selected = self.dropdown['object'].get_selected()
-        if self.selected_dataset != selected:
-            
-            # Set selected dataset
-            self.selected_dataset = selected
-            
-            # Load new datasets
-            self.old_dataset = read_dataset(f'data/{self.selected_dataset}/old.fna')
-            self.new_dataset = read_dataset(f'data/{self.selected_dataset}/new.fna')
-            
-            # Update target gene
-            self.target = list( random.choice(split_to_uniform(self.new_dataset, MOTIF_LENGTH)) )
-            self.algorithm = GenAlgo(self.genes, self.target)
-            
-            self.target_gene_interface["disp"] = GeneDisplay(self.surface, self.target, 100)
-            self.target_gene_interface["disp"].setBorderColor(GREEN)
-            self.target_gene_interface["disp"].setTextColor(WHITE)
-            self.target_gene_interface["disp"].rect.center = self.interface.center
+        if selected != (self.loading_dataset or self.selected_dataset): self.__request_dataset(selected)
+        
+    # Start loading a dataset; a newer request replaces any load still in flight
+    def __request_dataset(self, selected:str):
+        self.load_token += 1
+        if self.dataset_load is not None: self.dataset_load.cancel()
+        
+        if selected == self.selected_dataset:
+            self.dataset_load, self.loading_dataset = None, None
+        else:
+            self.loading_dataset = selected
+            self.dataset_load = self.loader.submit(self.__load_dataset, selected, self.load_token)
+            self.dataset_load.add_done_callback(lambda _: pygame.event.post(pygame.event.Event(DATASET_LOADED)))
+        self.__mark_dirty()
+        
+    # Loader thread: datasets, window indexes and a first target (stops early once superseded)
+    def __load_dataset(self, name:str, token:int):
+        old_dataset = load_dataset(f'data/{name}/old.fna', DATASET_CACHE_DIR, DATASET_CACHE_MAX_MB << 20)
+        if token != self.load_token: return self.__close_datasets(old_dataset)
+        new_dataset = load_dataset(f'data/{name}/new.fna', DATASET_CACHE_DIR, DATASET_CACHE_MAX_MB << 20)
+        if token != self.load_token: return self.__close_datasets(old_dataset, new_dataset)
+        
+        old_windows = WindowIndex(old_dataset, MOTIF_LENGTH)
+        new_windows = WindowIndex(new_dataset, MOTIF_LENGTH)
+        try: target = list( new_windows.random_window(genes=self.genes) )
+        except ValueError:
+            self.__close_datasets(old_dataset, new_dataset)
+            raise
+        return token, name, old_dataset, new_dataset, old_windows, new_windows, target
+        
+    # Release the memory maps and files of datasets that are no longer used
+    def __close_datasets(self, *datasets):
+        for dataset in datasets:
+            if isinstance(dataset, IndexedDataset): dataset.close()
+        
+    # Swap in a finished dataset load, unless a newer selection superseded it
+    def __finish_dataset_load(self):
+        load = self.dataset_load
+        if load is None or not load.done(): return
+        self.dataset_load, self.loading_dataset = None, None
+        self.__mark_dirty()
+        
+        try: result = load.result()
+        except Exception as error:
+            # Keep the current dataset and show it in the dropdown again
+            self.__set_status(f"Could not load dataset: {error}", RED)
+            dropdown:Dropdown = self.dropdown['object']
+            if self.selected_dataset in dropdown.items: dropdown.selected_index = dropdown.items.index(self.selected_dataset)
+            return
+        
+        if result is None: return
+        if result[0] != self.load_token: 
+            self.loader.submit(self.__close_datasets, result[2], result[3])
+            return
+        if self.dataset_ready_time is None: self.dataset_ready_time = time.perf_counter() - self.created_at
+        
+        # The replaced datasets are closed on the loader thread, after any scan still reading them
+        if self.old_dataset is not None: self.loader.submit(self.__close_datasets, self.old_dataset, self.new_dataset)
+        _, self.selected_dataset, self.old_dataset, self.new_dataset, self.old_windows, self.new_windows, self.target = result
+        
+        # Update target gene
+        self.algorithm = GenAlgo(self.genes, self.target)
+        
+        self.target_gene_interface["disp"] = GeneDisplay(self.surface, self.target, 100)
+        self.target_gene_interface["disp"].setBorderColor(GREEN)
+        self.target_gene_interface["disp"].setTextColor(WHITE)
+        self.target_gene_interface["disp"].rect.center = self.interface.center
             
-    # Catch the elites of the current generation and sends it to the next generation
-    def __send_elites(self):
-        for fit, individual in self.current_gen:
-            if len(self.candidate_elites) < self.elite_carryover:
-                if tuple(individual) not in self.known_elites:
-                    heapq.heappush(self.next_gen, (fit, individual))
-                    self.candidate_elites.append((fit, individual))
-                    self.known_elites.add(tuple(individual))
-                else: continue
-            else: break
-        
-    # Selects a parent via tournament selection
-    def __tournament_selection(self):
-        candidates = []
-        indexes = []
-        
-        while len(candidates) < self.selection_candidate_number:
-            index = random.randint(0, self.population_size - 1)
-            if index in indexes: continue
-            else: indexes.append(index)
-            
-            candidate = self.current_gen[index]
-            candidates.append(candidate)
-            
-        best = min( candidates )
-        self.current_parent_candidates.append(indexes)
-        return best
-    
     # Creates a display that fits into a section with the use of some maths
-    def __create_display_in_section(self, section:str, gene:str, iteration:int, n:int, col:tuple):
+    def __create_display_in_section(self, section:str, gene:str, iteration:int, n:int, col:tuple, fit:int = None):
         
         section_rect = self.displays[section]['rect']
         
-        decimal = (len(self.target) - self.algorithm.fitness(gene)) / len(self.target)
+        if fit is None:
+            with self.profiler.phase('fitness', self.gen): fit = self.algorithm.fitness(gene)
+        decimal = (len(self.target) - fit) / len(self.target)
         fitness = round(decimal * 100, 2)
         
         display = GeneDisplay(self.surface, gene, fitness)
@@ -345,74 +466,28 @@ class main:
         
         return display
     
-    # Generate the first generation (random)
+    # Generate the first generation (distinct dataset windows, topped up with mutants/random ones if needed)
     def __generate_population(self, size:int):
-        population = []
-        while len(population) < size:
-            # candidate = list(get_random_motif('new', len(self.target)))
-            candidate = list(random.choice(split_to_uniform(self.old_dataset, MOTIF_LENGTH)))
-            if candidate not in population: 
-                ind = (self.algorithm.fitness(candidate), candidate)
-                heapq.heappush(population, ind)
+        individuals, self.population_sources = sample_initial_population(self.old_windows, size, self.genes)
+        population = Population(self.genes)
+        with self.profiler.phase('fitness', self.gen):
+            for candidate in individuals:
+                candidate = list(candidate)
+                population.push(self.algorithm.fitness(candidate), candidate)
         return population
     
-    # Select the parents uing selection algorithm
-    def __generate_parents(self):
-        parents = []
-        section = 'parents'
-        
-        for i in range(1, 3):
-            parent = self.__tournament_selection()[1]
-            parents.append(parent)
-            display = self.__create_display_in_section(section, parent, i, 2, ORANGE)
-            self.displays[section]['data'].append( display )
-            
-        return tuple(parents)
-    
-    # Produce the children after crossover
-    def __generate_children(self, parents:tuple):
-        
-        mom, dad = parents
-        section = "children"
-        
-        # Crossover
-        cross_point = random.randint(1, len(mom) - 1)
-        
-        child1 = self.algorithm.crossover(mom, dad, cross_point)
-        c1_disp = self.__create_display_in_section(section, child1, 1, 2, DARK_BLUE)
-        
-        child2 = self.algorithm.crossover(dad, mom, cross_point)
-        c2_disp = self.__create_display_in_section(section, child2, 2, 2, DARK_BLUE)
-        
-        self.displays[section]['data'] += [c1_disp, c2_disp]
-        
-        return (child1, child2)
-    
-    # Returns the children with some mutated code
-    def __generate_mutated(self, children):
-        
-        child1, child2 = children
-        section = "mutation"
-        
-        # Mutation
-        child1 = self.algorithm.mutate(child1, self.mutation_probability)
-        c1_disp = self.__create_display_in_section(section, child1, 1, 2, DARK_MAGENTA)
-        
-        child2 = self.algorithm.mutate(child2, self.mutation_probability)
-        c2_disp = self.__create_display_in_section(section, child2, 2, 2, DARK_MAGENTA)
-        
-        self.displays[section]['data'] += [c1_disp, c2_disp]
-            
-        # Add children to next generation
-        new_children = ((self.algorithm.fitness(child1), child1), (self.algorithm.fitness(child2), child2))
-        return new_children
+    # Generate displays for a pair of individuals (parents, children or mutated) in its section
+    def __generate_pair_disp(self, section:str, pair:list, col:tuple):
+        for i, (fit, ind) in enumerate(pair, 1):
+            display = self.__create_display_in_section(section, ind, i, 2, col, fit)
+            self.displays[section]['data'].append(display)
 
     # Generate displays for the current generation in its section
     def __generate_current_gen_disp(self):
         i = 1
         section = "curr-gen"
-        for _, ind in self.current_gen:
-            display = self.__create_display_in_section(section, ind, i, self.population_size, DARK_RED)
+        for fit, ind in self.current_gen:
+            display = self.__create_display_in_section(section, ind, i, self.population_size, DARK_RED, fit)
             self.displays[section]['data'].append(display)
             i += 1
             
@@ -420,8 +495,8 @@ class main:
     def __generate_next_gen_disp(self):
         i = 1
         section = "next-gen"
-        for _, ind in self.next_gen:
-            display = self.__create_display_in_section(section, ind, i, self.population_size, DARK_GREEN)
+        for fit, ind in self.next_gen:
+            display = self.__create_display_in_section(section, ind, i, self.population_size, DARK_GREEN, fit)
             self.displays[section]['data'].append(display)
             i += 1
             
@@ -463,8 +538,8 @@ class main:
             self.__connect_parents_to_children()
             self.__connect_children_to_mutated()
             
-    # Draws the sections for process display
-    def __draw_display_sections(self):
+    # Positions the sections for process display and their labels
+    def __layout_sections(self):
         i = 1
         margin = lambda x:  x * (WINDOW_WIDTH - len(self.displays) * self.display_section_width) / (len(self.displays) + 1) + (x - 1) * self.display_section_width
         
@@ -482,11 +557,17 @@ class main:
             label.rect.centerx = section.centerx
             label.rect.y -= 10
             
-            pygame.draw.rect(self.surface, BLACK, section, 5)
-            label.draw()
-            
             i += 1
             
+    # Draws the frame and label of a section
+    def __draw_section(self, k:str):
+        pygame.draw.rect(self.surface, BLACK, self.displays[k]['rect'], 5)
+        self.displays[k]['label'].draw()
+            
+    # Draws the sections for process display
+    def __draw_display_sections(self):
+        for k in self.displays.keys(): self.__draw_section(k)
+            
     # Draws every display stored in the sections display data
     def __draw_displays(self):
         if self.running: 
@@ -526,7 +607,10 @@ class main:
         self.run_btn.rect.right = self.interface.right
         self.run_btn.rect.x -= 20
         
-        if not self.running: 
+        if self.loading_dataset is not None:
+            self.run_btn.color = GRAY(0.5)
+            self.run_btn.change_text("LOADING")
+        elif not self.running: 
             self.run_btn.color = GREEN
             self.run_btn.change_text("RUN")
         else: 
@@ -535,31 +619,29 @@ class main:
             
         self.run_btn.draw()
         
-    # Draws the indicator of current generation
-    def __draw_gen_indicator(self):
+        self.ff_btn.rect.centerx = self.run_btn.rect.centerx
+        self.ff_btn.rect.top = self.run_btn.rect.bottom
+        self.ff_btn.rect.y += 10
+        self.ff_btn.draw()
+        
+    # Texts of the generation indicator (and, once a run ended, whether the target was found)
+    def __gen_indicator_texts(self):
+        if self.runs == 0: return []
         gen_indicator = Text(self.surface, f"Gen {self.gen}", 100)
         gen_indicator.rect.center = self.surf_rect.center
+        if self.running: return [gen_indicator]
         
-        if self.runs > 0:
-            gen_indicator.draw()
-            self.__draw_target_found_text()
+        if self.target_found:
+            display = Text(self.surface, f"Target found in {self.gen} generations", 50, GREEN)
+        else:
+            display = Text(self.surface, f"Target not found", 50, RED)
+        display.rect.center = self.surf_rect.center
+        display.rect.y += 100
+        return [gen_indicator, display]
         
-    # Draws the text indicating the target has been found
-    def __draw_target_found_text(self):
-        text = ''
-        col = None
-        if not self.running:
-            if self.target_found:
-                text = f"Target found in {self.gen} generations"
-                col = GREEN
-            else:
-                text = f"Target not found"
-                col = RED
-                
-            display = Text(self.surface, text, 50, col)
-            display.rect.center = self.surf_rect.center
-            display.rect.y += 100
-            display.draw()
+    # Draws the indicator of current generation
+    def __draw_gen_indicator(self):
+        for text in self.__gen_indicator_texts(): text.draw()
         
     # Draws the target gene UI
     def __draw_target_gene_interface(self):
@@ -569,6 +651,7 @@ class main:
         display.rect.center = self.interface.center
         
         label:Text   = self.target_gene_interface["label"]
+        if self.loading_dataset is not None: label = Text(self.surface, f"Loading {self.loading_dataset}...", 20)
         label.rect.centerx = display.rect.centerx
         label.rect.bottom = display.rect.top
         label.rect.y -= 10
@@ -610,126 +693,394 @@ class main:
         self.gen = 1
         self.target_found = False
         
-        self.current_gen.clear()
-        self.next_gen.clear()
+        if self.worker is not None: self.worker.stop()
+        self.worker = None
+        self.replay = None
         
-        self.candidate_elites.clear()
-        self.known_elites.clear()
-        
-        self.current_parent_candidates.clear()
+        self.current_gen = list()
+        self.next_gen = list()
+        self.current_parent_candidates = list()
         
         for k in self.displays.keys(): self.displays[k]['data'].clear()
         
-    # Ends the run if target found or maximum generations reached
-    def __check_end_of_run(self):
-        target_found = (0, self.target) in self.next_gen or (0, self.target) in self.current_gen
-        max_gen_reached = self.gen == self.max_gen
+    # Rebuilds every section display from a simulation snapshot
+    def __show_snapshot(self, snapshot:dict):
+        # What the previous snapshot drew there has to be cleared
+        self.__mark_dirty(self.__connections_rect())
+        self.__mark_dirty(self.__gen_indicator_rect())
+        current_changed = snapshot['current_gen'] != self.current_gen or not self.displays['curr-gen']['data']
         
-        if target_found or max_gen_reached: 
-            self.target_found = target_found
-            self.running = False
+        self.gen = snapshot['gen']
+        self.current_gen = snapshot['current_gen']
+        self.next_gen = snapshot['next_gen']
+        self.current_parent_candidates = snapshot['parent_candidates']
         
-    # Go to the next iteration
-    def __go_next_step(self):
-        self.__check_end_of_run()
-        self.current_parent_candidates = []
-        
-        if len(self.next_gen) < self.population_size:
-            self.__send_elites()
-            parents = self.__generate_parents()
-            children = self.__generate_children(parents)
-            mutated = self.__generate_mutated(children)
-                
-            if self.population_size - len(self.next_gen) == 1:
-                heapq.heappush(self.next_gen, min( mutated ))
-            else:
-                heapq.heappush(self.next_gen, mutated[0])
-                heapq.heappush(self.next_gen, mutated[1])
-            
-            self.__generate_next_gen_disp()
-            
-        elif not self.target_found:
-            # Clear the displays
-            for k in self.displays.keys():
-                self.displays[k]['data'] = list[GeneDisplay]()
-                
-            # Proceed to next generation
-            self.current_gen = self.next_gen
-            self.gen += 1
+        for k in self.displays.keys():
+            self.displays[k]['data'] = list[GeneDisplay]()
             
-            # Display the next gen
-            self.__generate_current_gen_disp()
-                
-            # Refresh data
-            self.next_gen = []
-            self.candidate_elites.clear()
-            self.known_elites.clear()
+        self.__generate_current_gen_disp()
+        self.__generate_pair_disp('parents', snapshot['parents'], ORANGE)
+        self.__generate_pair_disp('children', snapshot['children'], DARK_BLUE)
+        self.__generate_pair_disp('mutation', snapshot['mutated'], DARK_MAGENTA)
+        self.__generate_next_gen_disp()
+        
+        # Ends the run if target found or maximum generations reached
+        if snapshot['finished']:
+            self.target_found = snapshot['target_found']
+            self.running = False
+            self.steps_delay.stop()
+            self.__mark_dirty()
             
-            self.__send_elites()
-            self.__generate_next_gen_disp()
+        # Only the sections whose contents changed (the current generation stays within a generation)
+        for k in self.displays.keys():
+            if k != 'curr-gen' or current_changed: self.__mark_dirty(self.displays[k]['rect'])
+        self.__mark_dirty(self.__connections_rect())
+        self.__mark_dirty(self.__gen_indicator_rect())
+        
+    # Go to the next iteration (computed by the background worker, or read from the replayed run)
+    def __go_next_step(self):
+        if self.replay is not None:
+            snapshot = self.replay.step()
+            if snapshot is None:
+                # Recording of a stopped run: it ends without a final snapshot
+                self.running = False
+                self.steps_delay.stop()
+                self.__mark_dirty()
+            else: self.__show_snapshot(snapshot)
+            return
+        
+        if self.worker is None: return
+        
+        # Step mode animates every step in order, fast-forward only shows the newest generation
+        with self.profiler.phase('step', self.gen):
+            snapshot = self.worker.latest_snapshot() if self.fast_forward else self.worker.next_snapshot()
+            if snapshot is None: return
+            with self.profiler.phase('displays', snapshot['gen']): self.__show_snapshot(snapshot)
         
     # Run the genetic algorithm simulation
     def __start_simulation(self):
         if self.run_btn.is_clicked():
             if not self.running:
                 
+                # Wait for the selected dataset
+                if self.loading_dataset is not None or self.algorithm is None: return
+                
                 # Start over
                 self.__full_reset()
                 
                 # Run the algorithm
                 self.runs += 1
                 self.running = True
-                self.steps_delay.start()
-                
-                # Generate initial population (Gen 1)
-                self.current_gen = self.__generate_population(self.population_size)
-                self.__generate_current_gen_disp()
                 
-                # Check if target found immediately in first gen
-                self.__check_end_of_run()
+                # Generate initial population (Gen 1), the target may already be in it
+                simulation = Simulation(self.algorithm, self.__generate_population(self.population_size), self.population_size, self.max_gen, self.elite_carryover, self.mutation_probability, self.selection_candidate_number, self.profiler, self.__create_recorder())
+                self.__show_snapshot(simulation.snapshot())
                 
-                self.__send_elites()
-                self.__generate_next_gen_disp()
+                # The rest of the run is computed on a background worker
+                if self.running:
+                    self.worker = SimulationWorker(simulation, self.fast_forward)
+                    self.worker.start()
+                    self.steps_delay.delay = 0 if self.fast_forward else PROGRESSION_DELAY_MS
+                    self.steps_delay.start()
                 
             else:
                 
                 self.running = False
                 self.steps_delay.stop()
                 self.__full_reset()
+                
+    # Recorder for a new run in RECORDINGS_DIR (None when recording is disabled or not possible)
+    def __create_recorder(self):
+        if not RECORDINGS_DIR: return None
+        params = {
+            "population_size"       : self.population_size,
+            "max_gen"               : self.max_gen,
+            "elite_carryover"       : self.elite_carryover,
+            "mutation_probability"  : self.mutation_probability,
+            "selection_candidates"  : self.selection_candidate_number,
+            "dataset"               : self.selected_dataset,
+        }
+        try:
+            os.makedirs(RECORDINGS_DIR, exist_ok=True)
+            path = os.path.join(RECORDINGS_DIR, f"run-{time.strftime('%Y%m%d-%H%M%S')}-{self.runs}.garec")
+            return RunRecorder(path, self.genes, self.target, params, RECORDING_KEYFRAME_INTERVAL)
+        except OSError as error:
+            self.__set_status(f"Could not record the run: {error}", RED)
+            return None
+        
+    # Replays the newest recording of RECORDINGS_DIR from its first generation
+    def __start_replay(self):
+        recordings = [os.path.join(RECORDINGS_DIR, name) for name in os.listdir(RECORDINGS_DIR) if name.endswith('.garec')] if RECORDINGS_DIR and os.path.isdir(RECORDINGS_DIR) else []
+        if not recordings:
+            self.__set_status(f"No recorded runs in {RECORDINGS_DIR}", RED)
+            return
+        
+        path = max(recordings, key=os.path.getmtime)
+        try:
+            replay = RunReplay(path)
+            algorithm = GenAlgo(self.genes, list(replay.target))
+        except (OSError, ValueError, KeyError) as error:
+            self.__set_status(f"Could not replay {path}: {error}", RED)
+            return
+        
+        self.__full_reset()
+        self.__mark_dirty()
+        self.replay = replay
+        self.replay_paused = False
+        self.runs += 1
+        self.running = True
+        
+        # Show the recorded target (the displays' fitness percentages depend on it)
+        self.target = list(replay.target)
+        self.algorithm = algorithm
+        self.target_gene_interface["disp"] = GeneDisplay(self.surface, self.target, 100)
+        
+        self.__show_snapshot(replay.seek(1))
+        self.steps_delay.delay = self.replay_delay
+        self.steps_delay.start()
+        self.__set_status(f"Replaying {path} ({replay.last_gen} generations)")
+        
+    # Replay keys: space pauses, arrows step one generation (left/right) or change the speed (up/down),
+    # page up/down jump 10 generations, home/end go to the first/last generation
+    def __replay_keys(self, e:pygame.event.Event):
+        if self.replay is None: return
+        
+        if e.key in (pygame.K_UP, pygame.K_DOWN):
+            self.replay_delay = max(1, self.replay_delay // 2) if e.key == pygame.K_UP else min(2000, self.replay_delay * 2)
+            self.steps_delay.delay = self.replay_delay
+            return
+        
+        if e.key == pygame.K_SPACE:
+            self.replay_paused = not self.replay_paused
+            if self.replay_paused: self.steps_delay.stop()
+            else: self.steps_delay.start()
+            return
+        
+        seeks = {
+            pygame.K_LEFT       : self.gen - 1,
+            pygame.K_RIGHT      : self.gen + 1,
+            pygame.K_PAGEDOWN   : self.gen - 10,
+            pygame.K_PAGEUP     : self.gen + 10,
+            pygame.K_HOME       : 1,
+            pygame.K_END        : self.replay.last_gen,
+        }
+        if e.key not in seeks: return
+        
+        # Seeking resumes a finished replay (paused, so it can be stepped through)
+        self.__show_snapshot(self.replay.seek(seeks[e.key]))
+        if not self.running:
+            self.running, self.replay_paused = True, True
+            self.__mark_dirty()
+        
+    # Switches between animating every step and fast-forwarding whole generations
+    def __toggle_fast_forward(self):
+        if not self.running and self.ff_btn.is_clicked():
+            self.fast_forward = not self.fast_forward
+            self.ff_btn.change_text(f"FAST FORWARD: {'ON' if self.fast_forward else 'OFF'}")
+            
+    # Profiling keys: F3 shows/hides the overlay (timings are only taken while it is shown), F4 exports them
+    def __profile_keys(self, e:pygame.event.Event):
+        if e.key == pygame.K_F3:
+            self.profiler.enabled = not self.profiler.enabled
+            self.__mark_dirty()
+            
+        elif e.key == pygame.K_F4:
+            try:
+                rows = self.profiler.export_csv(PROFILE_CSV_PATH)
+                self.__set_status(f"Exported {rows} generations of timings to {PROFILE_CSV_PATH}")
+            except OSError as error: self.__set_status(f"Could not export the timings: {error}", RED)
+            
+        elif e.key == pygame.K_F5 and not (self.running and self.replay is None):
+            self.__start_replay()
+            
+        elif e.key == pygame.K_F6:
+            self.__scan_generation()
+        
+    # Scans the simulation's newest generation against every position of both genomes, on the loader thread
+    def __scan_generation(self):
+        if self.new_dataset is None: return
+        
+        # The worker's generation is read under its lock; without a worker (replays), the shown one
+        generation = self.worker.current_generation() if self.worker is not None else None
+        if generation is None: generation = self.gen, [''.join(individual) for _, individual in self.current_gen]
+        gen, individuals = generation
+        if not individuals: return
+        
+        genomes = {"new": self.new_dataset, "old": self.old_dataset}
+        scan = self.loader.submit(self.__write_scan, self.selected_dataset, gen, individuals, genomes)
+        scan.add_done_callback(lambda future: future.cancelled() or pygame.event.post(pygame.event.Event(SCAN_FINISHED, status=future.result())))
+        self.__set_status(f"Scanning gen {gen} against {self.selected_dataset}...")
+        
+    # Loader thread: writes the best locus of every individual in each genome to SCAN_CSV_PATH,
+    # returns the status message and its colour
+    def __write_scan(self, dataset:str, gen:int, individuals:list[str], genomes:dict):
+        try:
+            start = time.perf_counter()
+            results = {name: GenomeScanner(genome).scan_population(individuals, best=1) for name, genome in genomes.items()}
+            elapsed = (time.perf_counter() - start) * 1000
+            
+            with open(SCAN_CSV_PATH, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(['gen', 'individual', 'genome', 'mismatches', 'sequence_id', 'position'])
+                for i, individual in enumerate(individuals):
+                    for name, scans in results.items():
+                        locus = scans[i]["loci"][0] if scans[i]["loci"] else None
+                        writer.writerow([gen, individual, name] + ([locus['mismatches'], locus['sequence_id'], locus['position']] if locus else ['', '', '']))
+        except Exception as error: return f"Could not scan generation {gen}: {error}", RED
+        
+        fewest = {name: min((scan['mismatches'] for scan in scans if scan['mismatches'] is not None), default='-') for name, scans in results.items()}
+        return f"Gen {gen} scanned against {dataset} in {elapsed:.0f} ms (fewest mismatches: {', '.join(f'{name} {m}' for name, m in fewest.items())}), loci in {SCAN_CSV_PATH}", BLACK
         
     # Event handler
     def __event(self):
-        for e in pygame.event.get():
-            self.dropdown['object'].handle_event(e)
-            if e.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-                
-            if e.type == pygame.MOUSEBUTTONDOWN:
-                self.__change_dataset()
-                self.__update_parameters()
-                self.__start_simulation()
-                self.__change_target_individual()
+        for e in pygame.event.get(): self.__handle_event(e)
+        
+    def __handle_event(self, e:pygame.event.Event):
+        self.dropdown['object'].handle_event(e)
+        if e.type == DATASET_LOADED: self.__finish_dataset_load()
+        if e.type == STATUS_EXPIRED: self.__clear_status()
+        if e.type == SCAN_FINISHED: self.__set_status(*e.status)
+        if e.type == pygame.QUIT:
+            self.loader.shutdown(wait=False, cancel_futures=True)
+            pygame.quit()
+            sys.exit()
             
-    # Frame update (for object draws)
-    def __update(self):
+        if e.type == pygame.MOUSEBUTTONDOWN:
+            self.__change_dataset()
+            self.__update_parameters()
+            self.__start_simulation()
+            self.__toggle_fast_forward()
+            self.__change_target_individual()
+            
+        if e.type == pygame.KEYDOWN:
+            self.__profile_keys(e)
+            self.__replay_keys(e)
+            
+        # Clicks can change anything on screen, motion only the hovered widgets
+        if e.type == pygame.MOUSEMOTION: self.__mark_hovered(e.pos)
+        elif e.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE): self.__mark_dirty()
+            
+    # Draws the profiling overlay (mean ms of every phase over the last frames)
+    def __draw_profile_overlay(self):
+        averages = self.profiler.averages()
+        frame = averages.get('frame', 0)
+        lines = [f"frame {frame:7.2f} ms ({1000 / self.clock.get_time() if self.clock.get_time() else 0:5.1f} FPS)"]
+        lines += [f"{name:<20}{ms:9.3f} ms" for name, ms in averages.items() if name != 'frame']
+        
+        size = 14
+        self.profile_rect.height = len(lines) * (size + 4) + 10
+        pygame.draw.rect(self.surface, BLACK, self.profile_rect)
+        for i, line in enumerate(lines):
+            self.surface.blit(render_text(line, size, WHITE), (self.profile_rect.x + 8, self.profile_rect.y + 5 + i * (size + 4)))
+        
+    # Screen area of the connection lines (empty when none are drawn)
+    def __connections_rect(self):
+        if not (self.running and self.current_parent_candidates and self.displays['curr-gen']['data'] and self.displays['mutation']['data']): return pygame.Rect(0, 0, 0, 0)
+        left = min(display.rect.right for display in self.displays['curr-gen']['data'])
+        right = max(display.rect.left for display in self.displays['mutation']['data'])
+        top, bottom = self.displays['curr-gen']['rect'].top, self.displays['curr-gen']['rect'].bottom
+        return pygame.Rect(left, top, right - left, bottom - top).inflate(CONNECTION_LINE_THICKNESS * 2, CONNECTION_LINE_THICKNESS * 2)
+        
+    # Screen area of the generation indicator texts
+    def __gen_indicator_rect(self):
+        rects = [text.rect for text in self.__gen_indicator_texts()]
+        return rects[0].unionall(rects[1:]) if rects else pygame.Rect(0, 0, 0, 0)
+        
+    # Everything on screen as (area, draw) layers in drawing order; a dirty region only redraws
+    # the layers it touches
+    def __layers(self):
+        layers = []
+        for k, section in self.displays.items():
+            layers.append((section['rect'].union(section['label'].rect), lambda k=k: self.__draw_section(k)))
+            if self.running: layers += [(display.rect, display.draw) for display in section['data']]
+        
+        group = lambda rects: rects[0].unionall(rects[1:])
+        numbers = [rect for k in self.number_interfaces.keys() for rect in (self.number_interfaces[k]["interface"].rect, self.number_interfaces[k]["label"].rect)]
+        target = [self.target_gene_interface[k].rect for k in ("disp", "label", "button")]
+        dropdown:Dropdown = self.dropdown['object']
+        items = len(dropdown.items) if dropdown.expanded else 0
+        
+        layers += [
+            (self.interface, lambda: pygame.draw.rect(self.surface, INTERFACE_BG_COL, self.interface)),
+            (group(numbers), self.__draw_number_interfaces),
+            (group(target), self.__draw_target_gene_interface),
+            (self.run_btn.rect.union(self.ff_btn.rect), self.__draw_run_button),
+            (pygame.Rect(dropdown.rect.x, dropdown.rect.y, dropdown.rect.width, dropdown.rect.height * (items + 1)).union(self.dropdown['label'].rect), self.__draw_dataset_dropdown),
+            (self.__connections_rect(), self.__draw_connections),
+            (self.__gen_indicator_rect(), self.__draw_gen_indicator),
+        ]
+        if self.status is not None: layers.append((self.status.rect, self.__draw_status))
+        if self.profiler.enabled: layers.append((self.profile_rect, self.__draw_profile_overlay))
+        return layers
+        
+    # Draws the whole frame
+    def __draw_frame(self):
+        phase = lambda name: self.profiler.phase(name, self.gen)
         self.surface.fill(WHITE)
         
-        self.__draw_display_sections()
-        self.__draw_displays()
-        self.__draw_interface()
-        self.__draw_connections()
-        self.__draw_gen_indicator()
+        with phase('draw.sections'): self.__draw_display_sections()
+        with phase('draw.displays'): self.__draw_displays()
+        with phase('draw.interface'): self.__draw_interface()
+        with phase('draw.connections'): self.__draw_connections()
+        with phase('draw.gen_indicator'): self.__draw_gen_indicator()
+        self.__draw_status()
+        
+        if self.profiler.enabled: self.__draw_profile_overlay()
+        
+    # Dirty regions clipped to the window, overlapping ones merged so nothing is drawn twice
+    def __dirty_regions(self):
+        regions = []
+        for rect in self.dirty_rects:
+            rect = rect.clip(self.surf_rect)
+            if rect.width == 0 or rect.height == 0: continue
+            while (i := rect.collidelist(regions)) != -1: rect.union_ip(regions.pop(i))
+            regions.append(rect)
+        return regions
+            
+    # Frame update (for object draws)
+    def __update(self):
+        if self.render_mode == 'full':
+            self.__draw_frame()
+            if self.running: self.steps_delay.update()
+            with self.profiler.phase('draw.flip', self.gen): pygame.display.update()
+            return
         
         if self.running: self.steps_delay.update()
+        if self.profiler.enabled: self.__mark_dirty(self.profile_rect.copy())
+        regions = self.__dirty_regions()
+        self.dirty_rects.clear()
+        if not regions: return
+        
+        if regions[0] == self.surf_rect:
+            self.__draw_frame()
+            with self.profiler.phase('draw.flip', self.gen): pygame.display.update()
+            return
         
-    # Execute program
-    def run(self):
-        while True:
-            self.__event()
-            self.__update()
+        # Redraw only the layers touching each dirty region and push just those regions to the screen
+        with self.profiler.phase('draw.layers', self.gen):
+            layers = self.__layers()
+            for region in regions:
+                self.surface.set_clip(region)
+                self.surface.fill(WHITE, region)
+                for area, draw in layers:
+                    if area.colliderect(region): draw()
+            self.surface.set_clip(None)
+        
+        with self.profiler.phase('draw.flip', self.gen): pygame.display.update(regions)
+        
+    # Execute program (forever, or for `frames` frames when scripted, e.g. by the benchmark)
+    def run(self, frames:int = None):
+        while frames is None or frames > 0:
+            # Nothing is animating or waiting to be redrawn: sleep until the next event
+            if self.render_mode == 'dirty' and not self.running and not self.dirty_rects:
+                self.__handle_event(pygame.event.wait())
+                
+            with self.profiler.phase('frame', self.gen):
+                self.__event()
+                self.__update()
+            if self.startup_time is None: self.startup_time = time.perf_counter() - self.created_at
             
             self.clock.tick(self.FPS)
-            pygame.display.update()
+            if frames is not None: frames -= 1
             
 if __name__ == '__main__': main().run()
\ No newline at end of file
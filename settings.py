@@ -7,10 +7,20 @@ DEFAULT_POPULATION_SIZE = 10
 DEFAULT_MAX_GEN = 100
 DEFAULT_ELITE_CARRYOVER = 1
 DEFAULT_MUTATION_PROBABILITY = 5
+DEFAULT_FAST_FORWARD = False
 
 INTERFACE_BG_COL = (200,200,200)
 MOTIF_LENGTH = 120
 GENE_DISPLAY_TEXT_SIZE = 15
 CONNECTION_LINE_THICKNESS = 3
 PROGRESSION_DELAY_MS = 50
-DEFAULT_DATASET = 'ecoli'
\ No newline at end of file
+DEFAULT_DATASET = 'ecoli'
+RENDER_MODE = 'dirty' # 'dirty' redraws only changed regions, 'full' redraws every frame
+PROFILE_OVERLAY = False # start with the profiling overlay shown (F3 toggles it, F4 exports profile.csv)
+PROFILE_CSV_PATH = 'profile.csv'
+SCAN_CSV_PATH = 'scan.csv' # best loci of every individual of the generation scanned with F6
+STATUS_MESSAGE_MS = 5000 # how long status messages (exports, errors) stay under the interface
+DATASET_CACHE_DIR = '.dataset_cache' # parsed 2-bit copies of the datasets (None disables the cache)
+DATASET_CACHE_MAX_MB = 1024
+RECORDINGS_DIR = 'recordings' # binary logs of every run, replayed with F5 (None disables recording)
+RECORDING_KEYFRAME_INTERVAL = 10 # generations between full snapshots (seeking replays at most this many)
\ No newline at end of file
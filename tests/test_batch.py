@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from components.batch import BatchEngine, solve_targets
+from components.genetic_algorithm import PopulationEngine
+
+GENES = 'ACGT'
+
+def random_targets(rng:np.random.Generator, count:int, length:int):
+    return [''.join(rng.choice(list(GENES), length)) for _ in range(count)]
+
+@pytest.mark.parametrize("size, elites, length", [(10, 1, 40), (11, 2, 150), (7, 0, 128)])
+def test_single_target_batch_matches_the_population_engine(size, elites, length):
+    target = random_targets(np.random.default_rng(size), 1, length)[0]
+    single = PopulationEngine(GENES, target, np.random.default_rng(size))
+    batch = BatchEngine(GENES, length, np.random.default_rng(size))
+    batch.set_targets(single.target[None])
+
+    population = single.random_population(size)
+    batch.random_populations(1, size)
+    population, fitness = single.sort_population(population, single.fitness(population))
+    prefix = single.prefix_matches(population)
+    populations, batch_fitness, batch_prefix = population[None], fitness[None], prefix[None]
+
+    for _ in range(20):
+        population, fitness, prefix = single.next_generation(population, fitness, elites, 10, 3, prefix=prefix)
+        populations, batch_fitness, batch_prefix = batch.next_generation(populations, batch_fitness, elites, 10, 3, prefix=batch_prefix)
+        assert np.array_equal(populations[0], population)
+        assert np.array_equal(batch_fitness[0], fitness)
+        assert np.array_equal(batch_prefix[0], prefix)
+
+def test_carried_batch_fitness_matches_rescoring():
+    rng = np.random.default_rng(3)
+    engine = BatchEngine(GENES, 130, rng)
+    engine.set_targets(engine.random_populations(1, 6)[0])
+    populations = engine.random_populations(6, 9)
+    populations, fitness = engine.sort_population(populations, engine.fitness(populations))
+    prefix = engine.prefix_matches(populations)
+
+    for _ in range(30):
+        populations, fitness, prefix = engine.next_generation(populations, fitness, 2, 10, 3, prefix=prefix)
+        assert np.array_equal(fitness, engine.fitness(populations))
+        assert np.array_equal(prefix, engine.prefix_matches(populations))
+        assert (np.diff(fitness, axis=1) >= 0).all()
+
+def test_elites_are_distinct_rows_padded_with_repeats():
+    engine = BatchEngine(GENES, 5)
+    populations = np.array([[[0] * 5, [0] * 5, [1] * 5, [1] * 5, [2] * 5], [[3] * 5] * 5], dtype=np.uint8)
+    assert engine.elite_indexes(populations, 3).tolist() == [[0, 2, 4], [0, 1, 2]]
+
+    # Rows that differ in a single gene are distinct
+    populations = np.zeros((1, 3, 5), dtype=np.uint8)
+    populations[0, 1, 4] = 1
+    assert engine.elite_indexes(populations, 2).tolist() == [[0, 1]]
+
+def test_every_target_is_reported_and_non_acgt_ones_are_skipped():
+    targets = random_targets(np.random.default_rng(1), 12, 20)
+    targets[3] = 'N' * 20
+    targets[7] = targets[7][:10] + 'N' + targets[7][11:]
+
+    results = {r["index"]: r for r in solve_targets(GENES, targets, population_size=20, max_gen=2000, mutation_probability=5, batch_size=4, seed=0)}
+    assert sorted(results) == list(range(12))
+    assert [i for i, r in results.items() if r["skipped"]] == [3, 7]
+    assert results[3]["best_fitness"] is None and not results[3]["solved"]
+    assert all(r["solved"] and r["target"] == targets[i] for i, r in results.items() if not r["skipped"])
+
+def test_targets_must_have_the_same_length():
+    with pytest.raises(ValueError): list(solve_targets(GENES, ['ACGT', 'ACG']))
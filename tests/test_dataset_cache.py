@@ -0,0 +1,88 @@
+import gzip, os, random
+import pytest
+
+from components.dataset_cache import build_cache, cache_path, load_dataset, CachedDataset, MAX_EXCEPTION_RUNS
+from components.dataset_reader import iter_records, WindowIndex
+
+# Records with N runs, IUPAC codes, lowercase and lengths around the 4 bases per byte
+def write_fasta(path, seed:int = 0, compress:bool = False):
+    rng = random.Random(seed)
+    records = []
+    for i, length in enumerate((0, 1, 3, 4, 5, 333, 1000)):
+        sequence = ''.join(rng.choice('ACGT') for _ in range(length))
+        if length > 100: sequence = sequence[:40] + 'N' * 30 + sequence[70:90].lower() + 'RY' + sequence[92:]
+        records.append(f">seq{i} description\n" + '\n'.join(sequence[j:j + 60] for j in range(0, length, 60)) + '\n')
+    text = ''.join(records)
+    if compress:
+        with gzip.open(path, 'wt') as file: file.write(text)
+    else: path.write_text(text)
+    return str(path)
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_cache_round_trip(tmp_path, compress):
+    source = write_fasta(tmp_path / "data.fna", compress=compress)
+    path = str(tmp_path / "data.2bit")
+    assert build_cache(source, path)
+
+    records = dict(iter_records(source))
+    dataset = CachedDataset(path)
+    try:
+        assert list(dataset) == list(records)
+        rng = random.Random(1)
+        for key, sequence in records.items():
+            assert dataset.length(key) == len(sequence) and dataset[key] == sequence
+            for _ in range(50):
+                start = rng.randrange(-2, len(sequence) + 2)
+                end = rng.randrange(max(start, 0), len(sequence) + 4)
+                assert dataset.fetch(key, start, end) == sequence[max(start, 0):end]
+    finally: dataset.close()
+
+def test_too_many_exception_runs_are_not_cached(tmp_path):
+    source = tmp_path / "masked.fna"
+    source.write_text(">masked\n" + "Ac" * (MAX_EXCEPTION_RUNS + 1) + "\n")
+    path = str(tmp_path / "masked.2bit")
+    assert not build_cache(str(source), path)
+    assert not os.path.exists(path) and not os.path.exists(path + ".tmp")
+
+def test_load_dataset_hits_and_rebuilds(tmp_path):
+    source = write_fasta(tmp_path / "data.fna")
+    cache_dir = str(tmp_path / "cache")
+
+    dataset = load_dataset(source, cache_dir)
+    assert isinstance(dataset, CachedDataset)
+    dataset.close()
+    path = cache_path(source, cache_dir)
+    built = os.stat(path).st_mtime_ns
+
+    # A hit maps the same entry without rebuilding it
+    dataset = load_dataset(source, cache_dir)
+    assert dataset.path == path and os.path.getsize(path) > 0
+    dataset.close()
+
+    # An edited source gets a new entry, and the stale one is deleted
+    write_fasta(tmp_path / "data.fna", seed=1)
+    os.utime(source, ns=(built + 10**9, built + 10**9))
+    dataset = load_dataset(source, cache_dir)
+    try:
+        assert dataset.path != path and os.listdir(cache_dir) == [os.path.basename(dataset.path)]
+        assert dict(dataset) == dict(iter_records(source))
+    finally: dataset.close()
+
+    # Without a cache dir the source is read directly
+    dataset = load_dataset(source)
+    try: assert not isinstance(dataset, CachedDataset) and dict(dataset) == dict(iter_records(source))
+    finally: dataset.close()
+
+# The window index only needs the record lengths of the header
+def test_window_index_reads_no_bases(tmp_path, monkeypatch):
+    source = write_fasta(tmp_path / "data.fna")
+    path = str(tmp_path / "data.2bit")
+    build_cache(source, path)
+    dataset = CachedDataset(path)
+    try:
+        monkeypatch.setattr(CachedDataset, "fetch", lambda *args: pytest.fail("window index read a base"))
+        windows = WindowIndex(dataset, 21)
+        assert len(windows) == sum(len(sequence) // 21 for _, sequence in iter_records(source))
+        monkeypatch.undo()
+        assert windows[-1] == dict(iter_records(source))["seq6 description"][966:987] # 47 windows of 21 in 1000 bases
+    finally: dataset.close()
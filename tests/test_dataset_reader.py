@@ -0,0 +1,46 @@
+import gzip, random
+import pytest
+
+from components.dataset_cache import build_cache, CachedDataset
+from components.dataset_reader import get_random_code, get_random_motif, iter_blocks, iter_records
+
+FASTA = ">a\nACGTNNNNAC\nGTacgt\n>b\n>a\nNNNNNNNN\nNNRYAC\n"
+
+@pytest.fixture(params=["plain", "gzip"])
+def fasta(tmp_path, request):
+    path = tmp_path / "data.fna"
+    if request.param == "gzip":
+        with gzip.open(path, 'wt') as file: file.write(FASTA)
+    else: path.write_text(FASTA)
+    return str(path)
+
+def test_records_and_blocks(fasta):
+    records = list(iter_records(fasta))
+    assert records == [("a", "ACGTNNNNACGTacgt"), ("b", ""), ("a (2)", "NNNNNNNNNNRYAC")]
+
+    for size in (1, 3, 4, 100):
+        blocks = list(iter_blocks(fasta, size))
+        assert all(len(block) <= size for _, block in blocks)
+        assert [(name, ''.join(block for key, block in blocks if key == name)) for name, _ in records] == records
+
+def test_random_code_and_motif_come_from_the_records(tmp_path):
+    fasta = tmp_path / "data.fna"
+    fasta.write_text(FASTA.replace(">b\n", ""))
+    records = dict(iter_records(fasta))
+    rng = random.Random(4)
+    for _ in range(20):
+        assert get_random_code(fasta, rng) in records.values()
+        motif = get_random_motif(fasta, 4, rng)
+        assert 0 < len(motif) <= 4 and any(motif in sequence for sequence in records.values())
+
+# Small blocks split the exception runs; the cache must join them back
+@pytest.mark.parametrize("block", [4, 8, 1 << 20])
+def test_cache_built_in_blocks(fasta, tmp_path, block):
+    path = str(tmp_path / "data.2bit")
+    assert build_cache(fasta, path, block)
+    dataset = CachedDataset(path)
+    try: assert dict(dataset) == dict(iter_records(fasta))
+    finally: dataset.close()
+
+def test_cache_block_must_hold_whole_bytes(fasta, tmp_path):
+    with pytest.raises(ValueError): build_cache(fasta, str(tmp_path / "data.2bit"), 6)
@@ -0,0 +1,62 @@
+import random
+import pytest
+
+from components.dataset_reader import FastaIndex, iter_records, read_dataset
+
+CASES = {
+    "empty"             : "",
+    "no final newline"  : ">a\nACGT\nAC",
+    "crlf"              : ">a\r\nACGTA\r\nCG\r\n>b\r\nTT\r\n",
+    "header only"       : ">a\n>b\nACG\n>c",
+    "repeated headers"  : ">a\nAC\n>a\nGT\n>a\nTT\n",
+    "blank lines"       : ">a\nACG\nAC\n\n\n>b\nGGG\n",
+    "no header"         : "ACGTACGT\nACGT\n",
+    "one base lines"    : ">a\nA\nC\nG\n",
+    "lowercase and N"   : ">chr1 some description\nacgtNN\nNNRYac\nA\n",
+}
+
+# Every slice (including out of range bounds) matches the streamed record
+@pytest.mark.parametrize("text", CASES.values(), ids=CASES.keys())
+def test_fetch_matches_the_records(tmp_path, text):
+    path = tmp_path / "data.fna"
+    path.write_bytes(text.encode('ascii'))
+    records = dict(iter_records(path))
+
+    dataset = FastaIndex(str(path))
+    try:
+        assert list(dataset) == list(records)
+        for key, sequence in records.items():
+            assert dataset.length(key) == len(sequence)
+            for start in range(-1, len(sequence) + 2):
+                for end in range(start, len(sequence) + 2):
+                    assert dataset.fetch(key, start, end) == sequence[max(start, 0):max(end, 0)]
+    finally: dataset.close()
+
+@pytest.mark.parametrize("text", [">a\nACG\nACGT\n", ">a\nACGT\nAC\nACGT\n", ">a\nACGT\n\nAC\n", ">a\nACGT\r\nACGT\nAC\n"])
+def test_uneven_lines_are_rejected(tmp_path, text):
+    path = tmp_path / "data.fna"
+    path.write_bytes(text.encode('ascii'))
+    with pytest.raises(ValueError): FastaIndex(str(path))
+
+    # read_dataset falls back to a plain read
+    assert read_dataset(str(path)) == dict(iter_records(path))
+
+# The line layout is checked in chunks; lines crossing a chunk boundary must not change it
+@pytest.mark.parametrize("chunk", [1, 3, 7, 64])
+def test_layout_across_chunks(tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(FastaIndex._FastaIndex__line_layout, "__defaults__", (chunk,))
+    rng = random.Random(chunk)
+    sequences = [''.join(rng.choice('ACGT') for _ in range(length)) for length in (0, 59, 60, 61, 500)]
+    text = ''.join(f">r{i}\r\n" + ''.join(sequence[j:j + 60] + '\r\n' for j in range(0, len(sequence), 60)) for i, sequence in enumerate(sequences))
+    path = tmp_path / "data.fna"
+    path.write_bytes(text.encode('ascii'))
+
+    dataset = FastaIndex(str(path))
+    try:
+        assert [dataset[f"r{i}"] for i in range(len(sequences))] == sequences
+        assert dataset.fetch("r4", 55, 185) == sequences[4][55:185]
+    finally: dataset.close()
+
+    # A longer line in the middle of a record
+    path.write_bytes(text.replace(sequences[4][60:120], sequences[4][60:120] + 'A').encode('ascii'))
+    with pytest.raises(ValueError): FastaIndex(str(path))
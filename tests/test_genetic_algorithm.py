@@ -0,0 +1,94 @@
+import random
+import numpy as np
+import pytest
+
+from components.genetic_algorithm import GenAlgo, PopulationEngine
+
+GENES = 'ACGT'
+
+def random_target(rng:random.Random, length:int):
+    return ''.join(rng.choice(GENES) for _ in range(length))
+
+@pytest.mark.parametrize("size, elites, length", [(10, 1, 40), (11, 2, 150), (7, 0, 128), (6, 1, 1)])
+def test_carried_prefix_matches_full_rescoring(size, elites, length):
+    engine = PopulationEngine(GENES, random_target(random.Random(size), length), np.random.default_rng(size))
+    population = engine.random_population(size)
+    population, fitness = engine.sort_population(population, engine.fitness(population))
+    prefix = engine.prefix_matches(population)
+
+    for _ in range(30):
+        population, fitness, prefix = engine.next_generation(population, fitness, elites, 10, 3, prefix=prefix)
+        assert np.array_equal(fitness, engine.fitness(population))
+        assert np.array_equal(prefix, engine.prefix_matches(population))
+        assert np.all(np.diff(fitness) >= 0)
+
+def test_carried_prefix_does_not_change_the_run():
+    target = random_target(random.Random(1), 100)
+    carried = PopulationEngine(GENES, target, np.random.default_rng(5))
+    rescored = PopulationEngine(GENES, target, np.random.default_rng(5))
+
+    population = carried.random_population(12)
+    population, fitness = carried.sort_population(population, carried.fitness(population))
+    rescored.rng.bit_generator.state = carried.rng.bit_generator.state
+    prefix = carried.prefix_matches(population)
+    other, other_fitness = population, fitness
+
+    for _ in range(20):
+        population, fitness, prefix = carried.next_generation(population, fitness, 1, 8, 4, prefix=prefix)
+        other, other_fitness = rescored.next_generation(other, other_fitness, 1, 8, 4)
+        assert np.array_equal(population, other) and np.array_equal(fitness, other_fitness)
+
+def test_gen_algo_children_scores_match_full_rescoring():
+    rng = random.Random(3)
+    target = list(random_target(rng, 140))
+    algorithm = GenAlgo(GENES, target, np.random.default_rng(3))
+    rescore = lambda individual: sum(a != b for a, b in zip(individual, target))
+
+    population = [list(random_target(rng, 140)) for _ in range(6)]
+    fitness = [algorithm.fitness(individual) for individual in population]
+    assert fitness == [rescore(individual) for individual in population]
+
+    for _ in range(200):
+        i, j = rng.randrange(len(population)), rng.randrange(len(population))
+        point = rng.randint(1, 139)
+        fit1, fit2 = algorithm.crossover_fitness(population[i], population[j], point)
+        child1, child2 = algorithm.crossover(population[i], population[j], point), algorithm.crossover(population[j], population[i], point)
+        assert (fit1, fit2) == (rescore(child1), rescore(child2))
+
+        mutant, fit = algorithm.mutate(child1, 5, fit1)
+        assert fit == rescore(mutant)
+        for individual in (child2, mutant):
+            assert np.array_equal(algorithm.match_prefix(individual), algorithm.engine.prefix_matches(algorithm.engine.encode(individual)))
+
+        population[rng.randrange(len(population))] = mutant
+        fitness = [rescore(individual) for individual in population]
+        algorithm.retain(population)
+
+def test_distinct_initial_population():
+    engine = PopulationEngine(GENES, 'ACG', np.random.default_rng(0))
+    population = engine.random_population(64, distinct=True)
+    assert len(np.unique(population, axis=0)) == 64
+
+    # Only 64 individuals of length 3 exist: all of them, then repeats
+    population = engine.random_population(70, distinct=True)
+    assert len(population) == 70 and len(np.unique(population[:64], axis=0)) == 64
+
+# The notebook's loop never calls `retain`: the cache must still stay bounded (and right)
+def test_gen_algo_cache_prunes_itself():
+    rng = random.Random(4)
+    target = list(random_target(rng, 90))
+    algorithm = GenAlgo(GENES, target, np.random.default_rng(4), cache_size=50)
+    rescore = lambda individual: sum(a != b for a, b in zip(individual, target))
+
+    population = [list(random_target(rng, 90)) for _ in range(20)]
+    for _ in range(100):
+        next_gen = []
+        while len(next_gen) < len(population):
+            mom, dad = rng.sample(population, 2)
+            point = rng.randint(1, 89)
+            for child in (algorithm.crossover(mom, dad, point), algorithm.crossover(dad, mom, point)):
+                mutant = algorithm.mutate(child, 5)
+                assert algorithm.fitness(mutant) == rescore(mutant)
+                next_gen.append(mutant)
+        population = next_gen
+        assert algorithm.cached_prefixes() <= 2 * algorithm.cache_size
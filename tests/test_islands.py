@@ -0,0 +1,40 @@
+import multiprocessing
+import numpy as np
+import pytest
+
+import components.islands as islands
+from components.islands import run_island_model
+
+TARGET = ''.join('ACTG'[i] for i in np.random.default_rng(8).integers(0, 4, 200))
+PARAMS = {"islands": 3, "population_size": 12, "max_gen": 60, "mutation_probability": 1, "migration_interval": 5, "migrants": 2, "seed": 11}
+
+# Timings are the only fields that differ between runs
+def without_times(result:dict):
+    return {**{k: v for k, v in result.items() if k != "wall_time"}, "island_reports": [{k: v for k, v in r.items() if k != "compute_time"} for r in result["island_reports"]]}
+
+@pytest.mark.parametrize("topology", ['ring', 'full'])
+def test_seeded_island_run(topology):
+    result = run_island_model('ACTG', TARGET, topology=topology, **PARAMS)
+    assert not multiprocessing.active_children()
+
+    # Elites and immigrants only ever improve the best individual
+    best = result["best_fitness"]
+    assert len(best) == 60 and best[-1] < best[0] and all(b <= a for a, b in zip(best, best[1:]))
+
+    # Migrants went through the pipes: every island received 2 per migration after the first
+    assert [r["immigrants"] for r in result["island_reports"]] == [(2 if topology == 'ring' else 4) * 11] * 3
+
+    # Reproducible, and the same without processes
+    assert without_times(run_island_model('ACTG', TARGET, topology=topology, **PARAMS)) == without_times(result)
+    assert without_times(run_island_model('ACTG', TARGET, topology=topology, processes=False, **PARAMS)) == without_times(result)
+
+def test_island_processes_exit_when_the_run_fails(monkeypatch):
+    results = []
+    def result(self):
+        if results: raise RuntimeError("lost an island")
+        results.append(self.conn.recv())
+        return results[-1]
+    monkeypatch.setattr(islands._ProcessIsland, "result", result)
+
+    with pytest.raises(RuntimeError): run_island_model('ACTG', TARGET, **PARAMS)
+    assert not multiprocessing.active_children()
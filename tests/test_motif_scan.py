@@ -0,0 +1,67 @@
+import json, random
+import pytest
+
+import headless
+from components.motif_scan import GenomeScanner
+
+# Every (mismatches, sequence id, position) of a motif, by direct comparison
+def brute_force(genome:dict, motif:str):
+    loci = []
+    for order, (key, sequence) in enumerate(genome.items()):
+        for position in range(len(sequence) - len(motif) + 1):
+            window = sequence[position:position + len(motif)].upper()
+            loci.append((sum(a != b or a not in 'ACGT' for a, b in zip(window, motif)), order, position, key))
+    return [{"sequence_id": key, "position": position, "mismatches": mismatches} for mismatches, _, position, key in sorted(loci)]
+
+def random_genome(rng:random.Random):
+    genome = {}
+    for i, length in enumerate((700, 5, 130, 1)):
+        sequence = [rng.choice('ACGT') for _ in range(length)]
+        if length > 100:
+            sequence[50:60] = 'N' * 10
+            sequence[80:90] = ''.join(sequence[80:90]).lower()
+        genome[f"chr{i}"] = ''.join(sequence)
+    return genome
+
+# Chunks smaller than the genome and motifs across the 64-base words, planted or not
+@pytest.mark.parametrize("chunk_size", [64, 100, 1 << 18])
+def test_scan_matches_brute_force(chunk_size):
+    rng = random.Random(chunk_size)
+    genome = random_genome(rng)
+    motifs = [''.join(rng.choice('ACGT') for _ in range(length)) for length in (1, 7, 63, 64, 65, 130)]
+    motifs.append(genome["chr0"][300:400])
+    motifs.append(genome["chr2"][75:95].upper())
+
+    scanner = GenomeScanner(genome, chunk_size)
+    for best in (1, 5):
+        for motif, scan in zip(motifs, scanner.scan_population(motifs, best)):
+            expected = brute_force(genome, motif)[:best]
+            assert scan == {"mismatches": expected[0]["mismatches"], "loci": expected}
+
+def test_scan_of_a_motif_longer_than_the_genome():
+    assert GenomeScanner({"short": "ACGT"}).scan("ACGTA") == {"mismatches": None, "loci": []}
+
+def test_scan_keeps_at_least_one_locus():
+    with pytest.raises(ValueError): GenomeScanner({"chr": "ACGTACGT"}).scan("ACGTA", best=0)
+    with pytest.raises(SystemExit): headless.parse_args(["--scan", "--scan-best", "0"])
+
+def test_headless_scans_all_windows(tmp_path):
+    rng = random.Random(3)
+    for name in ("old", "new"):
+        (tmp_path / "org").mkdir(exist_ok=True)
+        sequence = ''.join(rng.choice('ACGT') for _ in range(200)) + 'N' * 20
+        (tmp_path / "org" / f"{name}.fna").write_text(f">{name}\n{sequence}\n")
+
+    output = tmp_path / "out.jsonl"
+    headless.main(["--data-dir", str(tmp_path), "--organism", "org", "--cache-dir", "", "--motif-length", "20", "--population", "12",
+                   "--max-gen", "30", "--all-windows", "--batch-size", "4", "--scan", "--scan-best", "2", "--seed", "1", "--output", str(output)])
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(record["window"] for record in records) == list(range(11))
+    genomes = {"new": {"new": (tmp_path / "org" / "new.fna").read_text().split()[1]}, "old": {"old": (tmp_path / "org" / "old.fna").read_text().split()[1]}}
+    for record in records:
+        if record["skipped"]:
+            assert record["scan"] is None
+            continue
+        for name, genome in genomes.items():
+            assert record["scan"][name]["loci"] == brute_force(genome, record["best_individual"])[:2]
@@ -0,0 +1,75 @@
+import random
+import numpy as np
+import pytest
+
+from components.packed_genome import PackedGenome
+from components.population import Population
+
+GENES = 'ACTG'
+LENGTHS = [0, 1, 2, 3, 4, 5, 7, 63, 64, 65, 131]
+
+def random_individual(rng:random.Random, length:int):
+    return [rng.choice(GENES) for _ in range(length)]
+
+@pytest.mark.parametrize("length", LENGTHS)
+def test_round_trip(length):
+    individual = random_individual(random.Random(length), length)
+    codes = np.array([GENES.index(gene) for gene in individual], dtype=np.uint8)
+
+    for genome in (PackedGenome.from_list(individual), PackedGenome.from_str(''.join(individual)), PackedGenome.from_codes(codes)):
+        assert len(genome) == length
+        assert genome.to_list() == list(genome) == individual
+        assert str(genome) == ''.join(individual)
+        assert np.array_equal(genome.to_codes(), codes)
+        if length: assert genome[-1] == individual[-1] and genome[length // 2] == individual[length // 2]
+
+def test_equality_and_hash_follow_the_unpacked_individual():
+    rng = random.Random(1)
+    individual = random_individual(rng, 37)
+    genome = PackedGenome.from_list(individual)
+
+    # Packs of equal individuals are equal and hash alike, whichever form they came from
+    assert genome == PackedGenome.from_str(''.join(individual)) == PackedGenome.from_list(list(individual))
+    assert hash(genome) == hash(PackedGenome.from_str(''.join(individual)))
+    assert len({genome, PackedGenome.from_list(list(individual))}) == 1
+
+    # Any changed gene makes a different genome
+    for i in range(37):
+        changed = list(individual)
+        changed[i] = GENES[(GENES.index(changed[i]) + 1) % 4]
+        assert PackedGenome.from_list(changed) != genome
+
+    # Trailing first genes (all zero bits) still count through the length
+    assert PackedGenome.from_str('C') != PackedGenome.from_str('CA') != PackedGenome.from_str('CAA')
+    assert len({PackedGenome.from_str('C'), PackedGenome.from_str('CA'), PackedGenome.from_str('CAA')}) == 3
+
+    # A genome is never equal to its unpacked forms
+    assert genome != individual and genome != ''.join(individual)
+
+def test_population_dedup_matches_unpacked_individuals():
+    rng = random.Random(2)
+    individuals = [random_individual(rng, 9) for _ in range(30)]
+    population = Population(GENES)
+    for individual in individuals + [list(individual) for individual in individuals[:10]]:
+        if individual not in population: population.push(0, individual)
+    assert len(population) == len({''.join(individual) for individual in individuals})
+    assert all(''.join(individual) in population for individual in individuals)
+
+@pytest.mark.parametrize("length", [1, 5, 63, 64, 65])
+def test_operations_match_the_lists(length):
+    rng = random.Random(length)
+    for _ in range(20):
+        first, second = random_individual(rng, length), random_individual(rng, length)
+        packed1, packed2 = PackedGenome.from_list(first), PackedGenome.from_list(second)
+        assert packed1.mismatches(packed2) == sum(a != b for a, b in zip(first, second))
+
+        point = rng.randint(0, length)
+        assert packed1.crossover(packed2, point).to_list() == first[:point] + second[point:]
+
+        index, code = rng.randrange(length), rng.randrange(4)
+        assert packed1.replace(index, code).to_list() == first[:index] + [GENES[code]] + first[index + 1:]
+
+def test_invalid_input():
+    with pytest.raises(ValueError): PackedGenome.from_str('ACGN')
+    with pytest.raises(ValueError): PackedGenome(0, 1, 'ACG')
+    with pytest.raises(IndexError): PackedGenome.from_str('ACG')[3]
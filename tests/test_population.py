@@ -0,0 +1,26 @@
+import random
+
+from components.dataset_reader import WindowIndex
+from components.population import Population, sample_initial_population
+
+def test_items_are_in_fitness_order():
+    rng = random.Random(4)
+    pairs = [(rng.randrange(6), ''.join(rng.choice('ACGT') for _ in range(5))) for _ in range(40)]
+    population = Population('ACGT', pairs)
+
+    assert population.items() == sorted(pairs, key=lambda pair: pair[0])
+    assert list(population) == population.items()
+    assert population[:3] == population.items()[:3]
+    assert population[0] == population.best
+
+def test_elites_skip_duplicates():
+    population = Population('ACGT', [(2, 'AAC'), (1, 'AAA'), (1, 'AAA'), (3, 'CCC')])
+    assert population.elites(2) == [(1, 'AAA'), (2, 'AAC')]
+
+def test_initial_population_is_distinct_and_fills_from_every_source():
+    windows = WindowIndex({"a": "ACGTACGTNNACGTACGT", "b": "ACGTACGT"}, 4)
+    individuals, sources = sample_initial_population(windows, 40, 'ACGT', random.Random(2))
+
+    assert len(individuals) == len(set(individuals)) == 40
+    assert all(len(individual) == 4 and set(individual) <= set('ACGT') for individual in individuals)
+    assert sources["window"] == 2 and sum(sources.values()) == 40
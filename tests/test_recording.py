@@ -0,0 +1,78 @@
+import random
+import numpy as np
+import pytest
+
+from components.genetic_algorithm import GenAlgo
+from components.population import Population
+from components.recording import RunRecorder, RunReplay
+from components.worker import Simulation
+
+GENES = 'ACTG'
+
+# Records a run and returns every snapshot it produced
+def record_run(path, seed:int, size:int = 10, length:int = 120, max_gen:int = 100, elites:int = 1, mutation:int = 5, fast_forward:bool = False):
+    rng = random.Random(seed)
+    target = [rng.choice(GENES) for _ in range(length)]
+    algorithm = GenAlgo(GENES, target, np.random.default_rng(seed))
+
+    population = Population(GENES)
+    for _ in range(size):
+        individual = [rng.choice(GENES) for _ in range(length)]
+        population.push(algorithm.fitness(individual), individual)
+
+    params = {"population_size": size, "max_gen": max_gen, "elite_carryover": elites, "mutation_probability": mutation, "selection_candidates": size // 3}
+    recorder = RunRecorder(str(path), GENES, target, params, keyframe_interval=7)
+    simulation = Simulation(algorithm, population, size, max_gen, elites, mutation, size // 3, recorder=recorder)
+
+    snapshots = [simulation.snapshot()]
+    if fast_forward: snapshots.append(simulation.fast_forward(lambda make_snapshot: snapshots.append(make_snapshot())))
+    else:
+        while not simulation.finished: snapshots.append(simulation.step())
+    return snapshots
+
+@pytest.mark.parametrize("seed, options", [(1, {}), (2, {"size": 11, "elites": 2}), (3, {"length": 20, "mutation": 20, "size": 30, "max_gen": 400}), (4, {"length": 8, "size": 12, "max_gen": 300, "mutation": 10})])
+def test_replay_reproduces_every_snapshot(tmp_path, seed, options):
+    path = tmp_path / "run.garec"
+    snapshots = record_run(path, seed, **options)
+
+    replay = RunReplay(str(path))
+    replayed = [replay.seek(1)]
+    while (snapshot := replay.step()) is not None: replayed.append(snapshot)
+    assert replayed == snapshots
+    assert replay.target_found == snapshots[-1]["target_found"]
+
+    # Seeking lands on the first snapshot of every generation
+    starts = {}
+    for snapshot in snapshots:
+        if not snapshot["parents"] and not snapshot["finished"]: starts.setdefault(snapshot["gen"], snapshot)
+    for gen in random.Random(seed).sample(sorted(starts), min(10, len(starts))):
+        assert replay.seek(gen) == starts[gen]
+
+def test_fast_forward_replay_ends_on_the_last_generation(tmp_path):
+    path = tmp_path / "run.garec"
+    snapshots = record_run(path, 5, size=30, length=20, mutation=10, max_gen=300, fast_forward=True)
+
+    replay = RunReplay(str(path))
+    assert replay.last_gen == snapshots[-1]["gen"]
+    assert replay.seek(replay.last_gen)["current_gen"] == snapshots[-1]["current_gen"]
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "run.garec"
+    path.write_bytes(b'not a recording at all')
+    with pytest.raises(ValueError): RunReplay(str(path))
+
+def test_truncated_recording_replays_up_to_its_last_whole_record(tmp_path):
+    path = tmp_path / "run.garec"
+    snapshots = record_run(path, 1)
+    data = path.read_bytes()
+
+    cut = tmp_path / "cut.garec"
+    cut.write_bytes(data[:len(data) * 2 // 3])
+    replay = RunReplay(str(cut))
+    replayed = [replay.seek(1)]
+    while (snapshot := replay.step()) is not None: replayed.append(snapshot)
+    assert 1 < len(replayed) < len(snapshots)
+    assert replayed == snapshots[:len(replayed)]
+
+    cut.write_bytes(data[:6])
+    with pytest.raises(ValueError): RunReplay(str(cut))
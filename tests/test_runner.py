@@ -0,0 +1,65 @@
+import json, random
+import numpy as np
+import pytest
+
+import components.runner as runner
+import headless
+from components.checkpoint import load_checkpoint
+from components.runner import run_genetic_algorithm
+from components.dataset_reader import WindowIndex
+from headless import parse_args
+
+TARGET = ''.join('ACTG'[i] for i in np.random.default_rng(5).integers(0, 4, 300))
+PARAMS = {"population_size": 20, "max_gen": 5000, "mutation_probability": 0.5, "seed": 7}
+
+class Crash(Exception): pass
+
+def test_resumed_run_matches_the_uninterrupted_one(tmp_path, monkeypatch):
+    full = run_genetic_algorithm('ACTG', TARGET, **PARAMS)
+    assert full["generations"] is not None and full["generations"] > 300
+    path = str(tmp_path / "run.ckpt")
+
+    # Crash while breeding generation 334; the runner still saves the last whole generation
+    next_generation = runner.PopulationEngine.next_generation
+    calls = []
+    def crashing(self, *args, **kwargs):
+        calls.append(None)
+        if len(calls) == 333: raise Crash
+        return next_generation(self, *args, **kwargs)
+    monkeypatch.setattr(runner.PopulationEngine, 'next_generation', crashing)
+    with pytest.raises(Crash): run_genetic_algorithm('ACTG', TARGET, checkpoint=path, checkpoint_every=100, **PARAMS)
+    monkeypatch.setattr(runner.PopulationEngine, 'next_generation', next_generation)
+
+    assert load_checkpoint(path)["gen"] == 333
+    resumed = run_genetic_algorithm('ACTG', TARGET, checkpoint=path, checkpoint_every=100, resume=True, **PARAMS)
+    assert resumed["generations"] == full["generations"]
+    assert resumed["best_fitness"] == full["best_fitness"]
+    assert resumed["best_individual"] == full["best_individual"]
+
+def test_resume_rejects_other_parameters(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    run_genetic_algorithm('ACTG', TARGET, checkpoint=path, **{**PARAMS, "max_gen": 50})
+    with pytest.raises(ValueError): run_genetic_algorithm('ACTG', TARGET, checkpoint=path, resume=True, **{**PARAMS, "max_gen": 50, "population_size": 21})
+
+@pytest.mark.parametrize("argv", [["--resume"], ["--checkpoint-dir", "ckpt", "--islands", "2"], ["--checkpoint-dir", "ckpt", "--all-windows"]])
+def test_headless_rejects_checkpoints_it_would_ignore(argv):
+    with pytest.raises(SystemExit): parse_args(argv)
+
+# Windows with N runs must never become targets (GenAlgo rejects them)
+def test_headless_targets_skip_windows_with_n(tmp_path):
+    rng = random.Random(2)
+    (tmp_path / "org").mkdir()
+    for name in ("old", "new"):
+        sequence = ''.join(rng.choice('ACGT') for _ in range(40)) + 'N' * 200 + ''.join(rng.choice('ACGT') for _ in range(40))
+        (tmp_path / "org" / f"{name}.fna").write_text(f">{name}\n{sequence}\n")
+
+    output = tmp_path / "out.jsonl"
+    for seed in range(6):
+        headless.main(["--data-dir", str(tmp_path), "--organism", "org", "--cache-dir", "", "--motif-length", "20", "--population", "4",
+                       "--max-gen", "5", "--runs", "3", "--seed", str(seed), "--output", str(output)])
+        assert all(set(json.loads(line)["target"]) <= set('ACGT') for line in output.read_text().splitlines())
+
+def test_random_window_among_gene_windows_only():
+    windows = WindowIndex({"a": "NNNNACGTNNNN", "b": "NNNN"}, 4)
+    assert {windows.random_window(random.Random(seed), 'ACGT') for seed in range(20)} == {"ACGT"}
+    with pytest.raises(ValueError): WindowIndex({"b": "NNNN"}, 4).random_window(genes='ACGT')
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from components import selection
+from components.selection import sample_without_replacement, tournament_selection
+
+@pytest.mark.parametrize("n, k, rows", [(50, 20, 300), (1000, 300, 70), (10, 10, 5), (400, 3, 100)])
+def test_samples_are_distinct_and_in_range(n, k, rows):
+    samples = sample_without_replacement(np.random.default_rng(n), n, k, rows)
+    assert samples.shape == (rows, min(k, n))
+    assert ((samples >= 0) & (samples < n)).all()
+    assert all(len(set(row)) == len(row) for row in samples.tolist())
+
+def test_dense_blocks_draw_the_same_samples(monkeypatch):
+    whole = sample_without_replacement(np.random.default_rng(3), 1000, 300, 70)
+    monkeypatch.setattr(selection, '_DENSE_KEYS', 4096)
+    blocked = sample_without_replacement(np.random.default_rng(3), 1000, 300, 70)
+    assert np.array_equal(whole, blocked)
+
+def test_tournament_winner_is_the_fittest_candidate():
+    fitness = np.random.default_rng(1).integers(0, 5, size=60)
+    winners, candidates = tournament_selection(np.random.default_rng(2), fitness, 8, 40)
+    for winner, row in zip(winners, candidates):
+        assert winner == min(row, key=lambda i: (fitness[i], i))
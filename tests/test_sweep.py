@@ -0,0 +1,13 @@
+from components.sweep import success_rate_sweep
+
+# Includes the notebook's first point: length 1 has fewer distinct individuals than the population
+POINTS = [
+    {"population": 10, "target_gene_length": 1, "mutation_probability": 5, "gen_cap": 20},
+    {"population": 8, "target_gene_length": 12, "mutation_probability": 10, "gen_cap": 30},
+]
+
+def test_sweep_is_identical_for_any_number_of_workers():
+    serial = success_rate_sweep('ACTG', POINTS, iterations=12, seed=3, workers=1)
+    parallel = success_rate_sweep('ACTG', POINTS, iterations=12, seed=3, workers=3, chunk_size=5)
+    assert serial == parallel
+    assert serial[0]["successes"] == 12 and 0 <= serial[1]["p"] <= 1
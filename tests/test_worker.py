@@ -0,0 +1,53 @@
+import random, time
+import numpy as np
+
+from components.genetic_algorithm import GenAlgo
+from components.population import Population
+from components.worker import Simulation, SimulationWorker
+
+GENES = 'ACTG'
+
+def simulation(seed:int, size:int = 10, length:int = 60, max_gen:int = 200):
+    rng = random.Random(seed)
+    target = [rng.choice(GENES) for _ in range(length)]
+    algorithm = GenAlgo(GENES, target, np.random.default_rng(seed))
+    population = Population(GENES)
+    for _ in range(size):
+        individual = [rng.choice(GENES) for _ in range(length)]
+        population.push(algorithm.fitness(individual), individual)
+    return Simulation(algorithm, population, size, max_gen, 1, 5, size // 3)
+
+# Step mode: nobody takes the snapshots, so the worker blocks on the full queue until stopped
+def test_stop_unblocks_a_worker_waiting_on_a_full_queue():
+    worker = SimulationWorker(simulation(1), queue_size=2)
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not worker.snapshots.full() and time.monotonic() < deadline: time.sleep(0.01)
+    assert worker.snapshots.full() and worker.is_alive()
+
+    worker.stop()
+    worker.join(timeout=2)
+    assert not worker.is_alive()
+
+    # The queued snapshots are still the first steps, in order
+    snapshots = [worker.next_snapshot(), worker.next_snapshot()]
+    assert [s["gen"] for s in snapshots] == [1, 1] and worker.next_snapshot() is None
+
+# Fast-forward: the UI may miss generation summaries but always gets the final snapshot
+def test_fast_forward_always_delivers_the_final_snapshot():
+    worker = SimulationWorker(simulation(2, max_gen=300), fast_forward=True)
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive()
+
+    final = worker.latest_snapshot()
+    assert final["finished"] and final["gen"] == worker.current_generation()[0]
+
+    # Taken while it runs: the last one taken is still the final one
+    worker = SimulationWorker(simulation(2, max_gen=300), fast_forward=True)
+    worker.start()
+    taken = []
+    while worker.is_alive() or not worker.snapshots.empty():
+        if (snapshot := worker.next_snapshot()) is not None: taken.append(snapshot)
+    assert taken[-1]["finished"] and taken[-1]["gen"] == final["gen"]
+    assert [s["gen"] for s in taken] == sorted(s["gen"] for s in taken)